@@ -0,0 +1,379 @@
+"""
+Async Agent Runtime (2025)
+
+Demonstrates one reusable tool loop (call the model -> run its tool calls ->
+call again) in place of a hand-written copy per agent. Tool calls from one
+response run concurrently, the number of tool rounds is bounded, transient
+API errors are retried with jittered exponential backoff, responses can be
+streamed, hooks observe each step, and a ToolSelector can narrow the tools
+offered to the relevant ones. Sync and async OpenAI clients both work.
+"""
+
+import asyncio
+import inspect
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+
+import openai
+
+from advanced.parallel_tools import ParallelToolExecutor, ToolCallResult, tool_call_parts
+from advanced.tool_selector import ToolSelector
+
+# Errors worth another attempt: rate limits, 5xx responses, timeouts and dropped connections
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError
+)
+
+
+class AgentHooks:
+    """Callbacks for each step of the loop; override the ones you need"""
+
+    def on_llm_start(self, messages: List, request: Dict):
+        """Before each model call (request holds the other create() arguments)"""
+
+    def on_llm_end(self, messages: List, message: Any):
+        """After each model call, before its message is appended to `messages`"""
+
+    def on_tool_start(self, name: str, arguments: str):
+        """Before a tool call runs, in call order"""
+
+    def on_tool_end(self, result: ToolCallResult):
+        """After a round of tool calls, in call order; may rewrite result.content"""
+
+    def on_retry(self, attempt: int, error: BaseException, delay: float):
+        """After a failed model call, before sleeping `delay` seconds"""
+
+
+@dataclass
+class AgentResult:
+    """Outcome of one run of the loop"""
+    content: Optional[str]
+    messages: List
+    llm_calls: int = 0
+    tool_calls: int = 0
+    tool_rounds: int = 0
+    retries: int = 0
+    stopped: str = "answer"  # or "max_tool_rounds" when the loop was cut off
+
+
+@dataclass
+class AgentEvent:
+    """A streamed step: "delta" (text), "tool_call" ((id, name, arguments)),
+    "tool_result" (ToolCallResult) or "done" (AgentResult)"""
+    type: str
+    data: Any = None
+
+
+@dataclass
+class _Accumulator:
+    """Rebuilds an assistant message from stream chunks"""
+    content: List[str] = field(default_factory=list)
+    tool_calls: Dict[int, Dict] = field(default_factory=dict)
+
+    def add(self, delta: Any):
+        for chunk in getattr(delta, "tool_calls", None) or []:
+            call = self.tool_calls.setdefault(
+                chunk.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}}
+            )
+            call["id"] = chunk.id or call["id"]
+            if chunk.function is not None:
+                call["function"]["name"] += chunk.function.name or ""
+                call["function"]["arguments"] += chunk.function.arguments or ""
+
+    def message(self) -> Dict:
+        message = {"role": "assistant", "content": "".join(self.content) or None}
+        if self.tool_calls:
+            message["tool_calls"] = [self.tool_calls[index] for index in sorted(self.tool_calls)]
+        return message
+
+
+def _tool_calls(message: Any) -> List:
+    if isinstance(message, Mapping):
+        return message.get("tool_calls") or []
+    return getattr(message, "tool_calls", None) or []
+
+
+def _content(message: Any) -> Optional[str]:
+    return message.get("content") if isinstance(message, Mapping) else message.content
+
+
+def _last_user_text(messages: List) -> str:
+    for message in reversed(messages):
+        if isinstance(message, Mapping) and message.get("role") == "user" and isinstance(message.get("content"), str):
+            return message["content"]
+    return ""
+
+
+class AgentRuntime:
+    """The shared call -> tool_calls -> execute -> call loop.
+
+    Each tool round offers the tools; once `max_tool_rounds` rounds have run,
+    the model is called once more without tools for a final answer
+    (final_answer=True) or the run stops there (final_answer=False).
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        tools: Optional[List[Dict]] = None,
+        functions: Optional[Mapping[str, Callable]] = None,
+        executor: Optional[ParallelToolExecutor] = None,
+        model: str = "gpt-4",
+        max_tool_rounds: int = 5,
+        final_answer: bool = True,
+        parallel_tool_calls: Optional[bool] = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        retry_on: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS,
+        hooks: Optional[AgentHooks] = None,
+        tool_selector: Optional[ToolSelector] = None
+    ):
+        """
+        Args:
+            llm_client: OpenAI or AsyncOpenAI compatible client
+            tools: Tool schemas offered to the model
+            functions: Tool implementations by name (ignored when executor is given)
+            executor: Shared executor, e.g. with per-tool limits or a registry's parse_arguments
+            model: Chat model
+            max_tool_rounds: Most tool rounds per run
+            final_answer: Ask for an answer without tools once the rounds are used up
+            parallel_tool_calls: Sent with every request that offers tools, when set
+            max_retries: Retries per model call for errors in retry_on
+            backoff: Base delay; attempt n sleeps uniformly in [0, min(max_backoff, backoff * 2**n)]
+            max_backoff: Cap on a single delay
+            retry_on: Exception types that are retried
+            hooks: Step callbacks
+            tool_selector: Offer only the tools relevant to the last user message;
+                a call to a tool outside that subset is retried with every tool
+        """
+        self.client = llm_client
+        self.tools = tools or []
+        self.executor = executor or ParallelToolExecutor(functions or {})
+        self.model = model
+        self.max_tool_rounds = max_tool_rounds
+        self.final_answer = final_answer
+        self.parallel_tool_calls = parallel_tool_calls
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.hooks = hooks or AgentHooks()
+        self.tool_selector = tool_selector
+
+    async def _create(self, request: Dict) -> Any:
+        """One create() call; sync clients run in a worker thread so the loop stays free"""
+        create = self.client.chat.completions.create
+        if inspect.iscoroutinefunction(create):
+            return await create(**request)
+        response = await asyncio.to_thread(create, **request)
+        return await response if inspect.isawaitable(response) else response
+
+    async def _call(self, messages: List, tools: Optional[List[Dict]], stream: bool, result: AgentResult) -> Any:
+        """create() with jittered exponential backoff on retryable errors"""
+        request = {"model": self.model}
+        if tools:
+            request["tools"] = tools
+            if self.parallel_tool_calls is not None:
+                request["parallel_tool_calls"] = self.parallel_tool_calls
+        if stream:
+            request["stream"] = True
+        self.hooks.on_llm_start(messages, request)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._create(dict(request, messages=messages))
+                result.llm_calls += 1
+                return response
+            except self.retry_on as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                result.retries += 1
+                self.hooks.on_retry(attempt + 1, e, delay)
+                await asyncio.sleep(delay)
+
+    async def _events(
+        self,
+        messages: List,
+        tools: Optional[List[Dict]],
+        functions: Optional[Mapping[str, Callable]],
+        max_tool_rounds: Optional[int],
+        stream: bool
+    ) -> AsyncIterator[AgentEvent]:
+        selected = None
+        if tools is None and self.tool_selector is not None:
+            selected = self.tool_selector.select(_last_user_text(messages))
+        tools = self.tools if tools is None else tools
+        rounds = self.max_tool_rounds if max_tool_rounds is None else max_tool_rounds
+        result = AgentResult(content=None, messages=messages)
+        while True:
+            offered = (tools if selected is None else selected) if result.tool_rounds < rounds else None
+            response = await self._call(messages, offered, stream, result)
+            if stream:
+                accumulator = _Accumulator()
+                if hasattr(response, "__aiter__"):
+                    async for chunk in response:
+                        delta = chunk.choices[0].delta
+                        accumulator.add(delta)
+                        if delta.content:
+                            accumulator.content.append(delta.content)
+                            yield AgentEvent("delta", delta.content)
+                else:
+                    chunks = iter(response)
+                    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                        delta = chunk.choices[0].delta
+                        accumulator.add(delta)
+                        if delta.content:
+                            accumulator.content.append(delta.content)
+                            yield AgentEvent("delta", delta.content)
+                message = accumulator.message()
+            else:
+                message = response.choices[0].message
+            self.hooks.on_llm_end(messages, message)
+
+            tool_calls = _tool_calls(message)
+            if selected is not None and offered is not None:
+                names = {tool["function"]["name"] for tool in selected}
+                if any(tool_call_parts(tool_call)[1] not in names for tool_call in tool_calls):
+                    selected = None  # the subset missed: ask again with every tool
+                    continue
+            if not tool_calls or offered is None:
+                result.content = _content(message)
+                break
+
+            messages.append(message)
+            for tool_call in tool_calls:
+                call_id, name, arguments = tool_call_parts(tool_call)
+                self.hooks.on_tool_start(name, arguments)
+                yield AgentEvent("tool_call", (call_id, name, arguments))
+            results = await self.executor.execute_async(tool_calls, functions)
+            for tool_result in results:
+                self.hooks.on_tool_end(tool_result)
+                messages.append(tool_result.to_message())
+                yield AgentEvent("tool_result", tool_result)
+            result.tool_calls += len(results)
+            result.tool_rounds += 1
+            if result.tool_rounds >= rounds and not self.final_answer:
+                result.stopped = "max_tool_rounds"
+                break
+        yield AgentEvent("done", result)
+
+    async def run_async(
+        self,
+        messages: List,
+        tools: Optional[List[Dict]] = None,
+        functions: Optional[Mapping[str, Callable]] = None,
+        max_tool_rounds: Optional[int] = None
+    ) -> AgentResult:
+        """Run the loop on `messages` (extended in place) until the model answers.
+
+        tools, functions and max_tool_rounds override the runtime's for this
+        run; functions are looked up before the executor's own.
+        """
+        async for event in self._events(messages, tools, functions, max_tool_rounds, stream=False):
+            if event.type == "done":
+                return event.data
+
+    async def stream(
+        self,
+        messages: List,
+        tools: Optional[List[Dict]] = None,
+        functions: Optional[Mapping[str, Callable]] = None,
+        max_tool_rounds: Optional[int] = None
+    ) -> AsyncIterator[AgentEvent]:
+        """Like run_async, with stream=True calls: text deltas, tool calls and
+        results as they happen, then "done". Only opening a stream is retried."""
+        async for event in self._events(messages, tools, functions, max_tool_rounds, stream=True):
+            yield event
+
+    def run(self, messages: List, **overrides) -> AgentResult:
+        """Blocking wrapper around run_async (not for use inside a running loop)"""
+        return asyncio.run(self.run_async(messages, **overrides))
+
+    async def run_many(self, conversations: Sequence[List], max_concurrency: int = 32, **overrides) -> List[AgentResult]:
+        """Run many conversations concurrently; results keep the input order"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(messages: List) -> AgentResult:
+            async with semaphore:
+                return await self.run_async(messages, **overrides)
+
+        return list(await asyncio.gather(*(run_one(messages) for messages in conversations)))
+
+
+def run_benchmark(conversations: int = 40, llm_latency: float = 0.2, tool_latency: float = 0.1, failure_rate: float = 0.1):
+    """Conversations per second: the old synchronous loop vs. the async runtime"""
+    import httpx
+
+    from advanced.mock_llm import AsyncMockChatClient, MockChatClient, tool_call_message
+
+    failures = random.Random(0)
+
+    def responder(request: Dict):
+        if failures.random() < failure_rate:
+            response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+            raise openai.RateLimitError("Rate limit reached", response=response, body=None)
+        if request["messages"][-1]["role"] == "user":
+            city = request["messages"][-1]["content"]
+            return tool_call_message(("get_weather", {"location": city}), ("get_time", {"location": city}))
+        return "Sunny, and it is noon."
+
+    def get_weather(location: str) -> str:
+        time.sleep(tool_latency)
+        return json.dumps({"location": location, "condition": "sunny"})
+
+    async def get_time(location: str) -> str:
+        await asyncio.sleep(tool_latency)
+        return json.dumps({"location": location, "time": "12:00"})
+
+    functions = {"get_weather": get_weather, "get_time": get_time}
+    tools = [{"type": "function", "function": {"name": name, "parameters": {"type": "object"}}} for name in functions]
+    queries = [f"City {i}" for i in range(conversations)]
+
+    def legacy_loop(llm, query: str) -> str:
+        """The hand-written loop the agents used: sequential tools, no retries"""
+        messages = [{"role": "user", "content": query}]
+        response_message = llm.chat.completions.create(model="gpt-4", messages=messages, tools=tools).choices[0].message
+        messages.append(response_message)
+        for tool_call in response_message.tool_calls or []:
+            function = functions[tool_call.function.name]
+            kwargs = json.loads(tool_call.function.arguments)
+            content = asyncio.run(function(**kwargs)) if inspect.iscoroutinefunction(function) else function(**kwargs)
+            messages.append({"role": "tool", "tool_call_id": tool_call.id, "content": content})
+        return llm.chat.completions.create(model="gpt-4", messages=messages).choices[0].message.content
+
+    print("=== Agent Runtime Throughput Benchmark ===\n")
+    print(f"{conversations} conversations, each 2 model calls ({llm_latency * 1000:.0f} ms) "
+          f"and 2 tool calls ({tool_latency * 1000:.0f} ms); {failure_rate:.0%} of model calls rate-limited\n")
+    print(f"{'Loop':<28} {'Completed':>10} {'Failed':>7} {'Retries':>8} {'Wall':>8} {'Conv/s':>8}")
+
+    llm = MockChatClient(responder, latency=llm_latency)
+    completed = failed = 0
+    start = time.perf_counter()
+    for query in queries:
+        try:
+            legacy_loop(llm, query)
+            completed += 1
+        except openai.RateLimitError:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    print(f"{'sequential, no retries':<28} {completed:>10} {failed:>7} {0:>8} {elapsed:>7.2f}s {completed / elapsed:>8.1f}")
+
+    for name, concurrency in (("runtime, 1 at a time", 1), ("runtime, 32 concurrent", 32)):
+        runtime = AgentRuntime(AsyncMockChatClient(responder, latency=llm_latency), tools=tools, functions=functions,
+                               max_tool_rounds=1, backoff=0.05)
+        start = time.perf_counter()
+        results = asyncio.run(runtime.run_many(
+            [[{"role": "user", "content": query}] for query in queries], max_concurrency=concurrency
+        ))
+        elapsed = time.perf_counter() - start
+        retries = sum(r.retries for r in results)
+        print(f"{name:<28} {len(results):>10} {0:>7} {retries:>8} {elapsed:>7.2f}s {len(results) / elapsed:>8.1f}")
+        runtime.executor.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,376 @@
+"""
+Batch API Runner (2025)
+
+Demonstrates moving bulk, latency-tolerant work (nightly code reviews,
+backlog triage) from interactive calls to the Batch API, which is billed at
+half price in exchange for a completion window of up to 24 hours:
+- Requests are written to JSONL, uploaded and submitted (split into several
+  batches when large)
+- Batches are polled; finished output is downloaded and streamed back as
+  typed objects
+- A checkpoint directory records every step, so an interrupted run resumes
+  without resubmitting or re-paying for anything
+- LocalBatchClient runs the same flow against any chat-completions client
+  (e.g. the mock LLM) for tests and offline benchmarks
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+MAX_REQUESTS_PER_BATCH = 50_000  # Batch API limit per input file
+
+
+@dataclass
+class BatchResult(Generic[T]):
+    """One request's outcome: a parsed value or an error message"""
+    custom_id: str
+    value: Optional[T] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def json_schema_format(model: Type[BaseModel]) -> Dict:
+    """response_format for a Pydantic model, for request bodies that are
+    serialized to JSONL (where the SDK's `response_format=Model` is not available)"""
+    return {"type": "json_schema", "json_schema": {"name": model.__name__, "schema": model.model_json_schema()}}
+
+
+def message_of(body: Dict) -> Dict:
+    """The assistant message of a chat completion response body"""
+    return body["choices"][0]["message"]
+
+
+def parse_model(model: Type[BaseModel]) -> Callable[[Dict], BaseModel]:
+    """Parser for responses whose content is a `model` as JSON"""
+    return lambda body: model.model_validate_json(message_of(body)["content"])
+
+
+def _write_json(path: Path, data: Any):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)  # atomic: a crash never leaves a half-written checkpoint
+
+
+class BatchRunner:
+    """Submit chat-completion requests as batches and stream typed results back.
+
+    One workdir holds one job. Re-running with the same workdir resumes it:
+    uploaded files and created batches are reused, and results already
+    downloaded are replayed from the checkpoint instead of fetched again.
+    """
+
+    def __init__(
+        self,
+        client,
+        workdir: Union[str, Path],
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+        max_requests_per_batch: int = MAX_REQUESTS_PER_BATCH
+    ):
+        """
+        Args:
+            client: OpenAI() or LocalBatchClient
+            workdir: Checkpoint directory for this job
+            poll_interval: Seconds between status checks
+            completion_window: Batch completion window
+            max_requests_per_batch: Split larger jobs into several batches
+        """
+        self.client = client
+        self.workdir = Path(workdir)
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.max_requests_per_batch = max_requests_per_batch
+        self._state_path = self.workdir / "state.json"
+        self._results_path = self.workdir / "results.jsonl"
+        self.stats = {"submitted": 0, "resumed": 0, "replayed": 0}
+
+    def _load_state(self) -> Dict:
+        if self._state_path.exists():
+            return json.loads(self._state_path.read_text())
+        return {"batches": []}
+
+    def _prepare(self, state: Dict, requests: Iterable[Tuple[str, Dict]]):
+        """Write the request JSONL files for a new job"""
+        part, ids, out = 0, [], None
+        for custom_id, body in requests:
+            if out is None or len(ids) >= self.max_requests_per_batch:
+                if out is not None:
+                    out.close()
+                    state["batches"].append({"input": Path(out.name).name, "ids": ids})
+                part, ids = part + 1, []
+                out = open(self.workdir / f"input-{part}.jsonl", "w")
+            out.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}) + "\n")
+            ids.append(custom_id)
+        if out is not None:
+            out.close()
+            state["batches"].append({"input": Path(out.name).name, "ids": ids})
+        _write_json(self._state_path, state)
+
+    def _submit(self, state: Dict):
+        for batch in state["batches"]:
+            if batch.get("batch_id"):
+                self.stats["resumed"] += 1
+                continue
+            # Each remote object is checkpointed the moment it exists, so a
+            # crash can at worst repeat the one call that was in flight
+            if not batch.get("input_file_id"):
+                with open(self.workdir / batch["input"], "rb") as f:
+                    file_id = self.client.files.create(file=f, purpose="batch").id
+                batch["input_file_id"] = file_id
+                _write_json(self._state_path, state)
+            batch_id = self.client.batches.create(
+                input_file_id=batch["input_file_id"],
+                endpoint=ENDPOINT,
+                completion_window=self.completion_window
+            ).id
+            batch.update(batch_id=batch_id, status="submitted")
+            _write_json(self._state_path, state)
+            self.stats["submitted"] += 1
+
+    def _download(self, batch: Dict, remote) -> List[Dict]:
+        """Output and error lines of a finished batch, plus errors for requests it never ran"""
+        lines = []
+        for file_id in (getattr(remote, "output_file_id", None), getattr(remote, "error_file_id", None)):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        seen = {line["custom_id"] for line in lines}
+        lines.extend(
+            {"custom_id": custom_id, "error": {"message": f"batch {remote.status}"}}
+            for custom_id in batch["ids"] if custom_id not in seen
+        )
+        return lines
+
+    def _replay(self) -> List[Dict]:
+        """Lines already in results.jsonl; a torn last line (a crash mid-append) is cut off"""
+        if not self._results_path.exists():
+            return []
+        lines, good = [], 0
+        with open(self._results_path, "rb") as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    lines.append(json.loads(raw))
+                except ValueError:
+                    break
+                good += len(raw)
+        if good < self._results_path.stat().st_size:
+            with open(self._results_path, "r+b") as f:
+                f.truncate(good)
+        return lines
+
+    @staticmethod
+    def _result(line: Dict, parse: Callable[[Dict], T]) -> BatchResult[T]:
+        custom_id = line["custom_id"]
+        if line.get("error"):
+            return BatchResult(custom_id, error=line["error"].get("message", str(line["error"])))
+        response = line["response"]
+        if response.get("status_code", 200) != 200:
+            return BatchResult(custom_id, error=f"HTTP {response['status_code']}: {json.dumps(response.get('body'))}")
+        try:
+            return BatchResult(custom_id, parse(response["body"]))
+        except Exception as e:  # a malformed answer fails this request only
+            return BatchResult(custom_id, error=f"parse error: {e}")
+
+    def run(
+        self,
+        requests: Iterable[Tuple[str, Dict]],
+        parse: Callable[[Dict], T] = message_of
+    ) -> Iterator[BatchResult[T]]:
+        """Submit (or resume) the job and yield a result per request as batches finish.
+
+        Args:
+            requests: (custom_id, chat.completions.create body) pairs; ignored
+                when resuming a job that was already prepared
+            parse: Turns a response body into the result value
+        """
+        state = self._load_state()
+        if not state["batches"]:
+            self._prepare(state, requests)
+        self._submit(state)
+
+        # A crash between appending a batch's results and marking it collected
+        # leaves it pending with its results already on disk; those are
+        # replayed here and skipped when the batch is downloaded again
+        done = set()
+        for line in self._replay():
+            if line["custom_id"] in done:
+                continue
+            done.add(line["custom_id"])
+            self.stats["replayed"] += 1
+            yield self._result(line, parse)
+
+        pending = [batch for batch in state["batches"] if batch.get("status") != "collected"]
+        while pending:
+            for batch in list(pending):
+                remote = self.client.batches.retrieve(batch["batch_id"])
+                if remote.status not in TERMINAL_STATUSES:
+                    continue
+                lines = [line for line in self._download(batch, remote) if line["custom_id"] not in done]
+                done.update(line["custom_id"] for line in lines)
+                with open(self._results_path, "a") as f:
+                    for line in lines:
+                        f.write(json.dumps(line) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                batch["status"] = "collected"
+                _write_json(self._state_path, state)
+                pending.remove(batch)
+                for line in lines:
+                    yield self._result(line, parse)
+            if pending:
+                time.sleep(self.poll_interval)
+
+
+def _completion_body(completion) -> Dict:
+    """A chat completion (SDK or mock) as the JSON body the Batch API returns"""
+    if hasattr(completion, "model_dump"):
+        return completion.model_dump()
+    message = completion.choices[0].message
+    content = message.content
+    if content is None and message.parsed is not None:
+        content = message.parsed.model_dump_json()
+    tool_calls = [
+        {"id": call.id, "type": "function", "function": {"name": call.function.name, "arguments": call.function.arguments}}
+        for call in message.tool_calls or []
+    ] or None
+    return {
+        "object": "chat.completion",
+        "model": completion.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "tool_calls": tool_calls},
+            "finish_reason": completion.choices[0].finish_reason
+        }],
+        "usage": {
+            "prompt_tokens": completion.usage.prompt_tokens,
+            "completion_tokens": completion.usage.completion_tokens,
+            "total_tokens": completion.usage.total_tokens
+        }
+    }
+
+
+class LocalBatchClient:
+    """Stand-in for the `files` and `batches` APIs of `OpenAI()`.
+
+    Batches run in a background thread against `chat_client` (e.g.
+    MockChatClient), `workers` requests at a time.
+    """
+
+    def __init__(self, chat_client, workers: int = 8):
+        self.chat_client = chat_client
+        self.workers = workers
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose: str = "batch") -> SimpleNamespace:
+        data = file.read() if hasattr(file, "read") else Path(file).read_bytes()
+        file_id = f"file-local-{next(self._ids)}"
+        with self._lock:
+            self._files[file_id] = data
+        return SimpleNamespace(id=file_id, purpose=purpose, bytes=len(data))
+
+    def _file_content(self, file_id: str) -> SimpleNamespace:
+        data = self._files[file_id]
+        return SimpleNamespace(content=data, text=data.decode())
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str, **_) -> SimpleNamespace:
+        lines = [json.loads(line) for line in self._files[input_file_id].decode().splitlines() if line.strip()]
+        batch = SimpleNamespace(
+            id=f"batch-local-{next(self._ids)}",
+            status="in_progress",
+            input_file_id=input_file_id,
+            endpoint=endpoint,
+            completion_window=completion_window,
+            output_file_id=None,
+            error_file_id=None,
+            request_counts=SimpleNamespace(total=len(lines), completed=0, failed=0)
+        )
+        with self._lock:
+            self._batches[batch.id] = batch
+        threading.Thread(target=self._process, args=(batch, lines), daemon=True).start()
+        return SimpleNamespace(**vars(batch))
+
+    def _run_one(self, line: Dict) -> Tuple[bool, Dict]:
+        try:
+            completion = self.chat_client.chat.completions.create(**line["body"])
+        except Exception as e:
+            return False, {"custom_id": line["custom_id"], "response": None,
+                           "error": {"code": type(e).__name__, "message": str(e)}}
+        return True, {
+            "custom_id": line["custom_id"],
+            "response": {"status_code": 200, "body": _completion_body(completion)},
+            "error": None
+        }
+
+    def _process(self, batch: SimpleNamespace, lines: List[Dict]):
+        output, errors = [], []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for ok, result in pool.map(self._run_one, lines):
+                (output if ok else errors).append(json.dumps(result))
+        with self._lock:
+            for name, rows in (("output_file_id", output), ("error_file_id", errors)):
+                if rows:
+                    file_id = f"file-local-{next(self._ids)}"
+                    self._files[file_id] = ("\n".join(rows) + "\n").encode()
+                    setattr(batch, name, file_id)
+            batch.request_counts = SimpleNamespace(total=len(lines), completed=len(output), failed=len(errors))
+            batch.status = "completed"
+
+    def _retrieve_batch(self, batch_id: str) -> SimpleNamespace:
+        with self._lock:
+            batch = self._batches[batch_id]
+            return SimpleNamespace(**vars(batch))
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from advanced.mock_llm import MockChatClient
+
+    questions = [f"Classify support message #{i}" for i in range(200)]
+    chat = MockChatClient(lambda request: "billing" if "7" in request["messages"][-1]["content"] else "technical",
+                          latency=0.05)
+    requests = [
+        (f"msg-{i}", {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": question}]})
+        for i, question in enumerate(questions)
+    ]
+    parse_label = lambda body: message_of(body)["content"]
+
+    server = LocalBatchClient(chat)  # outlives the runners, like the real service
+    with tempfile.TemporaryDirectory() as workdir:
+        print("=== Batch Runner Demo ===\n")
+        first = BatchRunner(server, workdir, poll_interval=0.05, max_requests_per_batch=80)
+        for result in first.run(requests, parse_label):
+            print(f"First run got {result.custom_id} = {result.value}, then was interrupted")
+            break
+
+        resumed = BatchRunner(server, workdir, poll_interval=0.05)
+        results = list(resumed.run(requests, parse_label))
+        print(f"Resumed run: {len(results)} results, batches submitted again: {resumed.stats['submitted']}, "
+              f"replayed from checkpoint: {resumed.stats['replayed']}")
+        print(f"Labels: {sum(r.value == 'billing' for r in results)} billing, "
+              f"{sum(r.value == 'technical' for r in results)} technical")
@@ -0,0 +1,154 @@
+"""
+Compact Conversation Storage (2025)
+
+Demonstrates holding many concurrent chat sessions cheaply: each message is
+a one-byte role code plus a reference to its content string, stored in two
+parallel arrays instead of one dict per message; system prompts are interned
+and shared by every session; the API message list is projected on demand,
+reusing the stored strings rather than copying them.
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Text turns only: a tool message is only valid with its tool_call_id, right
+# after the assistant message that made the call, so tool rounds stay in the
+# per-request message list (see AgentRuntime) and are not stored here
+ROLES = ("system", "user", "assistant")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+
+def shared_prompt(text: str) -> str:
+    """Intern a system prompt so identical prompts are stored once per process"""
+    return sys.intern(text)
+
+
+class Conversation:
+    """Message log for one session: role codes in an array, contents in a list.
+
+    Costs one byte plus one pointer per message, on top of the content
+    strings themselves (a message dict costs ~200 bytes).
+    """
+
+    __slots__ = ("system_prompt", "max_messages", "_roles", "_contents")
+
+    def __init__(self, system_prompt: Optional[str] = None, max_messages: Optional[int] = None):
+        self.system_prompt = shared_prompt(system_prompt) if system_prompt else None
+        self.max_messages = max_messages
+        self._roles = array("B")
+        self._contents: List[str] = []
+
+    def append(self, role: str, content: str):
+        """Add a message, dropping the oldest ones beyond max_messages"""
+        try:
+            self._roles.append(ROLE_CODES[role])
+        except KeyError:
+            raise ValueError(f"Unknown role '{role}', expected one of {ROLES}") from None
+        self._contents.append(content)
+        if self.max_messages is not None and len(self._contents) > self.max_messages:
+            excess = len(self._contents) - self.max_messages
+            del self._roles[:excess]
+            del self._contents[:excess]
+
+    def add_user(self, content: str):
+        self.append("user", content)
+
+    def add_assistant(self, content: str):
+        self.append("assistant", content)
+
+    def clear(self):
+        del self._roles[:]
+        self._contents.clear()
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """(role, content) pairs, oldest first"""
+        for code, content in zip(self._roles, self._contents):
+            yield ROLES[code], content
+
+    def to_messages(self, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """Chat Completions message list; content strings are shared, not copied.
+
+        system_prompt overrides the stored prompt for this request (e.g. one
+        extended with retrieved context); pass "" to omit it.
+        """
+        prompt = self.system_prompt if system_prompt is None else system_prompt
+        messages = [{"role": "system", "content": prompt}] if prompt else []
+        messages.extend(
+            {"role": ROLES[code], "content": content}
+            for code, content in zip(self._roles, self._contents)
+        )
+        return messages
+
+
+def _dict_session(system_prompt: str, turns: List[Tuple[str, str]]) -> Dict:
+    """Baseline: the bot's pattern of a per-instance prompt copy plus one dict per message"""
+    session = {"system_prompt": system_prompt.encode().decode(), "history": []}  # a distinct copy
+    for user, assistant in turns:
+        session["history"].append({"role": "user", "content": user})
+        session["history"].append({"role": "assistant", "content": assistant})
+    return session
+
+
+def _compact_session(system_prompt: str, turns: List[Tuple[str, str]]) -> Conversation:
+    conversation = Conversation(system_prompt)
+    for user, assistant in turns:
+        conversation.add_user(user)
+        conversation.add_assistant(assistant)
+    return conversation
+
+
+def _measure(build, sessions: int) -> Tuple[float, list]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = [build() for _ in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / sessions, built
+
+
+def run_benchmark(sessions: int = 100_000, turns: int = 3):
+    """Memory per session and per turn at 100k sessions"""
+    system_prompt = "You are a helpful customer support agent. " * 8
+    # Content strings are shared by both layouts, so only the storage overhead is measured
+    short = [(f"User message {i}", f"Assistant reply {i}") for i in range(turns)]
+    long = [(f"User message {i}", f"Assistant reply {i}") for i in range(turns * 2)]
+
+    rows = []
+    for name, build in (("dicts + prompt copy", _dict_session), ("Conversation", _compact_session)):
+        per_session = _measure(lambda: build(system_prompt, short), sessions)[0]
+        longer, built = _measure(lambda: build(system_prompt, long), sessions)
+        per_turn = (longer - per_session) / turns  # one turn = user + assistant message
+        del built
+
+        sample = build(system_prompt, short)
+        start = time.perf_counter()
+        for _ in range(10_000):
+            if isinstance(sample, Conversation):
+                sample.to_messages()
+            else:
+                [{"role": "system", "content": sample["system_prompt"]}] + sample["history"]
+        projection = (time.perf_counter() - start) / 10_000
+        rows.append((name, per_session, per_turn, projection))
+
+    print("=== Compact Conversation Benchmark ===\n")
+    print(f"{sessions:,} sessions, {turns} turns each (content strings excluded)\n")
+    print(f"{'Layout':<22} {'Per session':>12} {'Per turn':>10} {'Total':>10} {'Build messages':>15}")
+    for name, per_session, per_turn, projection in rows:
+        print(f"{name:<22} {per_session:>10.0f} B {per_turn:>8.0f} B "
+              f"{per_session * sessions / 2**20:>7.1f} MiB {projection * 1e6:>12.2f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compact conversation storage")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+    run_benchmark(args.sessions)
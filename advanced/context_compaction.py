@@ -0,0 +1,138 @@
+"""
+Tool Output Compaction (2025)
+
+Demonstrates keeping agent-loop prompts small: once the model has read a
+tool result, the result is replaced in the message list by a compact extract
+plus a reference. The full payload stays in a local side store, and the model
+can get it back with a fetch tool if it needs the detail again.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+FETCH_TOOL_NAME = "fetch_tool_output"
+
+FETCH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": FETCH_TOOL_NAME,
+        "description": "Retrieve the full output of an earlier tool call that was compacted",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "ref": {"type": "string", "description": "Reference shown in the compacted output"}
+            },
+            "required": ["ref"]
+        }
+    }
+}
+
+Extractor = Callable[[str], str]
+
+
+def truncate_extract(content: str, max_chars: int = 300) -> str:
+    """Default extractor: the head of the output"""
+    return content if len(content) <= max_chars else content[:max_chars] + "…"
+
+
+def extract_search_results(content: str, snippet_chars: int = 160) -> str:
+    """Titles, URLs and shortened snippets of a web_search result"""
+    try:
+        data = json.loads(content)
+        results = data["results"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return truncate_extract(content)
+    return json.dumps({
+        "query": data.get("query"),
+        "results": [
+            {
+                "title": r.get("title"),
+                "url": r.get("url"),
+                "snippet": truncate_extract(r.get("snippet") or "", snippet_chars)
+            }
+            for r in results
+        ]
+    })
+
+
+class SideStore:
+    """Content-addressed LRU store of full tool outputs"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()  # ref -> (tool name, content)
+
+    @staticmethod
+    def ref_for(content: str) -> str:
+        return hashlib.sha1(content.encode()).hexdigest()[:12]
+
+    def put(self, tool_name: str, content: str) -> str:
+        ref = self.ref_for(content)
+        self._entries[ref] = (tool_name, content)
+        self._entries.move_to_end(ref)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return ref
+
+    def get(self, ref: str) -> Optional[Tuple[str, str]]:
+        entry = self._entries.get(ref)
+        if entry is not None:
+            self._entries.move_to_end(ref)
+        return entry
+
+
+class ToolOutputCompactor:
+    """Replace consumed tool outputs in a message list with extracts + references.
+
+    Call compact() after each model response: every tool message present at
+    that point has been read once, so only its extract needs to be resent.
+    """
+
+    def __init__(
+        self,
+        extractors: Optional[Dict[str, Extractor]] = None,
+        store: Optional[SideStore] = None,
+        min_chars: int = 400
+    ):
+        self.extractors = extractors or {}
+        self.store = store or SideStore()
+        self.min_chars = min_chars
+        self.saved_chars = 0
+        self._compacted = set()  # tool_call_ids already replaced
+
+    def _extract(self, tool_name: str, content: str) -> str:
+        return self.extractors.get(tool_name, truncate_extract)(content)
+
+    def compact(self, messages: List) -> int:
+        """Compact tool messages in place; returns the number of characters removed"""
+        saved = 0
+        for message in messages:
+            if not isinstance(message, dict) or message.get("role") != "tool":
+                continue
+            call_id, content = message.get("tool_call_id"), message.get("content") or ""
+            if call_id in self._compacted or len(content) < self.min_chars:
+                continue
+            self._compacted.add(call_id)
+
+            name = message.get("name", "")
+            if name == FETCH_TOOL_NAME:
+                # A re-fetched payload: compact it the way its original tool was
+                original = self.store.get(SideStore.ref_for(content))
+                name = original[0] if original else name
+            ref = self.store.put(name, content)
+            extract = self._extract(name, content)
+            replacement = f'{extract}\n[compacted; full output: {FETCH_TOOL_NAME}(ref="{ref}")]'
+            if len(replacement) < len(content):
+                message["content"] = replacement
+                saved += len(content) - len(replacement)
+        self.saved_chars += saved
+        return saved
+
+    def fetch(self, ref: str) -> str:
+        """Implementation of the fetch tool"""
+        entry = self.store.get(ref)
+        if entry is None:
+            return json.dumps({"error": f"No stored output for ref '{ref}'"})
+        return entry[1]
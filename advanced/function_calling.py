@@ -5,9 +5,13 @@ Demonstrates current best practices for function calling with structured outputs
 """
 
 from openai import OpenAI
-from pydantic import BaseModel
-from typing import List, Literal
-import json
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal
+
+from advanced.agent_runtime import AgentHooks, AgentRuntime
+from advanced.parallel_tools import ParallelToolExecutor, ToolLimits
+from advanced.tool_cache import cached_tool, print_cache_report
+from advanced.tool_registry import ToolRegistry
 
 client = OpenAI()
 
@@ -27,22 +31,40 @@ class SearchResult(BaseModel):
     total_found: int
 
 
+# Tool registry: schemas are derived from the signatures below (strict mode)
+registry = ToolRegistry(strict=True)
+
+
 # Function implementations
-def get_current_weather(location: str, unit: str = "celsius") -> str:
-    """Mock weather function"""
-    weather = WeatherInfo(
+@registry.tool
+@cached_tool(ttl=600, normalize=["location"])
+def get_current_weather(location: str, unit: Literal["celsius", "fahrenheit"] = "celsius") -> WeatherInfo:
+    """Get the current weather in a location
+
+    Args:
+        location: The city and state, e.g. San Francisco, CA
+        unit: Temperature unit
+    """
+    # Return the typed model; it is serialized once, when the tool message is built
+    return WeatherInfo(
         location=location,
         temperature=22.5 if unit == "celsius" else 72.5,
         unit=unit,
         condition="sunny",
         humidity=65
     )
-    return weather.model_dump_json()
 
 
-def search_web(query: str, max_results: int = 5) -> str:
-    """Mock search function"""
-    result = SearchResult(
+@registry.tool
+@cached_tool(ttl=300, normalize=["query"])
+def search_web(query: str, max_results: Annotated[int, Field(ge=1, le=10)] = 5) -> SearchResult:
+    """Search the web for information
+
+    Args:
+        query: Search query
+        max_results: Maximum number of results
+    """
+    return SearchResult(
         query=query,
         results=[
             {"title": f"Result {i}", "url": f"https://example.com/{i}"}
@@ -50,66 +72,42 @@ def search_web(query: str, max_results: int = 5) -> str:
         ],
         total_found=max_results
     )
-    return result.model_dump_json()
-
-
-# Tool definitions with strict schema
-tools = [
-    {
-        "type": "function",
-        "function": {
-            "name": "get_current_weather",
-            "description": "Get the current weather in a location",
-            "strict": True,  # Enable strict schema validation (2025 feature)
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "location": {
-                        "type": "string",
-                        "description": "The city and state, e.g. San Francisco, CA"
-                    },
-                    "unit": {
-                        "type": "string",
-                        "enum": ["celsius", "fahrenheit"],
-                        "description": "Temperature unit"
-                    }
-                },
-                "required": ["location"],
-                "additionalProperties": False
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "search_web",
-            "description": "Search the web for information",
-            "strict": True,
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query"
-                    },
-                    "max_results": {
-                        "type": "integer",
-                        "description": "Maximum number of results",
-                        "minimum": 1,
-                        "maximum": 10
-                    }
-                },
-                "required": ["query"],
-                "additionalProperties": False
-            }
-        }
+
+
+# Tool definitions, generated once from the registry
+tools = registry.tools
+
+available_functions = registry.functions
+
+# Runs the calls from one response concurrently, in call order
+tool_executor = ParallelToolExecutor(
+    available_functions,
+    parse_arguments=registry.parse_arguments,
+    limits={
+        "get_current_weather": ToolLimits(timeout=10.0),
+        "search_web": ToolLimits(timeout=15.0, max_concurrency=4)
     }
-]
+)
+
+
+class ToolPrinter(AgentHooks):
+    def on_llm_end(self, messages, message):
+        if message.tool_calls:
+            print(f"🔧 Executing {len(message.tool_calls)} tool(s)...")
+    
+    def on_tool_start(self, name, arguments):
+        print(f"  ➜ {name}({arguments})")
+    
+    def on_tool_end(self, result):
+        if not result.ok:
+            print(f"  ⚠️  {result.name} failed: {result.error}")
+
 
-available_functions = {
-    "get_current_weather": get_current_weather,
-    "search_web": search_web
-}
+# Parallel function calling (2025 default): every call from one response runs
+# concurrently, then one more call, without tools, answers
+runtime = AgentRuntime(
+    client, tools, executor=tool_executor, max_tool_rounds=1, parallel_tool_calls=True, hooks=ToolPrinter()
+)
 
 
 def run_with_function_calling(query: str):
@@ -121,53 +119,12 @@ def run_with_function_calling(query: str):
     
     print(f"Query: {query}\n")
     
-    # Call with parallel function calling (2025 default)
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages,
-        tools=tools,
-        parallel_tool_calls=True  # Enable parallel execution
-    )
-    
-    response_message = response.choices[0].message
-    
-    # Handle multiple tool calls in parallel
-    if response_message.tool_calls:
-        print(f"🔧 Executing {len(response_message.tool_calls)} tool(s)...")
-        messages.append(response_message)
-        
-        for tool_call in response_message.tool_calls:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            print(f"  ➜ {function_name}({function_args})")
-            
-            # Execute function
-            function_response = available_functions[function_name](**function_args)
-            
-            # Validate response is valid JSON
-            try:
-                json.loads(function_response)
-            except json.JSONDecodeError:
-                print(f"  ⚠️  Invalid JSON response from {function_name}")
-            
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "name": function_name,
-                "content": function_response
-            })
-        
-        # Get final response
-        final_response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages
-        )
-        
-        print(f"\n✅ Final Response: {final_response.choices[0].message.content}\n")
-        return final_response.choices[0].message.content
-    
-    return response_message.content
+    # Tools return validated Pydantic models, so there is no JSON to re-check:
+    # each result is serialized exactly once, into its tool message
+    result = runtime.run(messages)
+    if result.tool_calls:
+        print(f"\n✅ Final Response: {result.content}\n")
+    return result.content
 
 
 if __name__ == "__main__":
@@ -177,6 +134,10 @@ if __name__ == "__main__":
             "What's the weather in Tokyo and search for 'AI agents 2025'"
         )
         
+        # Repeat lookups within the TTL are served from the tool cache
+        run_with_function_calling("Is it still sunny in tokyo?")
+        print_cache_report()
+        
     except Exception as e:
         print(f"Error: {e}")
         print("Note: Requires OPENAI_API_KEY.")
@@ -9,30 +9,24 @@ from datetime import datetime
 from typing import List, Dict
 import json
 
+from advanced.compact_conversation import Conversation
+
 client = OpenAI()
 
 
 class ShortTermMemory:
     """Conversational memory (recent context)"""
     def __init__(self, max_messages: int = 10):
-        self.messages: List[Dict] = []
+        self.conversation = Conversation(max_messages=max_messages)  # keeps only recent messages
         self.max_messages = max_messages
     
     def add_message(self, role: str, content: str):
         """Add a message to short-term memory"""
-        self.messages.append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Keep only recent messages
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages:]
+        self.conversation.append(role, content)
     
     def get_messages(self) -> List[Dict]:
         """Get conversation history"""
-        return [{"role": m["role"], "content": m["content"]} for m in self.messages]
+        return self.conversation.to_messages()
 
 
 class LongTermMemory:
@@ -128,8 +122,7 @@ Long-term Memory:
 
 Use this information to personalize your responses."""
         
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(self.short_term.get_messages())
+        messages = self.short_term.conversation.to_messages(system_prompt)
         
         # Get response
         response = client.chat.completions.create(
@@ -0,0 +1,302 @@
+"""
+Mock LLM Server (2025)
+
+Demonstrates benchmarking agent loops offline: a stand-in for the OpenAI
+client that returns scripted responses after a simulated network latency
+and records every request (with an estimated prompt token count).
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from advanced.tool_selector import count_tokens
+
+_call_ids = itertools.count(1)
+
+
+@dataclass
+class MockFunction:
+    name: str
+    arguments: str = "{}"
+
+
+@dataclass
+class MockToolCall:
+    function: MockFunction
+    id: str = field(default_factory=lambda: f"call_mock_{next(_call_ids)}")
+    type: str = "function"
+
+
+@dataclass
+class MockMessage:
+    """Mirrors the SDK's ChatCompletionMessage closely enough for agent loops"""
+    content: Optional[str] = None
+    tool_calls: Optional[List[MockToolCall]] = None
+    role: str = "assistant"
+    parsed: Any = None
+
+
+@dataclass
+class MockUsage:
+    prompt_tokens: int
+    completion_tokens: int
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass
+class MockChoice:
+    message: MockMessage
+    index: int = 0
+    finish_reason: str = "stop"
+
+
+@dataclass
+class MockCompletion:
+    choices: List[MockChoice]
+    usage: MockUsage
+    model: str = "mock"
+
+
+def text_message(content: str) -> MockMessage:
+    return MockMessage(content=content)
+
+
+def tool_call_message(*calls: Union[str, tuple]) -> MockMessage:
+    """tool_call_message(("search_faq", {"query": "refund"}), ...) or bare names"""
+    tool_calls = []
+    for call in calls:
+        name, arguments = (call, {}) if isinstance(call, str) else call
+        tool_calls.append(MockToolCall(MockFunction(name, json.dumps(arguments))))
+    return MockMessage(tool_calls=tool_calls)
+
+
+def message_text(message: Any) -> str:
+    """Text of a request message (dicts or SDK/mock message objects) for token counting"""
+    if isinstance(message, dict):
+        parts = [message.get("content") or ""]
+        parts += [json.dumps(tc) for tc in message.get("tool_calls") or []]
+        return " ".join(parts)
+    parts = [getattr(message, "content", None) or ""]
+    for tc in getattr(message, "tool_calls", None) or []:
+        parts.append(f"{tc.function.name} {tc.function.arguments}")
+    return " ".join(parts)
+
+
+def prompt_tokens(request: Dict) -> int:
+    text = " ".join(message_text(m) for m in request.get("messages", []))
+    if request.get("tools"):
+        text += json.dumps(request["tools"])
+    return count_tokens(text)
+
+
+Responder = Callable[[Dict], Union[MockMessage, str]]
+
+
+def _echo_responder(request: Dict) -> MockMessage:
+    return text_message(f"Mock reply to: {message_text(request['messages'][-1])[:80]}")
+
+
+def _chunk(content: Optional[str] = None, tool_calls: Optional[List] = None, finish_reason: Optional[str] = None):
+    delta = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=finish_reason)])
+
+
+def stream_chunks(message: MockMessage, chunk_chars: int = 16) -> List[SimpleNamespace]:
+    """The chunks `create(stream=True)` yields for a message: text pieces, one per tool call, then the finish"""
+    content = message.content or ""
+    chunks = [_chunk(content=content[i:i + chunk_chars]) for i in range(0, len(content), chunk_chars)]
+    for index, call in enumerate(message.tool_calls or []):
+        function = SimpleNamespace(name=call.function.name, arguments=call.function.arguments)
+        chunks.append(_chunk(tool_calls=[SimpleNamespace(index=index, id=call.id, type="function", function=function)]))
+    chunks.append(_chunk(finish_reason="tool_calls" if message.tool_calls else "stop"))
+    return chunks
+
+
+class _Completions:
+    def __init__(self, owner: "MockChatClient"):
+        self._owner = owner
+
+    def create(self, **request) -> MockCompletion:
+        if request.get("stream"):
+            return self._owner._stream(request)
+        return self._owner._complete(request)
+
+    def parse(self, **request) -> MockCompletion:
+        return self._owner._complete(request)
+
+    def stream(self, **request) -> "MockStream":
+        return MockStream(self._owner, request)
+
+
+class MockStream:
+    """Mirrors `client.beta.chat.completions.stream(...)`: a context manager
+    yielding "content.delta" events, then "content.done"."""
+
+    def __init__(self, owner: "MockChatClient", request: Dict, chunk_chars: int = 16):
+        self._owner = owner
+        self._request = request
+        self._chunk_chars = chunk_chars
+        self._completion: Optional[MockCompletion] = None
+
+    def __enter__(self) -> "MockStream":
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        total = self._owner._delay(self._request)
+        first = min(self._owner.time_to_first_token, total)
+        self._completion = self._owner._respond(self._request)
+        message = self._completion.choices[0].message
+        content = message.content
+        if content is None and message.parsed is not None:
+            content = message.parsed.model_dump_json()
+        content = content or ""
+        pieces = [content[i:i + self._chunk_chars] for i in range(0, len(content), self._chunk_chars)]
+        time.sleep(first)
+        # The rest of the call's latency is spent generating, spread evenly over the chunks
+        per_piece = (total - first) / max(len(pieces), 1)
+        snapshot = ""
+        for piece in pieces:
+            time.sleep(per_piece)
+            snapshot += piece
+            yield SimpleNamespace(type="content.delta", delta=piece, snapshot=snapshot)
+        yield SimpleNamespace(type="content.done", content=content, parsed=message.parsed)
+
+    def get_final_completion(self) -> MockCompletion:
+        if self._completion is None:
+            for _ in self:
+                pass
+        return self._completion
+
+
+Latency = Union[float, Callable[[Dict], float]]
+
+
+class MockChatClient:
+    """Synchronous stand-in for `OpenAI()` chat completions.
+
+    latency: seconds per call, or a function of the request (e.g. to make
+    long generations slower than short ones).
+    time_to_first_token: for streamed calls, the part of the latency spent
+    before the first chunk; the rest is spread over the chunks.
+    """
+
+    def __init__(
+        self,
+        responder: Responder = _echo_responder,
+        latency: Latency = 0.5,
+        time_to_first_token: float = 0.0
+    ):
+        self.responder = responder
+        self.latency = latency
+        self.time_to_first_token = time_to_first_token
+        self.requests: List[Dict] = []
+        self.usage: List[MockUsage] = []
+        self._lock = threading.Lock()
+        completions = _Completions(self)
+        self.chat = SimpleNamespace(completions=completions)
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    @property
+    def call_count(self) -> int:
+        return len(self.requests)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(u.prompt_tokens for u in self.usage)
+
+    def _delay(self, request: Dict) -> float:
+        return self.latency(request) if callable(self.latency) else self.latency
+
+    def _respond(self, request: Dict) -> MockCompletion:
+        # Snapshot the messages: callers may edit them in place after the call
+        snapshot = [dict(m) if isinstance(m, dict) else m for m in request.get("messages", [])]
+        request_tokens = prompt_tokens(request)
+        with self._lock:
+            self.requests.append(dict(request, messages=snapshot))
+        message = self.responder(request)
+        if isinstance(message, str):
+            message = text_message(message)
+        finish_reason = "tool_calls" if message.tool_calls else "stop"
+        usage = MockUsage(request_tokens, count_tokens(message_text(message)))
+        with self._lock:
+            self.usage.append(usage)
+        return MockCompletion([MockChoice(message, finish_reason=finish_reason)], usage)
+
+    def _complete(self, request: Dict) -> MockCompletion:
+        time.sleep(self._delay(request))
+        return self._respond(request)
+
+    def _stream_timing(self, request: Dict):
+        """(chunks, seconds before the first, seconds between the rest) for a streamed call"""
+        total = self._delay(request)
+        first = min(self.time_to_first_token, total)
+        chunks = stream_chunks(self._respond(request).choices[0].message)
+        return chunks, first, (total - first) / len(chunks)
+
+    def _stream(self, request: Dict):
+        chunks, first, per_chunk = self._stream_timing(request)
+        time.sleep(first)
+        for chunk in chunks:
+            time.sleep(per_chunk)
+            yield chunk
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, **request) -> MockCompletion:
+        if request.get("stream"):
+            return self._owner._stream(request)
+        return await self._owner._complete(request)
+
+    async def parse(self, **request) -> MockCompletion:
+        return await self._owner._complete(request)
+
+
+class AsyncMockChatClient(MockChatClient):
+    """Async stand-in for `AsyncOpenAI()` chat completions"""
+
+    def __init__(self, responder: Responder = _echo_responder, latency: Latency = 0.5, time_to_first_token: float = 0.0):
+        super().__init__(responder, latency, time_to_first_token)
+        completions = _AsyncCompletions(self)
+        self.chat = SimpleNamespace(completions=completions)
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def _complete(self, request: Dict) -> MockCompletion:
+        await asyncio.sleep(self._delay(request))
+        return self._respond(request)
+
+    async def _stream(self, request: Dict):
+        chunks, first, per_chunk = self._stream_timing(request)
+        await asyncio.sleep(first)
+        for chunk in chunks:
+            await asyncio.sleep(per_chunk)
+            yield chunk
+
+
+if __name__ == "__main__":
+    def responder(request: Dict) -> MockMessage:
+        if request.get("tools") and request["messages"][-1]["role"] == "user":
+            return tool_call_message(("get_current_weather", {"location": "Tokyo"}))
+        return "It's sunny in Tokyo."
+
+    client = MockChatClient(responder, latency=0.1)
+    start = time.perf_counter()
+    first = client.chat.completions.create(
+        model="gpt-4",
+        messages=[{"role": "user", "content": "Weather in Tokyo?"}],
+        tools=[{"type": "function", "function": {"name": "get_current_weather"}}]
+    )
+    print(f"Tool call: {first.choices[0].message.tool_calls[0].function}")
+    print(f"Calls: {client.call_count}, prompt tokens: {client.prompt_tokens}, "
+          f"elapsed: {time.perf_counter() - start:.2f}s")
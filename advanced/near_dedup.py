@@ -0,0 +1,188 @@
+"""
+Near-Duplicate Filtering with MinHash/LSH (2025)
+
+Demonstrates collapsing near-identical retrieved passages (syndicated news,
+mirrored docs, boilerplate-heavy pages) before they reach the prompt:
+- MinHash signatures over word shingles, vectorized with NumPy
+- LSH banding, so each new item is compared only with its bucket-mates
+  (constant work per item, O(n) per batch)
+- Streaming: the filter remembers what it has seen across batches
+- Duplicates are folded into the first occurrence, keeping their sources
+  for attribution
+
+Works on any text items: search results, FAQ entries, RAG chunks.
+"""
+
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from advanced.tool_selector import count_tokens
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PRIME = (1 << 31) - 1  # keeps a*x + b inside uint64
+
+
+@dataclass
+class Cluster:
+    """A kept item and everything that duplicated it"""
+    item: Any
+    text: str
+    sources: List[Hashable] = field(default_factory=list)  # first source is the kept item's
+    duplicates: int = 0
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Word n-grams of the lowercased text (the whole text if shorter than n;
+    none if it has no words)"""
+    words = _WORD.findall(text.lower())
+    if not words:
+        return []
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class NearDuplicateFilter:
+    """Streaming MinHash/LSH near-duplicate filter.
+
+    Two texts are duplicates when their estimated Jaccard similarity over
+    word shingles is at least `threshold`. `bands` x rows = `num_perm`; more
+    bands catch lower similarities as candidates, fewer bands are stricter.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[Optional[np.ndarray]] = []
+        self.clusters: List[Cluster] = []
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature, or None for text with no words"""
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode()) for s in shingles(text, self.shingle_size)), dtype=np.uint64
+        )
+        if not hashes.size:
+            return None
+        # (num_perm, num_shingles) universal hashes, min over shingles
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, text: str, source: Hashable = None, item: Any = None) -> Tuple[bool, Cluster]:
+        """Add one item; returns (is_new, the cluster it now belongs to).
+
+        Text with no words (e.g. a result without a snippet) has nothing to
+        compare, so it is always new and never matched by later items.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            cluster = Cluster(item if item is not None else text, text, [source] if source is not None else [])
+            self.clusters.append(cluster)
+            self._signatures.append(None)
+            return True, cluster
+        keys = list(self._band_keys(signature))
+        candidates = {index for band, key in keys for index in self._buckets[band].get(key, ())}
+        best, best_similarity = None, self.threshold
+        for index in candidates:
+            similarity = float(np.mean(self._signatures[index] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = index, similarity
+        if best is not None:
+            cluster = self.clusters[best]
+            cluster.duplicates += 1
+            if source is not None and source not in cluster.sources:
+                cluster.sources.append(source)
+            return False, cluster
+
+        cluster = Cluster(item if item is not None else text, text, [source] if source is not None else [])
+        index = len(self.clusters)
+        self.clusters.append(cluster)
+        self._signatures.append(signature)
+        for band, key in keys:
+            self._buckets[band].setdefault(key, []).append(index)
+        return True, cluster
+
+    def filter(
+        self,
+        items: Iterable[Any],
+        text: Callable[[Any], str] = str,
+        source: Optional[Callable[[Any], Hashable]] = None
+    ) -> List[Cluster]:
+        """Add a batch; returns the clusters of items not seen before (in input order)"""
+        kept = []
+        for item in items:
+            is_new, cluster = self.add(text(item), source(item) if source else None, item)
+            if is_new:
+                kept.append(cluster)
+        return kept
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+
+def dedup(
+    items: Iterable[Any],
+    text: Callable[[Any], str] = str,
+    source: Optional[Callable[[Any], Hashable]] = None,
+    threshold: float = 0.7
+) -> List[Cluster]:
+    """One-shot near-duplicate removal for a single batch"""
+    return NearDuplicateFilter(threshold=threshold).filter(items, text, source)
+
+
+def run_benchmark(num_articles: int = 2000, syndication_rate: float = 0.4, seed: int = 0):
+    """Syndicated-results workload: tokens saved and throughput"""
+    import random
+
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(4000)]
+    results = []
+    for i in range(num_articles):
+        body = " ".join(rng.choices(vocabulary, k=60))
+        results.append({"url": f"https://site{i}.example/article", "snippet": body})
+        if rng.random() < syndication_rate:
+            # Syndicated copy: same story, different outlet boilerplate
+            for copy in range(rng.randint(1, 3)):
+                snippet = f"Reprinted by outlet {copy}: {body} Read more at outlet {copy}."
+                results.append({"url": f"https://mirror{copy}.example/{i}", "snippet": snippet})
+    rng.shuffle(results)
+
+    start = time.perf_counter()
+    kept = dedup(results, text=lambda r: r["snippet"], source=lambda r: r["url"])
+    elapsed = time.perf_counter() - start
+
+    before = count_tokens(" ".join(r["snippet"] for r in results))
+    after = count_tokens(" ".join(c.item["snippet"] for c in kept))
+    print("=== Near-Duplicate Filter Benchmark ===\n")
+    print(f"Results in:          {len(results):,} ({len(results) - num_articles:,} syndicated copies)")
+    print(f"Results kept:        {len(kept):,} (sources preserved: {sum(len(c.sources) for c in kept):,})")
+    print(f"Snippet tokens:      {before:,} -> {after:,} ({1 - after / before:.0%} saved)")
+    print(f"Throughput:          {len(results) / elapsed:,.0f} results/s")
+
+
+if __name__ == "__main__":
+    run_benchmark()
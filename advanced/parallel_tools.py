@@ -0,0 +1,213 @@
+"""
+Parallel Tool Execution (2025)
+
+Demonstrates executing the tool calls returned with parallel_tool_calls=True
+concurrently: sync tools run in a thread pool, async tools run on the event
+loop, and results come back in the original call order.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from advanced.tool_results import tool_message
+
+
+@dataclass
+class ToolLimits:
+    """Per-tool execution limits"""
+    timeout: Optional[float] = None  # seconds, None = executor default
+    max_concurrency: Optional[int] = None  # None = only the pool size caps it
+
+
+@dataclass
+class ToolCallResult:
+    """Outcome of a single tool call"""
+    tool_call_id: str
+    name: str
+    content: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_message(self) -> Dict:
+        """Convert to a `role: tool` chat message (the result is serialized here, once)"""
+        result = {"error": self.error} if self.error is not None else self.content
+        return tool_message(self.tool_call_id, self.name, result)
+
+
+def tool_call_parts(tool_call: Any) -> Tuple[str, str, str]:
+    """Return (id, name, arguments) from an SDK tool call object or a dict"""
+    if isinstance(tool_call, Mapping):
+        function = tool_call["function"]
+        return tool_call.get("id", ""), function["name"], function.get("arguments") or ""
+    return tool_call.id, tool_call.function.name, tool_call.function.arguments or ""
+
+
+def parse_json_arguments(name: str, arguments: str) -> Dict:
+    """Default argument parser: the raw JSON string the model produced"""
+    return json.loads(arguments) if arguments else {}
+
+
+class ParallelToolExecutor:
+    """Run a batch of tool calls concurrently and return results in call order"""
+
+    def __init__(
+        self,
+        functions: Mapping[str, Callable],
+        limits: Optional[Dict[str, ToolLimits]] = None,
+        default_timeout: Optional[float] = 30.0,
+        max_workers: int = 8,
+        parse_arguments: Callable[[str, str], Dict] = parse_json_arguments
+    ):
+        self.functions = functions
+        self.limits = limits or {}
+        self.default_timeout = default_timeout
+        self.parse_arguments = parse_arguments
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        # asyncio semaphores belong to one event loop, so keep one set per loop
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, name: str) -> Optional[asyncio.Semaphore]:
+        limit = self.limits.get(name)
+        if limit is None or not limit.max_concurrency:
+            return None
+        per_loop = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if name not in per_loop:
+            per_loop[name] = asyncio.Semaphore(limit.max_concurrency)
+        return per_loop[name]
+
+    def _timeout(self, name: str) -> Optional[float]:
+        limit = self.limits.get(name)
+        if limit is not None and limit.timeout is not None:
+            return limit.timeout
+        return self.default_timeout
+
+    async def _invoke(self, function: Callable, kwargs: Dict) -> Any:
+        if inspect.iscoroutinefunction(function):
+            return await function(**kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(function, **kwargs))
+
+    async def _run_one(self, tool_call: Any, overrides: Optional[Mapping[str, Callable]] = None) -> ToolCallResult:
+        call_id, name, arguments = tool_call_parts(tool_call)
+        result = ToolCallResult(tool_call_id=call_id, name=name)
+        start = time.perf_counter()
+
+        function = (overrides or {}).get(name) or self.functions.get(name)
+        if function is None:
+            result.error = f"Unknown tool: {name}"
+            return result
+
+        try:
+            kwargs = self.parse_arguments(name, arguments)
+        except Exception as e:
+            result.error = f"Invalid arguments for {name}: {e}"
+            return result
+
+        semaphore = self._semaphore(name)
+        timeout = self._timeout(name)
+        try:
+            if semaphore is not None:
+                async with semaphore:
+                    result.content = await asyncio.wait_for(self._invoke(function, kwargs), timeout)
+            else:
+                result.content = await asyncio.wait_for(self._invoke(function, kwargs), timeout)
+        except asyncio.TimeoutError:
+            # A sync tool keeps running in its worker thread; only the wait is abandoned
+            result.error = f"{name} timed out after {timeout}s"
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        finally:
+            result.elapsed = time.perf_counter() - start
+        return result
+
+    async def execute_async(
+        self,
+        tool_calls: Sequence[Any],
+        overrides: Optional[Mapping[str, Callable]] = None
+    ) -> List[ToolCallResult]:
+        """Execute all tool calls concurrently; results keep the input order.
+
+        overrides: per-batch implementations, looked up before `functions`
+        """
+        return list(await asyncio.gather(*(self._run_one(tc, overrides) for tc in tool_calls)))
+
+    def execute(self, tool_calls: Sequence[Any]) -> List[ToolCallResult]:
+        """Blocking wrapper around execute_async (not for use inside a running loop)"""
+        if not tool_calls:
+            return []
+        return asyncio.run(self.execute_async(tool_calls))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_benchmark(latencies: Sequence[float] = (0.3, 0.5, 0.2, 0.4, 0.1)):
+    """Compare sequential vs parallel execution with slow mock tools"""
+
+    def slow_lookup(key: str, delay: float) -> str:
+        time.sleep(delay)
+        return json.dumps({"key": key, "delay": delay})
+
+    async def slow_fetch(key: str, delay: float) -> str:
+        await asyncio.sleep(delay)
+        return json.dumps({"key": key, "delay": delay})
+
+    functions = {"slow_lookup": slow_lookup, "slow_fetch": slow_fetch}
+    tool_calls = [
+        {
+            "id": f"call_{i}",
+            "type": "function",
+            "function": {
+                "name": "slow_lookup" if i % 2 == 0 else "slow_fetch",
+                "arguments": json.dumps({"key": f"k{i}", "delay": delay})
+            }
+        }
+        for i, delay in enumerate(latencies)
+    ]
+
+    # Sequential baseline: the for loop from function_calling.py
+    start = time.perf_counter()
+    for tool_call in tool_calls:
+        _, name, arguments = tool_call_parts(tool_call)
+        function = functions[name]
+        if inspect.iscoroutinefunction(function):
+            asyncio.run(function(**json.loads(arguments)))
+        else:
+            function(**json.loads(arguments))
+    sequential = time.perf_counter() - start
+
+    with ParallelToolExecutor(functions) as executor:
+        start = time.perf_counter()
+        results = executor.execute(tool_calls)
+        parallel = time.perf_counter() - start
+
+    assert [r.tool_call_id for r in results] == [tc["id"] for tc in tool_calls]
+
+    print("=== Parallel Tool Execution Benchmark ===\n")
+    print(f"Tool latencies:       {list(latencies)}")
+    print(f"Sum of latencies:     {sum(latencies):.3f}s")
+    print(f"Max latency:          {max(latencies):.3f}s")
+    print(f"Sequential wall time: {sequential:.3f}s")
+    print(f"Parallel wall time:   {parallel:.3f}s")
+    print(f"Speedup:              {sequential / parallel:.1f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -7,9 +7,13 @@ Demonstrates real-time streaming of agent responses and tool calls.
 from openai import OpenAI
 import json
 
+from advanced.tool_cache import cached_tool, print_cache_report
+
 client = OpenAI()
 
 
+# Quotes change slowly relative to a conversation; symbols are case-insensitive
+@cached_tool(ttl=60, normalize={"symbol": lambda symbol: symbol.strip().upper()})
 def get_stock_price(symbol: str) -> str:
     """Mock stock price lookup"""
     prices = {"AAPL": 185.50, "GOOGL": 140.25, "MSFT": 380.75}
@@ -144,6 +148,8 @@ if __name__ == "__main__":
             stream_agent_response(query)
             print()
         
+        print_cache_report()
+        
     except Exception as e:
         print(f"Error: {e}")
         print("Note: Requires OPENAI_API_KEY.")
@@ -0,0 +1,112 @@
+"""
+Streaming Structured Outputs (2025)
+
+Demonstrates using a structured response before it has finished generating:
+an incremental JSON scanner pulls the elements of one array (e.g. the
+`issues` of a review) out of the streamed text as soon as each element
+closes, validates them against a Pydantic model, and hands them on while
+the model is still writing the rest.
+"""
+
+import json
+from typing import Any, Iterable, Iterator, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+class JSONArrayStream:
+    """Incremental scanner for the array under `key` in a top-level JSON object.
+
+    feed() takes text chunks of any size and returns the array elements
+    (objects or arrays) completed so far. Only those elements are buffered,
+    so memory stays bounded by the largest element.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._stack: List[str] = []  # open '{' / '['
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []  # current string at depth 1, a candidate key
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._in_array = False
+        self._element: List[str] = []
+
+    def feed(self, text: str) -> List[Any]:
+        elements = []
+        for char in text:
+            depth = len(self._stack)
+            collecting = self._in_array and depth >= 3
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if depth == 1:
+                        self._last_string = json.loads('"' + "".join(self._string) + '"')
+                if depth == 1 and self._in_string:
+                    self._string.append(char)
+            elif char == '"':
+                self._in_string = True
+                self._string = []
+            elif char in "{[":
+                self._stack.append(char)
+                if char == "[" and depth == 1 and self._current_key == self.key:
+                    self._in_array = True
+                collecting = collecting or (self._in_array and depth == 2)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._in_array and depth == 3:
+                    self._element.append(char)
+                    elements.append(json.loads("".join(self._element)))
+                    self._element = []
+                    continue
+                if self._in_array and depth == 2:
+                    self._in_array = False
+            elif char == ":" and depth == 1:
+                self._current_key = self._last_string
+
+            if collecting:
+                self._element.append(char)
+        return elements
+
+
+def stream_models(chunks: Iterable[str], key: str, model: Type[Model]) -> Iterator[Model]:
+    """Validated models for each element of the array under `key`, as the text streams in.
+
+    Elements that fail validation are skipped; validate the full response
+    at the end to see why.
+    """
+    scanner = JSONArrayStream(key)
+    for chunk in chunks:
+        for element in scanner.feed(chunk):
+            try:
+                yield model.model_validate(element)
+            except ValidationError:
+                continue
+
+
+if __name__ == "__main__":
+    class Step(BaseModel):
+        title: str
+        minutes: int
+
+    class Plan(BaseModel):
+        steps: List[Step]
+        summary: str
+
+    text = Plan(
+        steps=[Step(title=f"Step {i}", minutes=5 * i) for i in range(1, 4)],
+        summary="Three steps"
+    ).model_dump_json()
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    print(f"Streaming {len(text)} characters in {len(chunks)} chunks\n")
+    for step in stream_models(chunks, "steps", Step):
+        print(f"  got {step}")
@@ -0,0 +1,296 @@
+"""
+Per-Tool Result Caching (2025)
+
+Demonstrates a declarative cache for tool results: TTL, bounded LRU size,
+argument normalization (case, whitespace, defaults filled in), optional
+SQLite persistence, coalescing of concurrent identical calls, and per-tool
+hit-rate reporting.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from advanced.tool_results import serialize_tool_result
+
+_MISSING = object()
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(value: Any) -> Any:
+    """Default normalizer: case-fold and collapse whitespace in strings"""
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip().casefold()
+    return value
+
+
+@dataclass
+class CacheStats:
+    """Per-tool cache counters"""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0  # calls that waited on an identical in-flight call
+
+    @property
+    def calls(self) -> int:
+        return self.hits + self.misses + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.hits + self.coalesced) / self.calls if self.calls else 0.0
+
+
+class ToolCache:
+    """TTL + LRU result cache for a single tool"""
+
+    def __init__(
+        self,
+        function: Callable,
+        ttl: float = 300.0,
+        maxsize: int = 1024,
+        normalize: Union[bool, Iterable[str], Dict[str, Callable]] = True,
+        persist_path: Optional[str] = None,
+        name: Optional[str] = None
+    ):
+        self.function = function
+        self.name = name or function.__name__
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._signature = inspect.signature(function)
+        self._normalizers = self._build_normalizers(normalize)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: Dict[tuple, Any] = {}  # (event loop or None, key) -> future
+        self._lock = threading.Lock()
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                "tool TEXT, key TEXT, expires_at REAL, value TEXT, PRIMARY KEY (tool, key))"
+            )
+            self._db.commit()
+
+    def _build_normalizers(self, normalize) -> Dict[str, Callable]:
+        if normalize is True:
+            return {name: normalize_text for name in self._signature.parameters}
+        if not normalize:
+            return {}
+        if isinstance(normalize, dict):
+            return dict(normalize)
+        return {name: normalize_text for name in normalize}
+
+    def bind(self, args: tuple, kwargs: Dict) -> inspect.BoundArguments:
+        """Bind a call with defaults filled in and arguments normalized"""
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        for name, normalizer in self._normalizers.items():
+            if name in bound.arguments:
+                bound.arguments[name] = normalizer(bound.arguments[name])
+        return bound
+
+    def make_key(self, args: tuple, kwargs: Dict) -> str:
+        """Canonical cache key: defaults filled in, arguments normalized"""
+        return self._key(self.bind(args, kwargs))
+
+    @staticmethod
+    def _key(bound: inspect.BoundArguments) -> str:
+        return json.dumps(bound.arguments, sort_keys=True, default=str)
+
+    # Storage (call with self._lock held)
+
+    def _lookup(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT expires_at, value FROM tool_cache WHERE tool = ? AND key = ?",
+                (self.name, key)
+            ).fetchone()
+            if row is not None and row[0] > now:
+                value = json.loads(row[1])
+                self._remember(key, row[0], value)
+                return value
+        return _MISSING
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _store(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self._db is not None:
+            # Quote strings so JSON-string tool results round-trip unchanged
+            payload = json.dumps(value) if isinstance(value, str) else serialize_tool_result(value)
+            self._db.execute(
+                "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?)",
+                (self.name, key, expires_at, payload)
+            )
+            self._db.commit()
+
+    def _begin(self, key: str, make_future: Callable, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Return (cached value, in-flight future to wait on, or our own future).
+
+        Async calls only coalesce within their own event loop (an asyncio
+        future cannot be awaited from another), sync calls across threads.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.stats.hits += 1
+                return value, None, False
+            future = self._inflight.get((loop, key))
+            if future is not None:
+                self.stats.coalesced += 1
+                return _MISSING, future, False
+            self.stats.misses += 1
+            future = self._inflight[(loop, key)] = make_future()
+            return _MISSING, future, True
+
+    def _finish(self, key: str, value: Any = _MISSING, loop: Optional[asyncio.AbstractEventLoop] = None):
+        with self._lock:
+            if value is not _MISSING:
+                self._store(key, value)
+            self._inflight.pop((loop, key), None)
+
+    # Calling
+
+    def call(self, *args, **kwargs) -> Any:
+        # The tool sees the normalized arguments, so a cached result never
+        # echoes a different caller's spelling of them
+        bound = self.bind(args, kwargs)
+        key = self._key(bound)
+        value, future, leader = self._begin(key, Future)
+        if value is not _MISSING:
+            return value
+        if not leader:
+            return future.result()
+        try:
+            value = self.function(*bound.args, **bound.kwargs)
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key, value)
+        future.set_result(value)
+        return value
+
+    async def call_async(self, *args, **kwargs) -> Any:
+        bound = self.bind(args, kwargs)
+        key = self._key(bound)
+        loop = asyncio.get_running_loop()
+        value, future, leader = self._begin(key, loop.create_future, loop)
+        if value is not _MISSING:
+            return value
+        if not leader:
+            return await asyncio.shield(future)
+        try:
+            value = await self.function(*bound.args, **bound.kwargs)
+        except BaseException as e:
+            self._finish(key, loop=loop)
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        self._finish(key, value, loop)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_cache WHERE tool = ?", (self.name,))
+                self._db.commit()
+
+
+# All caches created through @cached_tool, for reporting
+_caches: Dict[str, ToolCache] = {}
+
+
+def cached_tool(
+    ttl: float = 300.0,
+    maxsize: int = 1024,
+    normalize: Union[bool, Iterable[str], Dict[str, Callable]] = True,
+    persist_path: Optional[str] = None
+):
+    """Cache a tool's results; works for sync and async tools.
+
+    normalize: True for every argument, a list of argument names, or a
+    {name: callable} mapping of custom normalizers. The tool is called with
+    the normalized arguments, so every caller sharing a key gets the same result.
+    persist_path: optional SQLite file. Results are stored as JSON, so a
+    typed result read back from disk comes back as plain JSON data.
+    """
+    def decorator(function: Callable) -> Callable:
+        cache = ToolCache(function, ttl=ttl, maxsize=maxsize, normalize=normalize, persist_path=persist_path)
+        _caches[cache.name] = cache
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                return await cache.call_async(*args, **kwargs)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                return cache.call(*args, **kwargs)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, CacheStats]:
+    """Hit/miss counters for every cached tool"""
+    return {name: cache.stats for name, cache in _caches.items()}
+
+
+def print_cache_report():
+    """Print per-tool hit rates"""
+    print(f"{'Tool':<24} {'Calls':>7} {'Hits':>7} {'Coalesced':>10} {'Misses':>7} {'Hit rate':>9}")
+    for name, stats in cache_stats().items():
+        print(
+            f"{name:<24} {stats.calls:>7} {stats.hits:>7} {stats.coalesced:>10} "
+            f"{stats.misses:>7} {stats.hit_rate:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    @cached_tool(ttl=60, normalize=["location"])
+    def get_current_weather(location: str, unit: str = "celsius") -> str:
+        """Mock weather lookup with API latency"""
+        time.sleep(0.2)
+        return json.dumps({"location": location, "temperature": 22.5, "unit": unit})
+
+    print("=== Tool Cache Demo ===\n")
+    queries = ["Tokyo", "tokyo ", "  TOKYO", "Paris", "paris"]
+    start = time.perf_counter()
+    for location in queries:
+        get_current_weather(location)
+    get_current_weather("Tokyo", unit="celsius")  # same key once defaults are filled in
+    print(f"Sequential lookups: {time.perf_counter() - start:.2f}s")
+
+    # Ten identical concurrent calls hit the backend once
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        list(pool.map(lambda _: get_current_weather("London"), range(10)))
+    print(f"10 concurrent identical calls: {time.perf_counter() - start:.2f}s\n")
+
+    print_cache_report()
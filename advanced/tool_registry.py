@@ -0,0 +1,274 @@
+"""
+Schema-from-Signature Tool Registry (2025)
+
+Demonstrates registering tools with a decorator instead of hand-writing JSON
+schemas next to an `available_functions` dict. The schema is derived once from
+type hints (or a Pydantic model parameter), and a compiled TypeAdapter parses,
+validates and coerces the model's raw argument JSON in a single pass.
+"""
+
+import inspect
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, get_type_hints
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, create_model
+
+
+def _parse_docstring(doc: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """Split a Google-style docstring into (description, {param: description})"""
+    if not doc:
+        return "", {}
+    doc = inspect.cleandoc(doc)
+    parts = re.split(r"^(?:Args|Arguments|Parameters):\s*$", doc, maxsplit=1, flags=re.MULTILINE)
+    description = parts[0].strip()
+    param_docs: Dict[str, str] = {}
+    if len(parts) == 2:
+        current = None
+        indent = None
+        for line in parts[1].splitlines():
+            if not line.strip():
+                continue
+            if not line[0].isspace():
+                break  # next section (Returns:, Raises:, ...)
+            line_indent = len(line) - len(line.lstrip())
+            match = re.match(r"^\s+(\w+)(?:\s*\(.*?\))?:\s*(.*)$", line)
+            if match and (indent is None or line_indent <= indent):
+                indent = line_indent
+                current = match.group(1)
+                param_docs[current] = match.group(2).strip()
+            elif current:
+                param_docs[current] = f"{param_docs[current]} {line.strip()}"
+    return description, param_docs
+
+
+def _clean_schema(node: Any, keys_are_names: bool = False) -> Any:
+    """Drop pydantic's title/default noise; the model doesn't need it"""
+    if isinstance(node, dict):
+        if keys_are_names:
+            return {k: _clean_schema(v) for k, v in node.items()}
+        return {
+            k: _clean_schema(v, keys_are_names=k in ("properties", "$defs"))
+            for k, v in node.items()
+            if not (k == "title" and isinstance(v, str)) and k != "default"
+        }
+    if isinstance(node, list):
+        return [_clean_schema(v) for v in node]
+    return node
+
+
+@dataclass
+class RegisteredTool:
+    """A tool plus everything derived from its signature, computed once"""
+    name: str
+    function: Callable
+    description: str
+    arguments_model: Type[BaseModel]
+    model_param: Optional[str] = None  # set when the tool takes one Pydantic model
+    strict: bool = False
+    validator: TypeAdapter = field(init=False, repr=False)
+    schema: Dict = field(init=False, repr=False)
+    schema_bytes: bytes = field(init=False, repr=False)
+    _none_means_default: frozenset = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.validator = TypeAdapter(self.arguments_model)
+
+        parameters = _clean_schema(self.arguments_model.model_json_schema())
+        parameters["additionalProperties"] = False
+        if self.strict:
+            # Strict mode: every property is required, optional ones are nullable
+            parameters["required"] = list(parameters.get("properties", {}))
+
+        function_def = {"name": self.name, "description": self.description}
+        if self.strict:
+            function_def["strict"] = True
+        function_def["parameters"] = parameters
+        self.schema = {"type": "function", "function": function_def}
+        self.schema_bytes = json.dumps(self.schema, separators=(",", ":")).encode()
+
+        signature = inspect.signature(self.function)
+        self._none_means_default = frozenset(
+            name for name, param in signature.parameters.items()
+            if self.strict and param.default is not inspect.Parameter.empty
+        )
+
+    def parse_arguments(self, arguments: Any) -> Dict:
+        """Parse, validate and coerce raw JSON arguments into call kwargs"""
+        if isinstance(arguments, (str, bytes)):
+            instance = self.validator.validate_json(arguments or "{}")
+        else:
+            instance = self.validator.validate_python(arguments or {})
+        if self.model_param is not None:
+            return {self.model_param: instance}
+        return {
+            name: getattr(instance, name)
+            for name in self.arguments_model.model_fields
+            if not (name in self._none_means_default and getattr(instance, name) is None)
+        }
+
+    def __call__(self, arguments: Any) -> Any:
+        return self.function(**self.parse_arguments(arguments))
+
+
+def _arguments_model(function: Callable, name: str, param_docs: Dict[str, str], strict: bool):
+    """Build (model, model_param) describing a function's parameters"""
+    signature = inspect.signature(function)
+    hints = get_type_hints(function, include_extras=True)
+    params = [
+        p for p in signature.parameters.values()
+        if p.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+    ]
+
+    # A single Pydantic model parameter is used as the schema directly
+    if len(params) == 1:
+        annotation = hints.get(params[0].name)
+        if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+            return annotation, params[0].name
+
+    fields = {}
+    for param in params:
+        annotation = hints.get(param.name, str)
+        if param.default is inspect.Parameter.empty:
+            default = ...
+        else:
+            default = param.default
+            if strict:
+                annotation = Optional[annotation]
+        extra = {"description": param_docs[param.name]} if param.name in param_docs else {}
+        fields[param.name] = (annotation, Field(default, **extra))
+
+    model_name = "".join(part.title() for part in name.split("_")) + "Arguments"
+    model = create_model(model_name, __config__=ConfigDict(extra="forbid"), **fields)
+    return model, None
+
+
+class ToolRegistry:
+    """Decorator-based tool registry for OpenAI function calling"""
+
+    def __init__(self, strict: bool = False):
+        self.strict = strict
+        self._tools: Dict[str, RegisteredTool] = {}
+        self._schemas: Optional[List[Dict]] = None
+        self._schemas_bytes: Optional[bytes] = None
+
+    def tool(
+        self,
+        function: Optional[Callable] = None,
+        *,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        strict: Optional[bool] = None
+    ):
+        """Register a function as a tool: `@registry.tool` or `@registry.tool(...)`"""
+        def register(fn: Callable) -> Callable:
+            tool_name = name or fn.__name__
+            doc_description, param_docs = _parse_docstring(inspect.getdoc(fn))
+            use_strict = self.strict if strict is None else strict
+            model, model_param = _arguments_model(fn, tool_name, param_docs, use_strict)
+            self._tools[tool_name] = RegisteredTool(
+                name=tool_name,
+                function=fn,
+                description=description or doc_description,
+                arguments_model=model,
+                model_param=model_param,
+                strict=use_strict
+            )
+            self._schemas = None
+            self._schemas_bytes = None
+            return fn
+
+        if function is not None:
+            return register(function)
+        return register
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __getitem__(self, name: str) -> RegisteredTool:
+        return self._tools[name]
+
+    def __iter__(self):
+        return iter(self._tools.values())
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    @property
+    def tools(self) -> List[Dict]:
+        """The `tools=` list for chat.completions.create (cached)"""
+        if self._schemas is None:
+            self._schemas = [t.schema for t in self._tools.values()]
+        return self._schemas
+
+    @property
+    def tools_json(self) -> bytes:
+        """Serialized `tools` list, for raw HTTP clients and token counting (cached)"""
+        if self._schemas_bytes is None:
+            self._schemas_bytes = b"[" + b",".join(t.schema_bytes for t in self._tools.values()) + b"]"
+        return self._schemas_bytes
+
+    @property
+    def functions(self) -> Dict[str, Callable]:
+        """Name -> function mapping, the old `available_functions` dict"""
+        return {name: t.function for name, t in self._tools.items()}
+
+    def parse_arguments(self, name: str, arguments: Any) -> Dict:
+        """Validated kwargs for a tool call; plugs into ParallelToolExecutor"""
+        return self._tools[name].parse_arguments(arguments)
+
+    def dispatch(self, name: str, arguments: Any) -> Any:
+        """Validate the arguments and call the tool"""
+        return self._tools[name](arguments)
+
+
+def run_benchmark(iterations: int = 100_000):
+    """Measure per-call dispatch overhead"""
+    from typing import Literal
+
+    registry = ToolRegistry()
+
+    @registry.tool
+    def get_current_weather(location: str, unit: Literal["celsius", "fahrenheit"] = "celsius") -> str:
+        """Get the current weather in a location
+
+        Args:
+            location: The city and state, e.g. San Francisco, CA
+            unit: Temperature unit
+        """
+        return location
+
+    raw = '{"location": "Tokyo", "unit": "fahrenheit"}'
+    functions = {"get_current_weather": get_current_weather}
+
+    def timed(label: str, call: Callable, n: int):
+        start = time.perf_counter()
+        for _ in range(n):
+            call()
+        per_call = (time.perf_counter() - start) / n * 1e6
+        print(f"{label:<42} {per_call:8.2f} µs/call")
+
+    print("=== Tool Dispatch Overhead ===\n")
+    timed(
+        "json.loads + **kwargs (no validation)",
+        lambda: functions["get_current_weather"](**json.loads(raw)),
+        iterations
+    )
+    timed(
+        "registry.dispatch (cached TypeAdapter)",
+        lambda: registry.dispatch("get_current_weather", raw),
+        iterations
+    )
+    model = registry["get_current_weather"].arguments_model
+    timed(
+        "TypeAdapter rebuilt per call (uncached)",
+        lambda: TypeAdapter(model).validate_json(raw),
+        max(1, iterations // 100)
+    )
+    print(f"\nSchema bytes per request: {len(registry.tools_json)} (serialized once)")
+
+
+if __name__ == "__main__":
+    run_benchmark()
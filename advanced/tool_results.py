@@ -0,0 +1,107 @@
+"""
+Tool Result Serialization (2025)
+
+Demonstrates passing typed tool results (Pydantic models, dataclasses, dicts)
+through the agent loop and serializing them exactly once, at the message
+boundary, with orjson when it is installed.
+"""
+
+import dataclasses
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, List, Literal
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Fallback conversion for objects the JSON encoder doesn't know"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def serialize_tool_result(result: Any) -> str:
+    """Serialize a tool result for a `role: tool` message (the only serialization)"""
+    if isinstance(result, str):
+        return result  # already serialized, e.g. legacy json.dumps tools
+    if hasattr(result, "model_dump_json"):
+        return result.model_dump_json()  # pydantic-core encodes directly
+    if orjson is not None:
+        return orjson.dumps(result, default=_default).decode()
+    return json.dumps(result, default=_default, separators=(",", ":"))
+
+
+def tool_message(tool_call_id: str, name: str, result: Any) -> Dict:
+    """Build the chat message for a tool result"""
+    return {
+        "role": "tool",
+        "tool_call_id": tool_call_id,
+        "name": name,
+        "content": serialize_tool_result(result)
+    }
+
+
+def run_benchmark(calls: int = 20_000):
+    """Per-call CPU and allocation cost: round-trip vs. serialize-once"""
+    from pydantic import BaseModel
+
+    class SearchResult(BaseModel):
+        query: str
+        results: List[dict]
+        total_found: int
+
+    class WeatherInfo(BaseModel):
+        location: str
+        temperature: float
+        unit: Literal["celsius", "fahrenheit"]
+        condition: str
+        humidity: int
+
+    def build(i: int):
+        if i % 2:
+            return WeatherInfo(location="Tokyo", temperature=22.5, unit="celsius", condition="sunny", humidity=65)
+        return SearchResult(
+            query="ai agents",
+            results=[{"title": f"Result {j}", "url": f"https://example.com/{j}"} for j in range(5)],
+            total_found=5
+        )
+
+    def round_trip(i: int) -> Dict:
+        # Old pattern: tool dumps to a string, caller re-parses it to validate
+        content = build(i).model_dump_json()
+        json.loads(content)
+        return {"role": "tool", "tool_call_id": str(i), "name": "tool", "content": content}
+
+    def serialize_once(i: int) -> Dict:
+        return tool_message(str(i), "tool", build(i))
+
+    def measure(label: str, fn):
+        start = time.process_time()
+        for i in range(calls):
+            fn(i)
+        cpu = (time.process_time() - start) / calls * 1e6
+
+        tracemalloc.start()
+        kept = [fn(i) for i in range(1000)]  # keep messages alive, as the agent loop does
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        print(f"{label:<28} {cpu:8.2f} µs CPU/call   peak traced memory {peak / 1024:8.1f} KiB per 1k calls")
+
+    print("=== Tool Result Pipeline Benchmark ===\n")
+    print(f"Encoder: {'orjson' if orjson else 'json'} (+ pydantic-core for models)\n")
+    measure("dump + json.loads validate", round_trip)
+    measure("typed, serialize once", serialize_once)
+
+
+if __name__ == "__main__":
+    run_benchmark()
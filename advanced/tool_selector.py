@@ -0,0 +1,259 @@
+"""
+Relevance-Based Tool Selection (2025)
+
+Demonstrates sending only the tools relevant to a request instead of the
+whole catalog. Tool descriptions are embedded once (vectors are cached in
+memory and optionally on disk), each request gets the top-k tools plus any
+always-on tools, and the full set is used as a fallback when the model asks
+for a tool that wasn't offered.
+"""
+
+import functools
+import hashlib
+import json
+import math
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+Embedder = Callable[[List[str]], List[List[float]]]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """Very light suffix stripping so 'prices'/'pricing' share features"""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def hashed_embedding(text: str, dim: int = 512) -> List[float]:
+    """Offline embedding: hashed unigram/bigram counts, L2-normalized"""
+    words = [_stem(w) for w in _TOKEN.findall(text.lower().replace("_", " "))]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = [0.0] * dim
+    for feature in features:
+        h = zlib.crc32(feature.encode())
+        vector[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def hashed_embedder(texts: List[str]) -> List[List[float]]:
+    return [hashed_embedding(t) for t in texts]
+
+
+def openai_embedder(client: Any, model: str = "text-embedding-3-small") -> Embedder:
+    """Embedder backed by the OpenAI embeddings API (one batched request)"""
+    def embed(texts: List[str]) -> List[List[float]]:
+        response = client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+    return embed
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str) -> Any:
+    """tiktoken encoding for a model, or None when tiktoken is missing or its
+    BPE file cannot be fetched (it is downloaded on first use)"""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Token count via tiktoken when available, else a 4-chars-per-token estimate"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+def tool_text(tool: Dict) -> str:
+    """Text that represents a tool for retrieval"""
+    function = tool["function"]
+    parts = [function["name"].replace("_", " "), function.get("description", "")]
+    for name, prop in function.get("parameters", {}).get("properties", {}).items():
+        parts.append(f"{name}: {prop.get('description', '')}")
+    return "\n".join(parts)
+
+
+class ToolSelector:
+    """Pick the top-k relevant tools for a query from an embedded catalog"""
+
+    def __init__(
+        self,
+        tools: Sequence[Dict],
+        embed: Embedder = hashed_embedder,
+        top_k: int = 5,
+        always_on: Iterable[str] = (),
+        cache_path: Optional[str] = None
+    ):
+        self.tools = list(tools)
+        self.embed = embed
+        self.top_k = top_k
+        self.always_on = set(always_on)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._names = [t["function"]["name"] for t in self.tools]
+        self._vectors = self._embed_catalog()
+
+    def _embed_catalog(self) -> List[List[float]]:
+        """Embed tool descriptions once, reusing cached vectors by content hash"""
+        cache: Dict[str, List[float]] = {}
+        if self.cache_path and self.cache_path.exists():
+            cache = json.loads(self.cache_path.read_text())
+
+        texts = [tool_text(t) for t in self.tools]
+        keys = [hashlib.sha256(t.encode()).hexdigest() for t in texts]
+        missing = [i for i, key in enumerate(keys) if key not in cache]
+        if missing:
+            for i, vector in zip(missing, self.embed([texts[i] for i in missing])):
+                cache[keys[i]] = vector
+            if self.cache_path:
+                self.cache_path.write_text(json.dumps({k: cache[k] for k in keys}))
+        return [self._normalize(cache[key]) for key in keys]
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> List[float]:
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def rank(self, query: str) -> List[str]:
+        """All tool names ordered by similarity to the query"""
+        q = self._normalize(self.embed([query])[0])
+        scores = [sum(a * b for a, b in zip(q, v)) for v in self._vectors]
+        order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        return [self._names[i] for i in order]
+
+    def select(self, query: str, top_k: Optional[int] = None) -> List[Dict]:
+        """Top-k tools plus always-on tools, in catalog order"""
+        top_k = self.top_k if top_k is None else top_k
+        chosen = set(self.rank(query)[:top_k]) | self.always_on
+        return [t for t, name in zip(self.tools, self._names) if name in chosen]
+
+    def create_with_selection(self, client: Any, messages: List[Dict], query: str, **kwargs):
+        """chat.completions.create with a tool subset, retrying with the full set on a miss"""
+        subset = self.select(query)
+        offered = {t["function"]["name"] for t in subset}
+        response = client.chat.completions.create(messages=messages, tools=subset, **kwargs)
+        tool_calls = response.choices[0].message.tool_calls or []
+        if any(tc.function.name not in offered for tc in tool_calls):
+            response = client.chat.completions.create(messages=messages, tools=self.tools, **kwargs)
+        return response
+
+
+def _tool(name: str, summary: str, **params: str) -> Dict:
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": summary,
+            "parameters": {
+                "type": "object",
+                "properties": {p: {"type": "string", "description": d} for p, d in params.items()},
+                "required": list(params)
+            }
+        }
+    }
+
+
+# A 30-tool catalog with labelled queries for measuring selection quality
+FIXTURE_TOOLS = [
+    _tool("get_current_weather", "Get the current weather and temperature in a city", location="City name"),
+    _tool("get_weather_forecast", "Get the multi-day weather forecast for a city", location="City name"),
+    _tool("search_web", "Search the web for articles and information", query="Search query"),
+    _tool("search_news", "Search recent news headlines", query="News topic"),
+    _tool("get_stock_price", "Get the current stock price for a ticker symbol", symbol="Ticker symbol"),
+    _tool("get_exchange_rate", "Convert currency using the current exchange rate", pair="Currency pair"),
+    _tool("calculate", "Evaluate a math expression or calculation", expression="Math expression"),
+    _tool("send_email", "Send an email message to a recipient", to="Recipient address", body="Email body"),
+    _tool("read_inbox", "List unread emails in the inbox", folder="Mailbox folder"),
+    _tool("create_calendar_event", "Schedule a meeting or calendar event", title="Event title", time="Start time"),
+    _tool("list_calendar_events", "List upcoming meetings on the calendar", day="Day to list"),
+    _tool("set_reminder", "Set a reminder alarm for a later time", text="Reminder text", time="When"),
+    _tool("search_faq", "Search the FAQ for answers to common customer questions", query="Question"),
+    _tool("create_ticket", "Create a support ticket for a customer issue or bug", description="Issue"),
+    _tool("escalate_to_human", "Escalate the conversation to a human agent", reason="Reason"),
+    _tool("get_order_status", "Look up the shipping status of an order", order_id="Order number"),
+    _tool("cancel_order", "Cancel an existing order", order_id="Order number"),
+    _tool("issue_refund", "Issue a refund payment for an order", order_id="Order number"),
+    _tool("update_address", "Update the customer's shipping address", address="New address"),
+    _tool("reset_password", "Send a password reset link for the account", email="Account email"),
+    _tool("translate_text", "Translate text into another language", text="Text", language="Target language"),
+    _tool("summarize_text", "Summarize a long document or text", text="Text to summarize"),
+    _tool("run_sql_query", "Run a SQL query against the analytics database", sql="SQL statement"),
+    _tool("get_user_profile", "Fetch a user's profile and account details", user_id="User id"),
+    _tool("book_flight", "Book a flight ticket between two airports", origin="From", destination="To"),
+    _tool("find_restaurants", "Find restaurants near a location", location="Area", cuisine="Cuisine"),
+    _tool("get_directions", "Get driving directions between two places", origin="From", destination="To"),
+    _tool("play_music", "Play a song or playlist", track="Song name"),
+    _tool("save_report", "Save a research report to a file", title="Report title", content="Markdown"),
+    _tool("review_code", "Review source code for bugs and style issues", code="Source code")
+]
+
+FIXTURE_QUERIES = [
+    ("What's the weather like in Tokyo right now?", "get_current_weather"),
+    ("Will it rain in London this week? Give me the forecast", "get_weather_forecast"),
+    ("Search the web for AI agent frameworks", "search_web"),
+    ("Any news headlines about the election?", "search_news"),
+    ("How much is AAPL stock trading at?", "get_stock_price"),
+    ("Convert 100 USD to EUR at today's exchange rate", "get_exchange_rate"),
+    ("What is 17 * 23 + 4?", "calculate"),
+    ("Send an email to bob@example.com saying I'll be late", "send_email"),
+    ("Do I have unread emails in my inbox?", "read_inbox"),
+    ("Schedule a meeting with the design team tomorrow at 3pm", "create_calendar_event"),
+    ("What meetings do I have on my calendar today?", "list_calendar_events"),
+    ("Remind me to call mom at 6pm", "set_reminder"),
+    ("What is your refund policy? Check the FAQ", "search_faq"),
+    ("The app crashes on upload, please open a support ticket", "create_ticket"),
+    ("I want to talk to a human agent", "escalate_to_human"),
+    ("Where is my order 12345? What's the shipping status?", "get_order_status"),
+    ("Please cancel my order 999", "cancel_order"),
+    ("I need a refund for order 555", "issue_refund"),
+    ("Change my shipping address to 1 Main St", "update_address"),
+    ("I forgot my password, send a reset link", "reset_password"),
+    ("Translate 'good morning' into Japanese", "translate_text"),
+    ("Summarize this long document for me", "summarize_text"),
+    ("Run a SQL query to count signups by week", "run_sql_query"),
+    ("Show me the profile details for user 42", "get_user_profile"),
+    ("Book a flight from SFO to JFK next Friday", "book_flight"),
+    ("Find Italian restaurants near Union Square", "find_restaurants"),
+    ("Give me driving directions from home to the airport", "get_directions"),
+    ("Play some jazz music", "play_music"),
+    ("Save this research report as a file", "save_report"),
+    ("Review this Python code for bugs", "review_code")
+]
+
+
+def run_report(top_k: int = 5, embed: Embedder = hashed_embedder):
+    """Token savings vs. selection accuracy on the fixture set"""
+    selector = ToolSelector(FIXTURE_TOOLS, embed=embed, top_k=top_k, always_on=["escalate_to_human"])
+    full_tokens = count_tokens(json.dumps(FIXTURE_TOOLS))
+
+    hits = 0
+    subset_tokens = 0
+    for query, expected in FIXTURE_QUERIES:
+        subset = selector.select(query)
+        subset_tokens += count_tokens(json.dumps(subset))
+        hits += any(t["function"]["name"] == expected for t in subset)
+
+    n = len(FIXTURE_QUERIES)
+    avg_subset = subset_tokens / n
+    print("=== Tool Selection Report ===\n")
+    print(f"Catalog size:            {len(FIXTURE_TOOLS)} tools")
+    print(f"top_k (+ always-on):     {top_k} (+1)")
+    print(f"Full tools prompt:       {full_tokens} tokens")
+    print(f"Avg selected prompt:     {avg_subset:.0f} tokens")
+    print(f"Tool tokens saved:       {1 - avg_subset / full_tokens:.0%}")
+    print(f"Expected tool offered:   {hits}/{n} ({hits / n:.0%})")
+    print(f"Fallback calls expected: {n - hits}/{n} (one extra round trip each)")
+
+
+if __name__ == "__main__":
+    for k in (3, 5, 8):
+        run_report(top_k=k)
+        print()
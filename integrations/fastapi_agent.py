@@ -7,10 +7,12 @@ REST API for AI agents using FastAPI.
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from openai import OpenAI
 import uvicorn
 
+from advanced.compact_conversation import Conversation
+
 app = FastAPI(title="AI Agent API", version="1.0.0")
 
 # Add CORS
@@ -44,7 +46,7 @@ class AgentStatus(BaseModel):
 
 
 # In-memory conversation storage (use Redis in production)
-conversations = {}
+conversations: Dict[str, Conversation] = {}
 
 
 @app.get("/", response_model=AgentStatus)
@@ -63,22 +65,21 @@ async def chat(request: ChatRequest):
     try:
         # Get or create conversation
         conv_id = request.conversation_id or f"conv_{id(request)}"
-        messages = conversations.get(conv_id, [])
+        conversation = conversations.get(conv_id)
+        if conversation is None:
+            conversation = conversations[conv_id] = Conversation(max_messages=10)  # Keep last 10 messages
         
         # Add user message
-        messages.append({"role": "user", "content": request.message})
+        conversation.add_user(request.message)
         
         # Call OpenAI
         response = client.chat.completions.create(
             model=request.model,
-            messages=messages
+            messages=conversation.to_messages()
         )
         
         assistant_message = response.choices[0].message.content
-        messages.append({"role": "assistant", "content": assistant_message})
-        
-        # Store conversation
-        conversations[conv_id] = messages[-10:]  # Keep last 10 messages
+        conversation.add_assistant(assistant_message)
         
         return ChatResponse(
             response=assistant_message,
@@ -8,6 +8,8 @@ It provides minimal primitives for building agentic workflows.
 from openai import OpenAI
 import json
 
+from advanced.agent_runtime import AgentRuntime
+
 # Note: Install with: pip install openai>=1.0.0
 
 client = OpenAI()  # Requires OPENAI_API_KEY environment variable
@@ -76,6 +78,10 @@ available_tools = {
 }
 
 
+# One tool round, then an answer without tools
+runtime = AgentRuntime(client, tools, available_tools, max_tool_rounds=1)
+
+
 def run_agent(query: str):
     """Run the OpenAI agent with function calling"""
     messages = [
@@ -83,41 +89,7 @@ def run_agent(query: str):
         {"role": "user", "content": query}
     ]
     
-    # First API call
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=messages,
-        tools=tools
-    )
-    
-    response_message = response.choices[0].message
-    messages.append(response_message)
-    
-    # Handle tool calls
-    if response_message.tool_calls:
-        for tool_call in response_message.tool_calls:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            # Execute the function
-            function_response = available_tools[function_name](**function_args)
-            
-            # Add function response to messages
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "name": function_name,
-                "content": function_response
-            })
-        
-        # Second API call with function results
-        second_response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages
-        )
-        return second_response.choices[0].message.content
-    
-    return response_message.content
+    return runtime.run(messages).content
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""
+Handoff Benchmarks
+
+Replays customer queries through the handoff demo using the mock LLM server
+(advanced/mock_llm.py), so no API key or network access is needed:
+- handoffs: LLM calls per resolved query, with the original transfer loop,
+  in-process handoffs with cycle detection, and local routing ahead of triage
+- sessions: LLM calls on a multi-turn replay, starting every message at
+  triage vs. resuming each conversation at its last agent
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+# The demo builds an OpenAI client at import; the mock replaces it for every call
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from advanced.mock_llm import MockChatClient, tool_call_message
+from openai_agents.handoff_demo import agents, available_functions, run_multi_agent
+from openai_agents.handoff_sessions import HandoffChat, SessionStore
+from openai_agents.local_router import get_router
+
+LLM_LATENCY = 0.15
+
+SALES_WORDS = ("buy", "price", "pricing", "plan", "upgrade", "quote", "demo", "seats", "discount")
+TECH_WORDS = ("crash", "error", "sync", "login", "log in", "broken", "slow", "bug")
+
+QUERIES = [
+    "I want to buy a premium subscription",
+    "How much is the enterprise plan for 50 seats?",
+    "Can we get a demo before we upgrade?",
+    "Do you offer a nonprofit discount?",
+    "Please send me a quote for 200 seats",
+    "My account is not syncing properly",
+    "The app crashes when I upload a file",
+    "I get a 500 error when I save a report",
+    "The dashboard is really slow since the update",
+    "Login fails with an invalid token error",
+    # Mixed intents: sales hands these back to triage, which sends them to sales again
+    "I want to upgrade my plan but the app keeps crashing",
+    "What's the price of Pro, and why is sync broken?"
+]
+
+# Follow-ups mostly stay with one specialist; the last conversation changes topic
+CONVERSATIONS = [
+    ["I want to buy a premium subscription", "Is there a discount on the annual plan?",
+     "Can I add more seats later?", "Please send me a quote"],
+    ["The app crashes when I upload a file", "It still crashes after reinstalling",
+     "Now I also get an error at login", "Sync seems slow too"],
+    ["How much is the enterprise plan?", "Does the price include a demo for the team?",
+     "What about a nonprofit discount?", "OK, we want to buy it"],
+    ["My account is not syncing properly", "Is that a known bug?",
+     "The mobile app shows the same error", "Thanks, it works now after the update"],
+    ["Can we get a quote for 50 seats?", "Great. Separately, the dashboard shows an error since the update",
+     "The error mentions a timeout", "It is still slow"]
+]
+
+
+def handoff_responder(request: Dict):
+    """Mock agents: triage transfers by keyword, sales bounces mixed queries back"""
+    system = request["messages"][0]["content"]
+    query = [m for m in request["messages"] if isinstance(m, dict) and m["role"] == "user"][-1]["content"].lower()
+    sales = any(word in query for word in SALES_WORDS)
+    technical = any(word in query for word in TECH_WORDS)
+    if system.startswith("You are a triage agent"):
+        return tool_call_message("transfer_to_sales" if sales else "transfer_to_support")
+    if system.startswith("You are a sales agent") and technical and request.get("tools"):
+        return tool_call_message("transfer_to_triage")
+    return f"Answer from {system.split('.')[0][len('You are a '):]}"
+
+
+def original_run_multi_agent(query: str, llm, max_turns: int = 10) -> str:
+    """The loop before in-process handoffs: every transfer appends a synthetic
+    message and calls the next agent with a freshly built prompt"""
+    current_agent = "triage_agent"
+    messages = [{"role": "user", "content": query}]
+    for _ in range(max_turns):
+        agent_config = agents[current_agent]
+        response = llm.chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "system", "content": agent_config["instructions"]}, *messages],
+            tools=agent_config["tools"] if agent_config["tools"] else None
+        )
+        response_message = response.choices[0].message
+        if response_message.tool_calls:
+            result = available_functions[response_message.tool_calls[0].function.name]()
+            if "agent" in result:
+                current_agent = result["agent"]
+                messages.append({"role": "assistant", "content": f"Transferring you to {agents[current_agent]['name']}..."})
+                continue
+        return response_message.content
+    return "Maximum turns reached"
+
+
+def replay(run: Callable[[str, MockChatClient], str]) -> Dict:
+    llm = MockChatClient(handoff_responder, latency=LLM_LATENCY)
+    resolved, timings = 0, []
+    for query in QUERIES:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            answer = run(query, llm)
+        timings.append(time.perf_counter() - start)
+        resolved += answer != "Maximum turns reached"
+    return {"calls": llm.call_count, "resolved": resolved, "mean": sum(timings) / len(timings)}
+
+
+def run_handoff_benchmark():
+    router = get_router()
+    paths = [
+        ("original", original_run_multi_agent),
+        ("in-process handoffs", lambda query, llm: run_multi_agent(query, llm_client=llm)),
+        ("in-process + local router", lambda query, llm: run_multi_agent(query, router=router, llm_client=llm))
+    ]
+
+    print("=== Handoff Replay ===\n")
+    print(f"{len(QUERIES)} queries (2 with mixed intent); mock LLM {LLM_LATENCY * 1000:.0f} ms/call\n")
+    print(f"{'Path':<28} {'Resolved':>9} {'LLM calls':>10} {'Calls/resolved':>15} {'Mean':>8}")
+    for name, run in paths:
+        stats = replay(run)
+        print(f"{name:<28} {stats['resolved']:>5}/{len(QUERIES):<3} {stats['calls']:>10} "
+              f"{stats['calls'] / max(stats['resolved'], 1):>15.2f} {stats['mean'] * 1000:>6.0f}ms")
+
+
+def run_session_benchmark():
+    router = get_router()
+    turns = sum(len(conversation) for conversation in CONVERSATIONS)
+
+    def stateless(llm: MockChatClient, conversation_id: str, message: str) -> str:
+        return run_multi_agent(message, llm_client=llm)
+
+    def with_sessions(router=None, path=None, restart_after: int = 0):
+        """A HandoffChat per mock client; optionally a fresh one (same SQLite file) mid-replay"""
+        chats: Dict[int, HandoffChat] = {}
+        served: Dict[int, int] = {}
+
+        def run(llm: MockChatClient, conversation_id: str, message: str) -> str:
+            key = id(llm)
+            served[key] = served.get(key, 0) + 1
+            if key not in chats or served[key] == restart_after + 1:
+                chats[key] = HandoffChat(SessionStore(path=path), router=router, llm_client=llm)
+            return chats[key].chat(conversation_id, message)
+        return run
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db = os.path.join(workdir, "sessions.db")
+        paths = [
+            ("triage every message", stateless),
+            ("sessions", with_sessions()),
+            ("sessions + local router", with_sessions(router)),
+            ("sessions, SQLite, restarted", with_sessions(path=db, restart_after=turns // 2))
+        ]
+
+        print("\n=== Multi-turn Session Replay ===\n")
+        print(f"{len(CONVERSATIONS)} conversations, {turns} messages (one topic change); "
+              f"mock LLM {LLM_LATENCY * 1000:.0f} ms/call\n")
+        print(f"{'Path':<30} {'LLM calls':>10} {'Calls/message':>14} {'Prompt tokens':>14} {'Wall':>8}")
+        for name, run in paths:
+            llm = MockChatClient(handoff_responder, latency=LLM_LATENCY)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Conversations interleave, as they would on a live service
+                for turn in range(max(len(c) for c in CONVERSATIONS)):
+                    for number, conversation in enumerate(CONVERSATIONS):
+                        if turn < len(conversation):
+                            run(llm, f"conversation-{number}", conversation[turn])
+            elapsed = time.perf_counter() - start
+            print(f"{name:<30} {llm.call_count:>10} {llm.call_count / turns:>14.2f} "
+                  f"{llm.prompt_tokens:>14,} {elapsed:>7.2f}s")
+
+
+BENCHMARKS = {
+    "handoffs": run_handoff_benchmark,
+    "sessions": run_session_benchmark
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmark", nargs="?", choices=sorted(BENCHMARKS), help="Run one benchmark (default: all)")
+    args = parser.parse_args()
+    for name, benchmark in BENCHMARKS.items():
+        if args.benchmark in (None, name):
+            benchmark()
@@ -6,9 +6,12 @@ Based on OpenAI's Agents SDK pattern (successor to Swarm).
 """
 
 from openai import OpenAI
-from typing import Dict, List, Callable
+from dataclasses import dataclass
+from typing import Dict, List, Callable, Optional, Tuple
 import json
 
+from openai_agents.local_router import LocalRouter, get_router
+
 client = OpenAI()
 
 
@@ -96,55 +99,125 @@ available_functions = {
 }
 
 
-def run_multi_agent(query: str, max_turns: int = 10):
-    """Run multi-agent system with handoffs"""
-    current_agent = "triage_agent"
-    messages = [{"role": "user", "content": query}]
+@dataclass(frozen=True)
+class CompiledAgent:
+    """An agent's request pieces, built once instead of on every call"""
+    key: str
+    name: str
+    system_message: Dict
+    tools: Optional[List[Dict]]
+    handoffs: Dict[str, str]  # transfer tool name -> target agent key
+
+
+def compile_agents(configs: Dict[str, Dict]) -> Dict[str, CompiledAgent]:
+    """Precompute system messages, tool lists and handoff targets"""
+    compiled = {}
+    for key, config in configs.items():
+        tool_names = [tool["function"]["name"] for tool in config["tools"]]
+        compiled[key] = CompiledAgent(
+            key=key,
+            name=config["name"],
+            system_message={"role": "system", "content": config["instructions"]},
+            tools=config["tools"] or None,
+            handoffs={name: available_functions[name]()["agent"] for name in tool_names if name in available_functions}
+        )
+    return compiled
+
+
+compiled_agents = compile_agents(agents)
+
+# Local router labels that can skip triage (see local_router.py)
+ROUTED_AGENTS = {"sales": "sales_agent", "technical": "support_agent"}
+
+
+def _tool_result(tool_call, content: Dict) -> Dict:
+    return {"role": "tool", "tool_call_id": tool_call.id, "name": tool_call.function.name, "content": json.dumps(content)}
+
+
+def resolve_handoffs(
+    messages: List,
+    agent: str = "triage_agent",
+    router: Optional[LocalRouter] = None,
+    max_turns: int = 10,
+    llm_client=None
+) -> Tuple[str, str]:
+    """Answer the last user message in `messages` (extended in place).
+
+    Handoffs are resolved in-process: the transfer tool call and its result
+    stay in the history, and the next agent is called with the same context.
+    Starting at triage with a router, a confidently classified query goes
+    straight to the specialist. A transfer back to an agent that already had
+    the message is refused, and the current agent must answer.
+
+    Returns (answer, key of the agent that gave it).
+    """
+    llm = llm_client or client
+    current = compiled_agents[agent]
+    visited = [current.key]
+    label = router.route(messages[-1]["content"]) if router is not None and agent == "triage_agent" else None
+    if label in ROUTED_AGENTS:
+        current = compiled_agents[ROUTED_AGENTS[label]]
+        visited.append(current.key)
+        print(f"\n⚡ Routed locally to {current.name}")
     
+    cycle = False
     for turn in range(max_turns):
-        agent_config = agents[current_agent]
-        print(f"\n🤖 [{agent_config['name']}]")
+        print(f"\n🤖 [{current.name}]")
         
-        # Call OpenAI API
-        response = client.chat.completions.create(
+        # After a refused handoff, the agent answers without tools
+        response = llm.chat.completions.create(
             model="gpt-4",
-            messages=[
-                {"role": "system", "content": agent_config["instructions"]},
-                *messages
-            ],
-            tools=agent_config["tools"] if agent_config["tools"] else None
+            messages=[current.system_message, *messages],
+            tools=None if cycle else current.tools
         )
         
         response_message = response.choices[0].message
+        handoffs = [tc for tc in response_message.tool_calls or [] if tc.function.name in current.handoffs]
+        if not handoffs:
+            print(f"  Response: {response_message.content}")
+            return response_message.content, current.key
         
-        # Check for tool calls (handoffs)
-        if response_message.tool_calls:
-            tool_call = response_message.tool_calls[0]
-            function_name = tool_call.function.name
-            
-            # Execute handoff
-            result = available_functions[function_name]()
-            
-            if "agent" in result:
-                print(f"  → Transferring to {agents[result['agent']]['name']}")
-                current_agent = result["agent"]
-                messages.append({"role": "assistant", "content": f"Transferring you to {agents[current_agent]['name']}..."})
-                continue
-        
-        # No handoff, return final response
-        print(f"  Response: {response_message.content}")
-        return response_message.content
+        # Every tool call gets a result; the first handoff wins
+        messages.append(response_message)
+        target = current.handoffs[handoffs[0].function.name]
+        for tool_call in response_message.tool_calls:
+            if tool_call is not handoffs[0]:
+                messages.append(_tool_result(tool_call, {"status": "ignored"}))
+            elif target in visited:
+                print(f"  ✋ Refusing handoff back to {compiled_agents[target].name}")
+                messages.append(_tool_result(tool_call, {
+                    "status": "refused",
+                    "reason": f"{compiled_agents[target].name} already handled this conversation; answer the user directly"
+                }))
+                cycle = True
+            else:
+                print(f"  → Transferring to {compiled_agents[target].name}")
+                messages.append(_tool_result(tool_call, {"status": "transferred", "agent": compiled_agents[target].name}))
+        if not cycle:
+            current = compiled_agents[target]
+            visited.append(target)
     
-    return "Maximum turns reached"
+    return "Maximum turns reached", current.key
+
+
+def run_multi_agent(
+    query: str,
+    max_turns: int = 10,
+    router: Optional[LocalRouter] = None,
+    llm_client=None
+):
+    """Run multi-agent system with handoffs, starting at triage"""
+    messages = [{"role": "user", "content": query}]
+    return resolve_handoffs(messages, router=router, max_turns=max_turns, llm_client=llm_client)[0]
 
 
 if __name__ == "__main__":
     try:
         print("=== Sales Query ===")
-        run_multi_agent("I want to buy a premium subscription")
+        run_multi_agent("I want to buy a premium subscription", router=get_router())
         
         print("\n\n=== Support Query ===")
-        run_multi_agent("My account is not syncing properly")
+        run_multi_agent("My account is not syncing properly", router=get_router())
         
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,154 @@
+"""
+OpenAI Agents SDK - Handoff Sessions
+
+Multi-turn conversations for the handoff demo: each conversation ID keeps
+the agent that answered last and a compacted history (user and assistant
+text only, capped in length), so a follow-up goes straight to the
+specialist instead of paying the triage round trip again. Sessions live in
+a bounded LRU, optionally backed by SQLite so they survive restarts and
+evictions.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+from advanced.compact_conversation import Conversation
+from openai_agents.handoff_demo import resolve_handoffs
+from openai_agents.local_router import LocalRouter
+
+
+@dataclass
+class HandoffSession:
+    """State of one conversation between turns"""
+    conversation_id: str
+    agent: str = "triage_agent"
+    history: Conversation = field(default_factory=Conversation)
+    updated: float = field(default_factory=time.time)
+
+
+class SessionStore:
+    """LRU of sessions by conversation ID, written through to SQLite when a path is given"""
+
+    def __init__(
+        self,
+        max_sessions: int = 10_000,
+        path: Optional[Union[str, Path]] = None,
+        max_messages: int = 20
+    ):
+        """
+        Args:
+            max_sessions: Sessions kept in memory; the least recently used are evicted
+            path: SQLite file for persistence (None keeps sessions in memory only)
+            max_messages: History cap per session; older messages are dropped
+        """
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, HandoffSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(conversation_id TEXT PRIMARY KEY, agent TEXT, history TEXT, updated REAL)"
+            )
+            self._db.commit()
+
+    def _load(self, conversation_id: str) -> Optional[HandoffSession]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT agent, history, updated FROM sessions WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        session = HandoffSession(conversation_id, row[0], Conversation(max_messages=self.max_messages), row[2])
+        for role, content in json.loads(row[1]):
+            session.history.append(role, content)
+        return session
+
+    def get(self, conversation_id: str) -> HandoffSession:
+        """The conversation's session, from memory, then SQLite, else a new one at triage"""
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is not None:
+                self._sessions.move_to_end(conversation_id)
+                return session
+            session = self._load(conversation_id) or HandoffSession(
+                conversation_id, history=Conversation(max_messages=self.max_messages)
+            )
+            self._remember(session)
+            return session
+
+    def _remember(self, session: HandoffSession):
+        self._sessions[session.conversation_id] = session
+        self._sessions.move_to_end(session.conversation_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)  # already persisted by save()
+
+    def save(self, session: HandoffSession):
+        session.updated = time.time()
+        with self._lock:
+            self._remember(session)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+                        (session.conversation_id, session.agent, json.dumps(list(session.history)), session.updated)
+                    )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+
+
+class HandoffChat:
+    """Multi-turn handoff conversations keyed by conversation ID"""
+
+    def __init__(
+        self,
+        store: Optional[SessionStore] = None,
+        router: Optional[LocalRouter] = None,
+        max_turns: int = 10,
+        llm_client=None
+    ):
+        self.store = store if store is not None else SessionStore()
+        self.router = router
+        self.max_turns = max_turns
+        self.llm_client = llm_client
+
+    def chat(self, conversation_id: str, user_message: str) -> str:
+        """Answer one message, starting at the agent that answered the last one"""
+        session = self.store.get(conversation_id)
+        messages = session.history.to_messages("")
+        messages.append({"role": "user", "content": user_message})
+        answer, session.agent = resolve_handoffs(
+            messages, session.agent, self.router, self.max_turns, self.llm_client
+        )
+        answer = answer or ""  # a reply with no text must not be stored (or replayed) as None
+        # Only the text is kept: the transfer tool calls are not needed on later turns
+        session.history.add_user(user_message)
+        session.history.add_assistant(answer)
+        self.store.save(session)
+        return answer
+
+
+if __name__ == "__main__":
+    try:
+        bot = HandoffChat()
+        for message in ("I want to buy a premium subscription", "Does it include priority support?"):
+            print(f"\nUser: {message}")
+            print(f"Agent: {bot.chat('demo-conversation', message)}")
+    except Exception as e:
+        print(f"Error: {e}")
+        print("Note: This example requires OPENAI_API_KEY.")
@@ -0,0 +1,242 @@
+"""
+Local Triage Router
+
+A fast path for the triage agent: a hashed TF-IDF + logistic regression
+classifier in NumPy, trained from a labelled JSONL file
+({"text": ..., "label": ...} per line). Queries it is confident about are
+routed locally in microseconds; the rest fall back to the LLM.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from use_cases.faq_search import tokenize
+
+EXAMPLES_PATH = Path(__file__).with_name("triage_examples.jsonl")
+
+
+def load_examples(path: Union[str, Path] = EXAMPLES_PATH) -> List[Tuple[str, str]]:
+    """(text, label) pairs from a JSONL file"""
+    with open(path) as f:
+        return [(record["text"], record["label"]) for record in map(json.loads, f) if record]
+
+
+def normalize_text(text: str) -> str:
+    """Lowercased words only, so case, punctuation and spacing variants compare equal"""
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def dedupe_examples(
+    examples: Sequence[Tuple[str, str]],
+    exclude: Sequence[str] = ()
+) -> List[Tuple[str, str]]:
+    """First occurrence of each (normalized) text, minus any in exclude.
+
+    Run before a train/test split: a duplicate on both sides of it is
+    scored as a held-out query the model has already seen.
+    """
+    seen = {normalize_text(text) for text in exclude}
+    unique = []
+    for text, label in examples:
+        key = normalize_text(text)
+        if key not in seen:
+            seen.add(key)
+            unique.append((text, label))
+    return unique
+
+
+class LocalRouter:
+    """Multinomial logistic regression over hashed unigram + bigram TF-IDF features"""
+
+    def __init__(self, dim: int = 4096, l2: float = 1e-4, threshold: float = 0.8):
+        """
+        Args:
+            dim: Number of hashed feature buckets
+            l2: L2 regularization strength
+            threshold: Lowest probability route() accepts
+        """
+        self.dim = dim
+        self.l2 = l2
+        self.threshold = threshold
+        self.labels: List[str] = []
+        self.idf = np.ones(dim)
+        self.weights = np.zeros((dim, 0))
+        self.bias = np.zeros(0)
+
+    def _features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse (bucket indices, sublinear tf) of a text, before IDF"""
+        words = tokenize(text)
+        counts = Counter(zlib.crc32(f.encode()) % self.dim for f in words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+        if not counts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+        return np.fromiter(counts.keys(), dtype=np.intp), 1.0 + np.log(np.fromiter(counts.values(), dtype=float))
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        indices, values = self._features(text)
+        values = values * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm else values
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str], epochs: int = 300, learning_rate: float = 10.0) -> "LocalRouter":
+        """Full-batch gradient descent on the cross-entropy loss.
+
+        Only the buckets some training text hits get non-zero weights, so the
+        optimisation runs over those columns instead of all `dim`.
+        """
+        self.labels = sorted(set(labels))
+        sparse = [self._features(text) for text in texts]
+        document_frequency = np.zeros(self.dim)
+        for indices, _ in sparse:
+            document_frequency[indices] += 1
+        self.idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+
+        active = np.flatnonzero(document_frequency)
+        column = np.zeros(self.dim, dtype=np.intp)
+        column[active] = np.arange(len(active))
+        X = np.zeros((len(texts), len(active)))
+        for row, text in enumerate(texts):
+            indices, values = self._vector(text)
+            X[row, column[indices]] = values
+        Y = np.zeros((len(texts), len(self.labels)))
+        Y[np.arange(len(texts)), [self.labels.index(label) for label in labels]] = 1.0
+
+        weights = np.zeros((len(active), len(self.labels)))
+        self.bias = np.zeros(len(self.labels))
+        for _ in range(epochs):
+            logits = X @ weights + self.bias
+            logits -= logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            error = (probabilities - Y) / len(texts)
+            weights -= learning_rate * (X.T @ error + self.l2 * weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        self.weights = np.zeros((self.dim, len(self.labels)))
+        self.weights[active] = weights
+        return self
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        indices, values = self._vector(text)
+        logits = values @ self.weights[indices] + self.bias
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Most likely label and its probability"""
+        probabilities = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    def route(self, text: str, threshold: Optional[float] = None) -> Optional[str]:
+        """The label if the router is confident enough, else None (ask the LLM)"""
+        label, confidence = self.predict(text)
+        return label if confidence >= (self.threshold if threshold is None else threshold) else None
+
+    def save(self, path: Union[str, Path]):
+        np.savez(path, weights=self.weights, bias=self.bias, idf=self.idf, labels=np.array(self.labels),
+                 config=np.array([self.dim, self.l2, self.threshold]))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LocalRouter":
+        data = np.load(path)
+        dim, l2, threshold = data["config"]
+        router = cls(int(dim), float(l2), float(threshold))
+        router.weights, router.bias, router.idf = data["weights"], data["bias"], data["idf"]
+        router.labels = [str(label) for label in data["labels"]]
+        return router
+
+    @classmethod
+    def from_jsonl(cls, path: Union[str, Path] = EXAMPLES_PATH, **kwargs) -> "LocalRouter":
+        texts, labels = zip(*load_examples(path))
+        return cls(**kwargs).fit(texts, labels)
+
+
+_router: Optional[LocalRouter] = None
+
+
+def get_router() -> LocalRouter:
+    """Shared router, trained on first use (TRIAGE_ROUTER_DATA overrides the examples file)"""
+    global _router
+    if _router is None:
+        _router = LocalRouter.from_jsonl(os.environ.get("TRIAGE_ROUTER_DATA", EXAMPLES_PATH))
+    return _router
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+def run_benchmark(latency: float = 0.15, test_fraction: float = 0.25, seed: int = 0):
+    """Held-out accuracy, fallback rate and routing latency: local + fallback vs. LLM-only"""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")  # triage_agent builds a client at import
+    from advanced.mock_llm import MockChatClient, tool_call_message
+    from openai_agents.triage_agent import DEMO_QUERIES, ROUTE_TOOLS, route_query
+
+    # Deduplicate before splitting, and keep the demo's own queries out of both sides
+    examples = dedupe_examples(load_examples(), exclude=DEMO_QUERIES)
+    random.Random(seed).shuffle(examples)
+    split = int(len(examples) * (1 - test_fraction))
+    train, test = examples[:split], examples[split:]
+    router = LocalRouter().fit(*zip(*train))
+    gold = dict(examples)
+
+    def oracle(request: Dict):
+        """Mock GPT-4 that always routes correctly"""
+        return tool_call_message((ROUTE_TOOLS[gold[request["messages"][-1]["content"]]], {"issue": "..."}))
+
+    print("=== Local Router Benchmark ===\n")
+    print(f"{len(train)} training / {len(test)} held-out queries; mock LLM {latency * 1000:.0f} ms/call\n")
+    print(f"{'Path':<28} {'Accuracy':>9} {'Fallback':>9} {'p50':>10} {'p99':>10}")
+    for name, threshold in (("LLM only", None), ("local only", 0.0), ("local @0.6 + fallback", 0.6),
+                            ("local @0.8 + fallback", 0.8), ("local @0.9 + fallback", 0.9)):
+        client = MockChatClient(oracle, latency=latency)
+        timings, correct = [], 0
+        for text, label in test:
+            start = time.perf_counter()
+            routed = route_query(text, router if threshold is not None else None, threshold, client)
+            timings.append(time.perf_counter() - start)
+            correct += routed == label
+        print(f"{name:<28} {correct / len(test):>8.0%} {client.call_count / len(test):>8.0%} "
+              f"{_percentile(timings, 0.5) * 1000:>8.3f}ms {_percentile(timings, 0.99) * 1000:>8.3f}ms")
+
+    start = time.perf_counter()
+    for text, _ in test * 100:
+        router.predict(text)
+    print(f"\nLocal prediction alone: {(time.perf_counter() - start) / (len(test) * 100) * 1e6:.0f} µs/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train, try, or benchmark the local triage router")
+    sub = parser.add_subparsers(dest="command")
+    train = sub.add_parser("train", help="Train from a labelled JSONL file and save the model")
+    train.add_argument("--data", default=str(EXAMPLES_PATH))
+    train.add_argument("--output", default="triage_router.npz")
+    predict = sub.add_parser("predict", help="Route a query")
+    predict.add_argument("query")
+    sub.add_parser("bench", help="Accuracy, fallback rate and latency vs. the LLM-only path")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        router = LocalRouter.from_jsonl(args.data)
+        router.save(args.output)
+        print(f"Saved {len(router.labels)}-label router to {args.output}")
+    elif args.command == "predict":
+        label, confidence = get_router().predict(args.query)
+        print(f"{label} ({confidence:.0%}){'' if confidence >= get_router().threshold else ' -> LLM fallback'}")
+    else:
+        run_benchmark()
+
+
+if __name__ == "__main__":
+    main()
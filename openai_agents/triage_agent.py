@@ -5,15 +5,33 @@ Demonstrates a production-ready triage pattern that routes to specialists.
 """
 
 from openai import OpenAI
-from typing import Optional
+from typing import Dict, Iterator, List, Literal, Optional
+from pathlib import Path
+import argparse
 import json
 
+from advanced.agent_runtime import AgentHooks, AgentRuntime
+from advanced.batch_runner import BatchResult, BatchRunner, message_of
+from advanced.parallel_tools import ParallelToolExecutor
+from advanced.tool_registry import ToolRegistry
+from advanced.tool_selector import ToolSelector, openai_embedder
+from openai_agents.local_router import LocalRouter, get_router
+from use_cases.ticket_store import get_ticket_store
+
 client = OpenAI()
 
+# Triage agent tools: schemas are derived from the signatures below
+registry = ToolRegistry()
+
 
 # Specialist functions
+@registry.tool(description="Route to billing specialist for payment, invoice, or subscription issues")
 def handle_billing(issue: str) -> str:
-    """Handle billing-related issues"""
+    """Handle billing-related issues
+
+    Args:
+        issue: Billing issue description
+    """
     return json.dumps({
         "specialist": "billing",
         "message": f"Billing team will handle: {issue}",
@@ -21,8 +39,13 @@ def handle_billing(issue: str) -> str:
     })
 
 
+@registry.tool(description="Route to technical specialist for bugs, errors, or system issues")
 def handle_technical(issue: str) -> str:
-    """Handle technical issues"""
+    """Handle technical issues
+
+    Args:
+        issue: Technical issue description
+    """
     return json.dumps({
         "specialist": "technical",
         "message": f"Technical support will handle: {issue}",
@@ -30,8 +53,13 @@ def handle_technical(issue: str) -> str:
     })
 
 
+@registry.tool(description="Route to sales specialist for product inquiries or purchasing")
 def handle_sales(query: str) -> str:
-    """Handle sales inquiries"""
+    """Handle sales inquiries
+
+    Args:
+        query: Sales query
+    """
     return json.dumps({
         "specialist": "sales",
         "message": f"Sales team will handle: {query}",
@@ -39,156 +67,210 @@ def handle_sales(query: str) -> str:
     })
 
 
-def create_ticket(category: str, description: str, priority: str = "medium") -> str:
-    """Create a support ticket"""
+@registry.tool(description="Create a support ticket for general issues")
+def create_ticket(
+    category: str,
+    description: str,
+    priority: Literal["low", "medium", "high", "urgent"] = "medium"
+) -> str:
+    """Create a support ticket
+
+    Args:
+        category: Issue category
+        description: Issue description
+        priority: Ticket priority
+    """
+    ticket = get_ticket_store().create(category, description, priority)
     return json.dumps({
-        "ticket_id": f"TICKET-{id(description)}",
-        "category": category,
-        "priority": priority,
+        "ticket_id": ticket.ticket_id,
+        "category": ticket.category,
+        "priority": ticket.priority,
         "status": "created"
     })
 
 
 # Triage agent configuration
-triage_tools = [
-    {
-        "type": "function",
-        "function": {
-            "name": "handle_billing",
-            "description": "Route to billing specialist for payment, invoice, or subscription issues",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "issue": {"type": "string", "description": "Billing issue description"}
-                },
-                "required": ["issue"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "handle_technical",
-            "description": "Route to technical specialist for bugs, errors, or system issues",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "issue": {"type": "string", "description": "Technical issue description"}
-                },
-                "required": ["issue"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "handle_sales",
-            "description": "Route to sales specialist for product inquiries or purchasing",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "Sales query"}
-                },
-                "required": ["query"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "create_ticket",
-            "description": "Create a support ticket for general issues",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "category": {"type": "string", "description": "Issue category"},
-                    "description": {"type": "string", "description": "Issue description"},
-                    "priority": {"type": "string", "enum": ["low", "medium", "high", "urgent"]}
-                },
-                "required": ["category", "description"]
-            }
-        }
-    }
-]
+triage_tools = registry.tools
+
+available_functions = registry.functions
+
+TRIAGE_SYSTEM_PROMPT = (
+    "You are a triage agent for customer support. Analyze each query and route it to the "
+    "appropriate specialist: billing, technical, or sales. For general issues, create a ticket. "
+    "Always be helpful and professional."
+)
 
-available_functions = {
-    "handle_billing": handle_billing,
-    "handle_technical": handle_technical,
-    "handle_sales": handle_sales,
-    "create_ticket": create_ticket
+
+# Router labels (see local_router.py) and the tool each one stands for
+ROUTE_TOOLS = {
+    "billing": "handle_billing",
+    "technical": "handle_technical",
+    "sales": "handle_sales",
+    "ticket": "create_ticket"
 }
+TOOL_ROUTES = {tool: label for label, tool in ROUTE_TOOLS.items()}
+
 
+def route_arguments(label: str, user_query: str) -> Dict:
+    """Tool arguments for a locally routed query"""
+    if label == "sales":
+        return {"query": user_query}
+    if label == "ticket":
+        return {"category": "general", "description": user_query}
+    return {"issue": user_query}
 
-def triage_agent(user_query: str) -> str:
-    """Triage agent that routes queries to appropriate specialists"""
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a triage agent for customer support. Analyze each query and route it to the "
-                "appropriate specialist: billing, technical, or sales. For general issues, create a ticket. "
-                "Always be helpful and professional."
-            )
-        },
+
+def _triage_messages(user_query: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": TRIAGE_SYSTEM_PROMPT},
         {"role": "user", "content": user_query}
     ]
-    
-    # First API call
-    response = client.chat.completions.create(
+
+
+def route_query(
+    user_query: str,
+    router: Optional[LocalRouter] = None,
+    threshold: Optional[float] = None,
+    llm_client=None
+) -> Optional[str]:
+    """Routing decision only: the local router when it is confident, else the LLM"""
+    label = router.route(user_query, threshold) if router is not None else None
+    if label is not None:
+        return label
+    response = (llm_client or client).chat.completions.create(
         model="gpt-4",
-        messages=messages,
+        messages=_triage_messages(user_query),
         tools=triage_tools
     )
+    tool_calls = response.choices[0].message.tool_calls
+    return TOOL_ROUTES.get(tool_calls[0].function.name) if tool_calls else None
+
+
+class RoutingPrinter(AgentHooks):
+    def on_tool_start(self, name: str, arguments: str):
+        print(f"🔀 Routing to: {name}")
+        print(f"📋 Arguments: {arguments}")
+
+
+# Specialist calls are validated by the registry; one routing round, then the answer
+tool_executor = ParallelToolExecutor(available_functions, parse_arguments=registry.parse_arguments)
+runtime = AgentRuntime(client, triage_tools, executor=tool_executor, max_tool_rounds=1, hooks=RoutingPrinter())
+
+
+def _runtime(llm_client=None) -> AgentRuntime:
+    if llm_client is None:
+        return runtime
+    return AgentRuntime(
+        llm_client, triage_tools, executor=tool_executor, max_tool_rounds=1,
+        hooks=runtime.hooks, tool_selector=runtime.tool_selector
+    )
+
+
+def triage_agent(user_query: str, router: Optional[LocalRouter] = None, llm_client=None) -> str:
+    """Triage agent that routes queries to appropriate specialists.
+
+    With a router, confidently classified queries skip the routing call and
+    only the final answer comes from the LLM.
+    """
+    agent = _runtime(llm_client)
+    messages = _triage_messages(user_query)
     
-    response_message = response.choices[0].message
-    
-    # Handle tool calls
-    if response_message.tool_calls:
-        for tool_call in response_message.tool_calls:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            print(f"🔀 Routing to: {function_name}")
-            print(f"📋 Arguments: {function_args}")
-            
-            # Execute the function
-            function_response = available_functions[function_name](**function_args)
-            
-            # Add to messages
-            messages.append(response_message)
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "name": function_name,
-                "content": function_response
-            })
-        
-        # Second API call
-        final_response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages
-        )
-        return final_response.choices[0].message.content
+    label = router.route(user_query) if router is not None else None
+    if label is None:
+        return agent.run(messages).content
     
-    return response_message.content
+    print(f"⚡ Routed locally: {label}")
+    tool_call = {
+        "id": "call_local_route",
+        "type": "function",
+        "function": {"name": ROUTE_TOOLS[label], "arguments": json.dumps(route_arguments(label, user_query))}
+    }
+    messages.append({"role": "assistant", "content": None, "tool_calls": [tool_call]})
+    agent.hooks.on_tool_start(tool_call["function"]["name"], tool_call["function"]["arguments"])
+    messages.extend(result.to_message() for result in tool_executor.execute([tool_call]))
+    return agent.run(messages, max_tool_rounds=0).content
 
 
-if __name__ == "__main__":
-    test_queries = [
-        "I was charged twice for my subscription",
-        "The app keeps crashing when I try to upload files",
-        "I want to upgrade to the enterprise plan",
-        "My data export is taking too long"
-    ]
-    
+def triage_batch(queries: Dict[str, str], runner: BatchRunner) -> Iterator[BatchResult[Dict]]:
+    """Route a backlog of queries through the Batch API.
+
+    Only the routing call is batched: its tool calls are executed locally
+    and their results returned, since backlog triage needs the routing,
+    not a chat reply. One result per query ID:
+    {"routes": [{"tool", "arguments", "result"}], "reply": text or None}.
+    """
+    requests = (
+        (query_id, {
+            "model": "gpt-4",
+            "messages": [
+                {"role": "system", "content": TRIAGE_SYSTEM_PROMPT},
+                {"role": "user", "content": query}
+            ],
+            "tools": triage_tools
+        })
+        for query_id, query in queries.items()
+    )
+    for result in runner.run(requests, message_of):
+        if not result.ok:
+            yield result
+            continue
+        try:
+            routes = [
+                {
+                    "tool": call["function"]["name"],
+                    "arguments": call["function"]["arguments"],
+                    "result": json.loads(registry.dispatch(call["function"]["name"], call["function"]["arguments"]))
+                }
+                for call in result.value.get("tool_calls") or []
+            ]
+        except (KeyError, ValueError) as e:  # unknown tool, or arguments failing validation: this query only
+            yield BatchResult(result.custom_id, error=f"{type(e).__name__}: {e}")
+            continue
+        yield BatchResult(result.custom_id, {"routes": routes, "reply": result.value.get("content")})
+
+
+# Shown by demo(); kept out of the local router's training data
+DEMO_QUERIES = [
+    "I was charged twice for my subscription",
+    "The app keeps crashing when I try to upload files",
+    "I want to upgrade to the enterprise plan",
+    "My data export is taking too long"
+]
+
+
+def demo():
     try:
-        for i, query in enumerate(test_queries, 1):
+        for i, query in enumerate(DEMO_QUERIES, 1):
             print(f"\n{'='*60}")
             print(f"Query {i}: {query}")
             print('='*60)
-            result = triage_agent(query)
+            result = triage_agent(query, router=get_router())
             print(f"\n✅ Final Response: {result}\n")
             
     except Exception as e:
         print(f"Error: {e}")
         print("Note: This example requires OPENAI_API_KEY.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Triage agent (run without arguments for a demo)")
+    parser.add_argument("--batch", metavar="QUERIES", help="Triage a file of queries (one per line) via the Batch API")
+    parser.add_argument("--workdir", default="triage_batch", help="Batch checkpoint directory")
+    parser.add_argument("--select-tools", type=int, metavar="K",
+                        help="Offer only the K specialists most similar to the query (plus create_ticket)")
+    args = parser.parse_args()
+
+    if args.select_tools is not None:
+        # Tool descriptions are embedded once; a miss falls back to every tool
+        runtime.tool_selector = ToolSelector(
+            triage_tools, embed=openai_embedder(client), top_k=args.select_tools, always_on=["create_ticket"]
+        )
+
+    if args.batch:
+        lines = Path(args.batch).read_text().splitlines()
+        queries = {f"query-{n}": line for n, line in enumerate(lines, 1) if line.strip()}
+        for result in triage_batch(queries, BatchRunner(client, args.workdir)):
+            print(json.dumps({"id": result.custom_id, "query": queries[result.custom_id],
+                              "triage": result.value, "error": result.error}))
+    else:
+        demo()
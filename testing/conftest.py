@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration.
+
+Makes the example directories (advanced/, use_cases/, ...) importable
+when running `pytest testing/` from the repository root.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,135 @@
+"""
+Testing the Async Agent Runtime
+
+Tests for the shared tool loop in advanced/agent_runtime.py, against the
+mock LLM client.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import openai
+import pytest
+
+from advanced.agent_runtime import AgentHooks, AgentRuntime
+from advanced.mock_llm import AsyncMockChatClient, MockChatClient, tool_call_message
+
+TOOLS = [{"type": "function", "function": {"name": name}} for name in ("slow_echo", "add")]
+
+
+def slow_echo(text: str) -> str:
+    time.sleep(0.2)
+    return json.dumps({"echo": text})
+
+
+def add(a: int, b: int) -> str:
+    return json.dumps({"sum": a + b})
+
+
+FUNCTIONS = {"slow_echo": slow_echo, "add": add}
+
+
+def two_tools_then_answer(request):
+    if request["messages"][-1]["role"] == "user":
+        return tool_call_message(("slow_echo", {"text": "a"}), ("slow_echo", {"text": "b"}), ("add", {"a": 1, "b": 2}))
+    return "done"
+
+
+def rate_limited(times: int):
+    """Responder that raises a 429 for the first `times` calls"""
+    calls = {"count": 0}
+
+    def responder(request):
+        calls["count"] += 1
+        if calls["count"] <= times:
+            response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+            raise openai.RateLimitError("slow down", response=response, body=None)
+        return "ok"
+    return responder
+
+
+class Recorder(AgentHooks):
+    def __init__(self):
+        self.events = []
+
+    def on_tool_start(self, name, arguments):
+        self.events.append(("tool", name))
+
+    def on_tool_end(self, result):
+        result.content = result.content.upper()
+
+    def on_retry(self, attempt, error, delay):
+        self.events.append(("retry", attempt))
+
+
+class TestAgentRuntime:
+    """Tests for AgentRuntime"""
+
+    def test_tool_round_then_answer_without_tools(self):
+        llm = MockChatClient(two_tools_then_answer, latency=0)
+        result = AgentRuntime(llm, TOOLS, FUNCTIONS, max_tool_rounds=1).run([{"role": "user", "content": "go"}])
+        assert result.content == "done"
+        assert (result.llm_calls, result.tool_calls, result.tool_rounds) == (2, 3, 1)
+        assert "tools" in llm.requests[0] and "tools" not in llm.requests[1]
+        tool_messages = [m for m in result.messages if isinstance(m, dict) and m["role"] == "tool"]
+        assert [json.loads(m["content"]) for m in tool_messages] == [{"echo": "a"}, {"echo": "b"}, {"sum": 3}]
+
+    def test_tool_calls_run_concurrently(self):
+        runtime = AgentRuntime(MockChatClient(two_tools_then_answer, latency=0), TOOLS, FUNCTIONS)
+        start = time.perf_counter()
+        runtime.run([{"role": "user", "content": "go"}])
+        assert time.perf_counter() - start < 0.35  # two 0.2 s tools
+
+    def test_rounds_are_bounded(self):
+        llm = MockChatClient(lambda request: tool_call_message(("add", {"a": 1, "b": 1})), latency=0)
+        result = AgentRuntime(llm, TOOLS, FUNCTIONS, max_tool_rounds=3, final_answer=False).run([])
+        assert result.stopped == "max_tool_rounds"
+        assert llm.call_count == 3
+
+    def test_retries_transient_errors(self):
+        hooks = Recorder()
+        runtime = AgentRuntime(MockChatClient(rate_limited(2), latency=0), backoff=0.001, hooks=hooks)
+        result = runtime.run([{"role": "user", "content": "hi"}])
+        assert result.content == "ok"
+        assert result.retries == 2
+        assert hooks.events == [("retry", 1), ("retry", 2)]
+
+    def test_gives_up_after_max_retries(self):
+        runtime = AgentRuntime(MockChatClient(rate_limited(5), latency=0), max_retries=2, backoff=0.001)
+        with pytest.raises(openai.RateLimitError):
+            runtime.run([{"role": "user", "content": "hi"}])
+
+    def test_overrides_and_hooks(self):
+        hooks = Recorder()
+        runtime = AgentRuntime(MockChatClient(two_tools_then_answer, latency=0), TOOLS, FUNCTIONS, hooks=hooks)
+        result = runtime.run([{"role": "user", "content": "go"}], functions={"slow_echo": lambda text: text})
+        tool_contents = [m["content"] for m in result.messages if isinstance(m, dict) and m["role"] == "tool"]
+        assert tool_contents == ["A", "B", '{"SUM": 3}']
+        assert hooks.events == [("tool", "slow_echo"), ("tool", "slow_echo"), ("tool", "add")]
+
+    @pytest.mark.parametrize("client_class", [MockChatClient, AsyncMockChatClient])
+    def test_streaming(self, client_class):
+        def responder(request):
+            if request["messages"][-1]["role"] == "user":
+                return tool_call_message(("add", {"a": 2, "b": 3}))
+            return "The sum is five, as computed by the add tool."
+
+        runtime = AgentRuntime(client_class(responder, latency=0), TOOLS, FUNCTIONS)
+
+        async def collect():
+            return [event async for event in runtime.stream([{"role": "user", "content": "2+3"}])]
+
+        events = asyncio.run(collect())
+        assert [e.type for e in events if e.type != "delta"] == ["tool_call", "tool_result", "done"]
+        assert "".join(e.data for e in events if e.type == "delta") == events[-1].data.content
+        assert events[1].data.content == json.dumps({"sum": 5})
+
+    def test_run_many_keeps_order(self):
+        llm = AsyncMockChatClient(lambda request: request["messages"][-1]["content"].upper(), latency=0.1)
+        runtime = AgentRuntime(llm)
+        start = time.perf_counter()
+        results = asyncio.run(runtime.run_many([[{"role": "user", "content": f"q{i}"}] for i in range(20)]))
+        assert [r.content for r in results] == [f"Q{i}" for i in range(20)]
+        assert time.perf_counter() - start < 1.0
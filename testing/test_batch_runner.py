@@ -0,0 +1,157 @@
+"""
+Testing the Batch API Runner
+
+Tests for submission, resumption and result parsing in
+advanced/batch_runner.py, against the local batch stand-in.
+"""
+
+import json
+import os
+
+import pytest
+from pydantic import BaseModel
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the triage agent builds a client at import
+
+from advanced.batch_runner import BatchRunner, LocalBatchClient, message_of, parse_model
+from advanced.mock_llm import MockChatClient, tool_call_message
+from openai_agents.triage_agent import triage_batch
+
+
+class Label(BaseModel):
+    label: str
+
+
+def label_responder(request):
+    text = request["messages"][-1]["content"]
+    if "fail" in text:
+        raise RuntimeError("model overloaded")
+    if "garbled" in text:
+        return "not json"
+    return json.dumps({"label": "even" if int(text.split()[-1]) % 2 == 0 else "odd"})
+
+
+def make_requests(count: int):
+    return [(f"req-{i}", {"model": "mock", "messages": [{"role": "user", "content": f"number {i}"}]}) for i in range(count)]
+
+
+class CountingServer(LocalBatchClient):
+    """Counts uploads and batch creations"""
+
+    def __init__(self, chat_client):
+        super().__init__(chat_client)
+        self.created = 0
+        create = self.batches.create
+
+        def counted_create(**kwargs):
+            self.created += 1
+            return create(**kwargs)
+
+        self.batches.create = counted_create
+
+
+def result_ids(workdir):
+    return [json.loads(line)["custom_id"] for line in (workdir / "results.jsonl").read_text().splitlines()]
+
+
+class TestBatchRunner:
+    """Tests for BatchRunner"""
+
+    def test_results_are_parsed_into_models(self, tmp_path):
+        server = LocalBatchClient(MockChatClient(label_responder, latency=0))
+        runner = BatchRunner(server, tmp_path, poll_interval=0.01)
+        results = {r.custom_id: r for r in runner.run(make_requests(10), parse_model(Label))}
+        assert len(results) == 10
+        assert results["req-3"].value == Label(label="odd")
+        assert all(r.ok for r in results.values())
+
+    def test_large_jobs_are_split(self, tmp_path):
+        server = CountingServer(MockChatClient(label_responder, latency=0))
+        runner = BatchRunner(server, tmp_path, poll_interval=0.01, max_requests_per_batch=4)
+        assert len(list(runner.run(make_requests(10), message_of))) == 10
+        assert server.created == 3
+
+    def test_interrupted_job_resumes_without_resubmitting(self, tmp_path):
+        server = CountingServer(MockChatClient(label_responder, latency=0))
+        first = BatchRunner(server, tmp_path, poll_interval=0.01, max_requests_per_batch=5)
+        next(first.run(make_requests(10), parse_model(Label)))
+
+        resumed = BatchRunner(server, tmp_path, poll_interval=0.01)
+        results = list(resumed.run(make_requests(10), parse_model(Label)))
+        assert sorted(r.custom_id for r in results) == sorted(f"req-{i}" for i in range(10))
+        assert server.created == 2
+        assert resumed.stats["submitted"] == 0
+        assert resumed.stats["replayed"] == 5
+
+    def test_failures_are_per_request(self, tmp_path):
+        server = LocalBatchClient(MockChatClient(label_responder, latency=0))
+        requests = make_requests(3) + [
+            ("bad-call", {"model": "mock", "messages": [{"role": "user", "content": "fail"}]}),
+            ("bad-json", {"model": "mock", "messages": [{"role": "user", "content": "garbled"}]})
+        ]
+        results = {r.custom_id: r for r in BatchRunner(server, tmp_path, poll_interval=0.01).run(requests, parse_model(Label))}
+        assert "model overloaded" in results["bad-call"].error
+        assert results["bad-json"].error.startswith("parse error")
+        assert results["req-0"].ok
+
+    def test_collected_results_are_not_duplicated_on_resume(self, tmp_path):
+        server = LocalBatchClient(MockChatClient(label_responder, latency=0))
+        list(BatchRunner(server, tmp_path, poll_interval=0.01, max_requests_per_batch=5).run(make_requests(10)))
+        # Crash after appending the results, before the batch was marked collected
+        state = json.loads((tmp_path / "state.json").read_text())
+        state["batches"][0]["status"] = "submitted"
+        (tmp_path / "state.json").write_text(json.dumps(state))
+
+        results = list(BatchRunner(server, tmp_path, poll_interval=0.01).run(make_requests(10)))
+        assert sorted(r.custom_id for r in results) == sorted(f"req-{i}" for i in range(10))
+        assert sorted(result_ids(tmp_path)) == sorted(f"req-{i}" for i in range(10))
+
+    def test_torn_result_line_is_dropped(self, tmp_path):
+        server = LocalBatchClient(MockChatClient(label_responder, latency=0))
+        list(BatchRunner(server, tmp_path, poll_interval=0.01, max_requests_per_batch=5).run(make_requests(10)))
+        state = json.loads((tmp_path / "state.json").read_text())
+        state["batches"][1]["status"] = "submitted"
+        (tmp_path / "state.json").write_text(json.dumps(state))
+        with open(tmp_path / "results.jsonl", "a") as f:
+            f.write('{"custom_id": "req-')
+
+        results = list(BatchRunner(server, tmp_path, poll_interval=0.01).run(make_requests(10)))
+        assert len(results) == 10
+        assert len(result_ids(tmp_path)) == 10
+
+    def test_created_batches_are_checkpointed_immediately(self, tmp_path):
+        server = CountingServer(MockChatClient(label_responder, latency=0))
+        create = server.batches.create
+
+        def create_once(**kwargs):
+            if server.created == 1:
+                raise ConnectionError("network down")
+            return create(**kwargs)
+
+        server.batches.create = create_once
+        with pytest.raises(ConnectionError):
+            list(BatchRunner(server, tmp_path, poll_interval=0.01, max_requests_per_batch=5).run(make_requests(10)))
+        state = json.loads((tmp_path / "state.json").read_text())
+        assert state["batches"][0]["batch_id"]
+        assert state["batches"][1]["input_file_id"] and "batch_id" not in state["batches"][1]
+
+        server.batches.create = create
+        assert len(list(BatchRunner(server, tmp_path, poll_interval=0.01).run(make_requests(10)))) == 10
+        assert server.created == 2
+
+
+def test_triage_batch_fails_bad_tool_calls_per_query(tmp_path):
+    def responder(request):
+        text = request["messages"][-1]["content"]
+        if text == "unknown tool":
+            return tool_call_message(("transfer_to_nobody", {}))
+        if text == "bad arguments":
+            return tool_call_message(("handle_billing", {"wrong": 1}))
+        return tool_call_message(("handle_billing", {"issue": text}))
+
+    server = LocalBatchClient(MockChatClient(responder, latency=0))
+    queries = {"q1": "charged twice", "q2": "unknown tool", "q3": "bad arguments"}
+    results = {r.custom_id: r for r in triage_batch(queries, BatchRunner(server, tmp_path, poll_interval=0.01))}
+    assert results["q1"].value["routes"][0]["tool"] == "handle_billing"
+    assert results["q2"].error.startswith("KeyError")
+    assert results["q3"].error.startswith("ValidationError")
@@ -0,0 +1,205 @@
+"""
+Testing Code Analysis
+
+Tests for AST chunking, unit hashing, diff parsing and static checks in
+use_cases/code_analysis.py.
+"""
+
+import pytest
+
+from use_cases.code_analysis import (
+    CodeChunk, analyze_file, changed_lines_for, code_units, diff_changed_lines, split_source, static_checks
+)
+
+
+def make_module(functions: int, body_lines: int = 8) -> str:
+    parts = ["import os\n\nLIMIT = 10\n"]
+    for i in range(functions):
+        body = "".join(f"    x{j} = {j}\n" for j in range(body_lines))
+        parts.append(f"\n\ndef func_{i}():\n{body}    return x0\n")
+    return "".join(parts)
+
+
+def assert_tiles(source: str, chunks):
+    """Chunks cover every line exactly once, in order, and match the source"""
+    lines = source.splitlines(keepends=True)
+    assert chunks[0].start_line == 1
+    assert chunks[-1].end_line == len(lines)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_line == previous.end_line + 1
+    for chunk in chunks:
+        assert chunk.source == "".join(lines[chunk.start_line - 1:chunk.end_line])
+
+
+class TestSplitSource:
+    """Tests for split_source"""
+
+    def test_small_file_is_one_chunk(self):
+        source = make_module(2)
+        chunks = split_source(source, max_lines=150)
+        assert len(chunks) == 1
+        assert chunks[0].source == source
+
+    def test_chunks_tile_the_file(self):
+        source = make_module(40)
+        chunks = split_source(source, max_lines=50)
+        assert len(chunks) > 1
+        assert all(chunk.num_lines <= 50 for chunk in chunks)
+        assert_tiles(source, chunks)
+
+    def test_functions_are_never_split(self):
+        source = make_module(40)
+        for chunk in split_source(source, max_lines=50)[1:]:
+            assert chunk.source.lstrip("\n").startswith("def func_")
+
+    def test_decorators_stay_with_their_function(self):
+        source = "import functools\n\n\n@functools.lru_cache()\ndef cached():\n    return 1\n\n\ndef other():\n    return 2\n"
+        chunks = split_source(source, max_lines=4)
+        assert_tiles(source, chunks)
+        assert any(c.source.lstrip("\n").startswith("@functools.lru_cache()\ndef cached") for c in chunks)
+
+    def test_large_class_is_split_by_method(self):
+        methods = "".join(f"\n    def method_{i}(self):\n" + "        y = 1\n" * 10 + "        return y\n" for i in range(10))
+        source = f"class Service:\n    limit = 3\n{methods}"
+        chunks = split_source(source, max_lines=30)
+        assert len(chunks) > 1
+        assert_tiles(source, chunks)
+        assert "Service.method_0" in chunks[0].name
+
+    def test_syntax_error_falls_back_to_windows(self):
+        source = "def broken(:\n" + "    pass\n" * 25
+        chunks = split_source(source, max_lines=10)
+        assert [c.num_lines for c in chunks] == [10, 10, 6]
+        assert_tiles(source, chunks)
+
+    def test_empty_source(self):
+        assert split_source("") == []
+
+
+class TestCodeChunk:
+    """Tests for mapping chunk lines back to the file"""
+
+    def test_to_file_line(self):
+        chunk = CodeChunk("func", 41, 50, "")
+        assert chunk.to_file_line(1) == 41
+        assert chunk.to_file_line(10) == 50
+
+    def test_out_of_range_lines_are_clamped(self):
+        chunk = CodeChunk("func", 41, 50, "")
+        assert chunk.to_file_line(0) == 41
+        assert chunk.to_file_line(99) == 50
+
+
+class TestCodeUnits:
+    """Tests for normalized-AST unit hashes"""
+
+    def hashes(self, source: str) -> dict:
+        return {chunk.name: unit_hash for chunk, unit_hash in code_units(source)}
+
+    def test_one_unit_per_function(self):
+        assert list(self.hashes(make_module(3))) == ["<module>", "func_0", "func_1", "func_2"]
+
+    def test_moving_and_reformatting_keeps_hashes(self):
+        source = make_module(3)
+        edited = "# new header comment\n\n" + source.replace("x0 = 0", "x0   =   0  # zero")
+        assert self.hashes(edited) == self.hashes(source)
+
+    def test_body_change_changes_only_that_hash(self):
+        source = make_module(3)
+        before, after = self.hashes(source), self.hashes(source.replace("def func_1():\n    x0 = 0", "def func_1():\n    x0 = 1"))
+        assert [name for name in before if before[name] != after[name]] == ["func_1"]
+
+    def test_identical_bodies_with_different_names_differ(self):
+        hashes = self.hashes("def a():\n    return 1\n\n\ndef b():\n    return 1\n")
+        assert hashes["a"] != hashes["b"]
+
+
+class TestDiffChangedLines:
+    """Tests for diff_changed_lines"""
+
+    DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,4 +1,5 @@
+ import os
++import sys
+ 
+ def main():
+-    return 1
++    return 2
+@@ -20,2 +21,0 @@
+-unused = 1
+-other = 2
+--- a/old.py
++++ /dev/null
+@@ -1 +0,0 @@
+-gone = True
+"""
+
+    def test_added_and_replaced_lines(self):
+        assert diff_changed_lines(self.DIFF)["app.py"] == {2, 5, 21}
+
+    def test_deleted_files_are_skipped(self):
+        assert list(diff_changed_lines(self.DIFF)) == ["app.py"]
+
+    def test_changed_lines_match_however_the_path_is_spelled(self, tmp_path, monkeypatch):
+        changed = diff_changed_lines(self.DIFF)
+        (tmp_path / "sub").mkdir()
+        monkeypatch.chdir(tmp_path)
+        for spelling in ("app.py", "./app.py", str(tmp_path / "app.py"), "sub/../app.py"):
+            assert changed_lines_for(changed, spelling) == {2, 5, 21}
+        assert changed_lines_for(changed, "other.py") == set()
+
+        monkeypatch.chdir(tmp_path / "sub")
+        assert changed_lines_for(changed, "../app.py", root="..") == {2, 5, 21}
+
+
+FLAGGED = """import sqlite3
+
+
+def clean(items):
+    return [item for item in items]
+
+
+def lookup(conn, user_id, items=[]):
+    query = f"SELECT * FROM users WHERE id = {user_id}"
+    for i in range(len(items)):
+        print(items[i])
+    try:
+        return conn.execute(query)
+    except:
+        return None
+"""
+
+
+class TestStaticChecks:
+    """Tests for static_checks and analyze_file"""
+
+    def test_finds_demo_patterns(self):
+        found = [(f.line_number, f.issue_type) for f in static_checks(FLAGGED)]
+        assert found == [
+            (8, "Mutable default"), (9, "SQL injection"), (10, "Unidiomatic loop"), (14, "Bare except")
+        ]
+
+    def test_ignores_safe_code(self):
+        safe = 'def f(conn, n, items=None):\n    conn.execute("SELECT 1 WHERE id = ?", (n,))\n    return f"total {n}"\n'
+        assert static_checks(safe) == []
+
+    def test_syntax_error_is_a_finding(self):
+        assert static_checks("def broken(:\n")[0].issue_type == "Syntax error"
+
+    def test_analyze_file_flags_only_units_with_findings(self, tmp_path):
+        path = tmp_path / "module.py"
+        path.write_text(FLAGGED)
+        analysis = analyze_file(str(path))
+        assert analysis.error is None
+        assert [unit.name for unit in analysis.flagged_units] == ["lookup"]
+        assert analysis.score == 10 + 3 + 3 + 1
+
+    def test_analyze_file_reports_unreadable_files(self, tmp_path):
+        analysis = analyze_file(str(tmp_path / "missing.py"))
+        assert analysis.error and not analysis.findings
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
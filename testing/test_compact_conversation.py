@@ -0,0 +1,64 @@
+"""
+Testing Compact Conversations
+
+Tests for advanced/compact_conversation.py.
+"""
+
+import pytest
+
+from advanced.compact_conversation import Conversation
+
+
+class TestConversation:
+    """Tests for Conversation"""
+
+    def test_projection_matches_message_dicts(self):
+        conversation = Conversation("You are helpful.")
+        conversation.add_user("Hi")
+        conversation.add_assistant("Hello!")
+        assert conversation.to_messages() == [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"}
+        ]
+
+    def test_projection_reuses_content_strings(self):
+        content = "".join(["long ", "message"])
+        conversation = Conversation()
+        conversation.add_user(content)
+        assert conversation.to_messages()[0]["content"] is content
+
+    def test_system_prompt_override_and_omission(self):
+        conversation = Conversation("base")
+        conversation.add_user("Hi")
+        assert conversation.to_messages("base + context")[0]["content"] == "base + context"
+        assert conversation.to_messages("")[0]["role"] == "user"
+
+    def test_identical_prompts_are_shared(self):
+        prompt = "You are a support agent. " * 4
+        first = Conversation(prompt.encode().decode())
+        second = Conversation(prompt.encode().decode())
+        assert first.system_prompt is second.system_prompt
+
+    def test_max_messages_keeps_most_recent(self):
+        conversation = Conversation(max_messages=3)
+        for i in range(5):
+            conversation.add_user(f"message {i}")
+        assert len(conversation) == 3
+        assert [content for _, content in conversation] == ["message 2", "message 3", "message 4"]
+
+    def test_unknown_role_rejected(self):
+        with pytest.raises(ValueError):
+            Conversation().append("narrator", "Once upon a time")
+
+    def test_tool_messages_are_not_stored(self):
+        # A projected tool message would lack its tool_call_id
+        with pytest.raises(ValueError):
+            Conversation().append("tool", '{"result": 42}')
+
+    def test_no_instance_dict(self):
+        assert not hasattr(Conversation(), "__dict__")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,70 @@
+"""
+Testing Tool Output Compaction
+
+Tests for advanced/context_compaction.py.
+"""
+
+import json
+
+from advanced.context_compaction import (
+    FETCH_TOOL_NAME, SideStore, ToolOutputCompactor, extract_search_results
+)
+
+
+def search_output(query: str = "ai agents") -> str:
+    results = [
+        {"title": f"Article {i}", "url": f"https://example.com/{i}", "snippet": "x" * 400, "content": "y" * 2000}
+        for i in range(5)
+    ]
+    return json.dumps({"query": query, "results": results})
+
+
+def tool_message(call_id: str, name: str, content: str) -> dict:
+    return {"role": "tool", "tool_call_id": call_id, "name": name, "content": content}
+
+
+class TestToolOutputCompactor:
+    """Tests for ToolOutputCompactor"""
+
+    def test_search_output_keeps_titles_and_urls(self):
+        extract = json.loads(extract_search_results(search_output()))
+        assert [r["url"] for r in extract["results"]] == [f"https://example.com/{i}" for i in range(5)]
+        assert all("content" not in r and len(r["snippet"]) <= 161 for r in extract["results"])
+
+    def test_compaction_replaces_content_and_keeps_payload(self):
+        compactor = ToolOutputCompactor({"web_search": extract_search_results})
+        original = search_output()
+        messages = [{"role": "user", "content": "research"}, tool_message("call_1", "web_search", original)]
+        saved = compactor.compact(messages)
+
+        assert saved > 0
+        assert len(messages[1]["content"]) < len(original) // 4
+        ref = SideStore.ref_for(original)
+        assert f'ref="{ref}"' in messages[1]["content"]
+        assert compactor.fetch(ref) == original
+
+    def test_each_message_is_compacted_once(self):
+        compactor = ToolOutputCompactor({"web_search": extract_search_results})
+        messages = [tool_message("call_1", "web_search", search_output())]
+        compactor.compact(messages)
+        compacted = messages[0]["content"]
+        assert compactor.compact(messages) == 0
+        assert messages[0]["content"] == compacted
+
+    def test_short_outputs_are_left_alone(self):
+        compactor = ToolOutputCompactor()
+        messages = [tool_message("call_1", "save_report", '{"saved": true}')]
+        assert compactor.compact(messages) == 0
+        assert messages[0]["content"] == '{"saved": true}'
+
+    def test_refetched_payload_compacts_like_the_original_tool(self):
+        compactor = ToolOutputCompactor({"web_search": extract_search_results})
+        original = search_output()
+        messages = [tool_message("call_1", "web_search", original)]
+        compactor.compact(messages)
+        messages.append(tool_message("call_2", FETCH_TOOL_NAME, compactor.fetch(SideStore.ref_for(original))))
+        compactor.compact(messages)
+        assert messages[1]["content"] == messages[0]["content"]
+
+    def test_unknown_ref(self):
+        assert "error" in json.loads(ToolOutputCompactor().fetch("missing"))
@@ -0,0 +1,155 @@
+"""
+Testing the Customer Support Bot
+
+Tests for the FAQ fast path and FAQ prefetching in
+use_cases/customer_support_bot.py, against the mock LLM client.
+"""
+
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the bot builds a client at import
+
+from advanced.mock_llm import MockChatClient, tool_call_message
+from use_cases import customer_support_bot
+from use_cases.customer_support_bot import (
+    CustomerSupportBot, FAQ_DATABASE, fast_path_threshold_for, faq_index, retrieve_faq, similar_queries
+)
+
+
+def support_responder(request):
+    """Look the question up, then answer"""
+    last = request["messages"][-1]
+    offered = {tool["function"]["name"] for tool in request.get("tools") or []}
+    if "search_faq" in offered and isinstance(last, dict) and last.get("role") == "user":
+        return tool_call_message(("search_faq", {"query": last["content"]}))
+    return "model answer"
+
+
+def rephrasing_responder(query):
+    """Calls search_faq with a fixed query instead of the user's words"""
+    def respond(request):
+        if request.get("tools") and request["messages"][-1]["role"] == "user":
+            return tool_call_message(("search_faq", {"query": query}))
+        return "model answer"
+    return respond
+
+
+class CountingRetriever:
+    def __init__(self):
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def __call__(self, query, k):
+        with self.lock:
+            self.queries.append(query)
+        return retrieve_faq(query, k)
+
+
+class SemanticStub:
+    """Stands in for EmbeddingFAQIndex: hits carry a raw cosine"""
+    fast_path_threshold = 0.9
+
+    def search(self, query, k=3):
+        return faq_index.search(query, k)
+
+
+class TestFastPath:
+    """Tests for answer_from_faq and the fast path in chat"""
+
+    def test_confident_query_makes_no_llm_call(self):
+        llm = MockChatClient(support_responder, latency=0)
+        bot = CustomerSupportBot(llm, fast_path_template="[{topic}] {answer}", prefetch=None)
+        answer = bot.chat("What's your refund policy?")
+        assert answer == f"[refund_policy] {FAQ_DATABASE['refund_policy']}"
+        assert llm.call_count == 0
+        assert bot.stats == {"fast_path": 1, "llm": 0, "prefetch_hits": 0}
+        assert list(bot.conversation)[-1] == ("assistant", answer)
+
+    def test_unconfident_query_goes_to_the_model(self):
+        llm = MockChatClient(support_responder, latency=0)
+        bot = CustomerSupportBot(llm, prefetch=None)
+        assert bot.chat("The app crashes every time I upload a photo") == "model answer"
+        assert llm.call_count == 2
+        assert bot.stats["llm"] == 1
+
+    def test_disabled_fast_path_always_calls_the_model(self):
+        llm = MockChatClient(support_responder, latency=0)
+        bot = CustomerSupportBot(llm, fast_path_threshold=None, prefetch=None)
+        assert bot.answer_from_faq("What's your refund policy?") is None
+        bot.chat("What's your refund policy?")
+        assert llm.call_count == 2
+
+    def test_threshold_follows_the_retriever(self, monkeypatch):
+        assert CustomerSupportBot(prefetch=None).fast_path_threshold == faq_index.fast_path_threshold
+        semantic = SemanticStub()
+        assert fast_path_threshold_for(semantic.search) == 0.9
+        assert CustomerSupportBot(prefetch=None, retriever=semantic.search).fast_path_threshold == 0.9
+        assert fast_path_threshold_for(lambda query, k: []) is None
+
+        monkeypatch.setattr(customer_support_bot, "faq_semantic_index", semantic)
+        assert CustomerSupportBot(prefetch=None).fast_path_threshold == 0.9
+
+
+class TestPrefetch:
+    """Tests for speculative and injected FAQ retrieval"""
+
+    def test_speculative_hits_are_reused(self):
+        retriever = CountingRetriever()
+        llm = MockChatClient(support_responder, latency=0)
+        bot = CustomerSupportBot(llm, fast_path_threshold=None, prefetch="speculative", retriever=retriever)
+        assert bot.chat("The app crashes every time I upload a photo") == "model answer"
+        assert retriever.queries == ["The app crashes every time I upload a photo"]
+        assert bot.stats["prefetch_hits"] == 1
+        tool_message = llm.requests[1]["messages"][-1]
+        assert tool_message["content"] == customer_support_bot.faq_result(
+            retrieve_faq("The app crashes every time I upload a photo", 3)
+        )
+
+    def test_dissimilar_query_searches_again(self):
+        retriever = CountingRetriever()
+        llm = MockChatClient(rephrasing_responder("express shipping times"), latency=0)
+        bot = CustomerSupportBot(llm, fast_path_threshold=None, prefetch="speculative", retriever=retriever)
+        bot.chat("Where is my order? It's been two weeks")
+        assert retriever.queries == ["Where is my order? It's been two weeks", "express shipping times"]
+        assert bot.stats["prefetch_hits"] == 0
+
+    def test_similar_queries_gate(self):
+        assert similar_queries("How do I cancel my subscription?", "cancel my subscription")
+        assert not similar_queries("How do I cancel my subscription?", "express shipping times")
+        assert not similar_queries("", "anything")
+
+    def test_inject_puts_hits_in_the_prompt_and_drops_search_faq(self):
+        llm = MockChatClient(support_responder, latency=0)
+        bot = CustomerSupportBot(llm, fast_path_threshold=None, prefetch="inject")
+        assert bot.chat("Can I get a refund? The product arrived damaged") == "model answer"
+        assert llm.call_count == 1
+        request = llm.requests[0]
+        assert "Relevant FAQ entries" in request["messages"][0]["content"]
+        assert f"- refund_policy: {FAQ_DATABASE['refund_policy']}" in request["messages"][0]["content"]
+        assert "search_faq" not in {tool["function"]["name"] for tool in request["tools"]}
+        assert request["messages"][0]["content"].startswith(bot.system_prompt)
+        assert "search_faq" not in bot.system_prompt
+
+    def test_tool_mode_prompt_mentions_search_faq(self):
+        bot = CustomerSupportBot(MockChatClient(support_responder, latency=0), fast_path_threshold=None, prefetch=None)
+        assert "Use search_faq" in bot.system_prompt
+
+    def test_defaults_inject_behind_the_fast_path(self):
+        llm = MockChatClient(support_responder, latency=0)
+        bot = CustomerSupportBot(llm)
+        bot.chat("What's your refund policy?")
+        bot.chat("Can I get a refund? The product arrived damaged and I am furious")
+        assert bot.stats["fast_path"] == 1
+        assert llm.call_count == 1
+        assert "Relevant FAQ entries" in llm.requests[0]["messages"][0]["content"]
+
+    def test_speculation_requires_the_fast_path_off(self):
+        with pytest.raises(ValueError, match="speculative"):
+            CustomerSupportBot(MockChatClient(support_responder, latency=0), prefetch="speculative")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Testing Semantic FAQ Retrieval
+
+Tests for top-k ordering, the query-embedding cache and the memory-mapped
+index files in use_cases/faq_embeddings.py.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from use_cases.faq_embeddings import OFFLINE_EMBEDDER, OPENAI_EMBEDDER, EmbeddingFAQIndex, build_index, offline_embedder
+from use_cases.faq_search import FAQEntry
+
+ENTRIES = [
+    FAQEntry("refund", "Refunds are issued within 5 business days.", "How do I get a refund?"),
+    FAQEntry("password", "Use the reset link on the login page.", "I forgot my password"),
+    FAQEntry("shipping", "Orders ship within 2 days.", "When will my order ship?"),
+    FAQEntry("cancel", "Cancel any time from the billing page.", "How do I cancel my subscription?")
+]
+
+
+class AxisEmbedder:
+    """Entry i embeds to axis i; a query "near i j" embeds to 2*e_i + e_j"""
+    def __init__(self, dim: int = len(ENTRIES)):
+        self.dim = dim
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls += 1
+        vectors = []
+        for text in texts:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            if text.startswith("near"):
+                first, second = (int(n) for n in text.split()[1:])
+                vector[first], vector[second] = 2.0, 1.0
+            else:
+                vector[[e.text for e in ENTRIES].index(text)] = 1.0
+            vectors.append(vector)
+        return vectors
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    return build_index(ENTRIES, AxisEmbedder(), tmp_path / "faq", embedder="axis", batch_size=3)
+
+
+class TestEmbeddingFAQIndex:
+    """Tests for build_index and EmbeddingFAQIndex"""
+
+    def test_top_k_is_ordered_by_similarity(self, prefix):
+        index = EmbeddingFAQIndex(prefix, embed=AxisEmbedder())
+        hits = index.search("near 2 0", k=2)
+        assert [hit.entry.id for hit in hits] == ["shipping", "refund"]
+        assert hits[0].score > hits[1].score
+        assert len(index.search("near 1 3", k=10)) == len(ENTRIES)
+
+    def test_mmap_round_trip(self, prefix):
+        index = EmbeddingFAQIndex(prefix, embed=AxisEmbedder(), embedder="axis")
+        assert isinstance(index.matrix, np.memmap)
+        assert len(index) == len(ENTRIES)
+        assert index.meta == {"embedder": "axis", "dim": len(ENTRIES)}
+        hit = index.search("near 3 1", k=1)[0]
+        assert hit.entry == ENTRIES[3]
+        assert hit.score == pytest.approx(2 / np.sqrt(5))
+
+    def test_query_cache_hits_and_eviction(self, prefix):
+        embed = AxisEmbedder()
+        index = EmbeddingFAQIndex(prefix, embed=embed, query_cache_size=2)
+        index.search("near 0 1")
+        index.search("  NEAR 0   1 ")  # same key once normalized
+        assert embed.calls == 1
+        index.search("near 1 2")
+        index.search("near 0 1")  # refresh
+        index.search("near 2 3")  # evicts "near 1 2"
+        index.search("near 0 1")
+        assert embed.calls == 3
+        index.search("near 1 2")
+        assert embed.calls == 4
+
+    def test_query_cache_is_thread_safe(self, prefix):
+        index = EmbeddingFAQIndex(prefix, embed=AxisEmbedder(), query_cache_size=3)
+        queries = [f"near {i % 4} {(i + 1) % 4}" for i in range(400)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda q: index.search(q, k=1)[0].entry.id, queries))
+        assert results == [ENTRIES[i % 4].id for i in range(400)]
+        assert len(index._query_cache) <= 3
+
+    def test_embedder_mismatch_is_refused(self, tmp_path):
+        prefix = build_index(ENTRIES, offline_embedder, tmp_path / "faq", embedder=OFFLINE_EMBEDDER)
+        with pytest.raises(ValueError, match="hashed"):
+            EmbeddingFAQIndex(prefix, embed=offline_embedder, embedder=OPENAI_EMBEDDER)
+
+    def test_query_dimension_mismatch_is_refused(self, prefix):
+        index = EmbeddingFAQIndex(prefix, embed=offline_embedder)
+        with pytest.raises(ValueError, match="dimensions"):
+            index.search("refund")
+
+    def test_empty_entry_list_is_refused(self, tmp_path):
+        with pytest.raises(ValueError, match="at least one"):
+            build_index([], AxisEmbedder(), tmp_path / "faq", embedder="axis")
+        assert not list(tmp_path.iterdir())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+"""
+Testing FAQ Search
+
+Tests for the BM25 FAQ index in use_cases/faq_search.py.
+"""
+
+import json
+
+import pytest
+
+from use_cases.faq_search import BM25Index, FAQEntry, FAQIndex, load_entries, tokenize
+
+
+FAQS = {
+    "refund_policy": "Refunds are available within 30 days of purchase. Contact support@example.com.",
+    "shipping": "Standard shipping takes 5-7 business days. Express shipping is 2-3 days.",
+    "account_issues": "To reset your password, click 'Forgot Password' on the login page.",
+    "pricing": "We offer Basic ($9/mo), Pro ($29/mo), and Enterprise (custom) plans.",
+    "cancel_subscription": "You can cancel anytime from your account settings. No cancellation fees."
+}
+
+
+@pytest.fixture
+def index():
+    return FAQIndex.from_dict(FAQS)
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("What is your Refund policy?") == ["refund", "policy"]
+    assert tokenize("refunds") == tokenize("refund")
+
+
+class TestBM25Search:
+    """Tests for ranked FAQ search"""
+
+    @pytest.mark.parametrize("query, topic", [
+        ("What's your refund policy?", "refund_policy"),
+        ("how long does express shipping take", "shipping"),
+        ("I forgot my password", "account_issues"),
+        ("how much is the Pro plan", "pricing"),
+        ("how do I cancel my subscription", "cancel_subscription")
+    ])
+    def test_top_hit(self, index, query, topic):
+        assert index.search(query)[0].entry.id == topic
+
+    def test_results_are_ranked(self, index):
+        hits = index.search("cancel account password", k=5)
+        scores = [hit.score for hit in hits]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_no_match(self, index):
+        assert index.search("quantum chromodynamics") == []
+
+    def test_rare_terms_outweigh_common_ones(self):
+        entries = [FAQEntry(f"common_{i}", "shipping update") for i in range(20)]
+        entries.append(FAQEntry("rare", "shipping customs declaration"))
+        assert BM25Index(entries).search("shipping customs")[0].entry.id == "rare"
+
+
+class TestLoadingAndReload:
+    """Tests for file loading and hot reload"""
+
+    def test_load_jsonl(self, tmp_path):
+        path = tmp_path / "faq.jsonl"
+        path.write_text("\n".join(
+            json.dumps({"id": f"faq_{i}", "question": f"question {i}", "answer": f"answer number {i}"})
+            for i in range(2000)
+        ))
+        entries = load_entries(path)
+        assert len(entries) == 2000
+        assert FAQIndex.from_file(path).search("question 1234")[0].entry.id == "faq_1234"
+
+    def test_hot_reload_swaps_index(self, tmp_path):
+        path = tmp_path / "faq.json"
+        path.write_text(json.dumps({"shipping": "Shipping takes 5 days."}))
+        index = FAQIndex.from_file(path)
+        assert index.search("warranty") == []
+
+        path.write_text(json.dumps({"shipping": "Shipping takes 5 days.", "warranty": "Two year warranty."}))
+        index.reload(background=True).join()
+        assert index.search("warranty")[0].entry.id == "warranty"
+        assert len(index) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
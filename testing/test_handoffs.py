@@ -0,0 +1,130 @@
+"""
+Testing Agent Handoffs
+
+Tests for in-process handoffs, cycle detection and local routing in
+openai_agents/handoff_demo.py, and for the conversation sessions in
+openai_agents/handoff_sessions.py, against the mock LLM client.
+"""
+
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the demo builds a client at import
+
+from advanced.mock_llm import MockChatClient, MockMessage, tool_call_message
+from openai_agents.handoff_demo import compiled_agents, run_multi_agent
+from openai_agents.handoff_sessions import HandoffChat, SessionStore
+
+
+def responder(request):
+    """Triage sends everything to sales; sales bounces "mixed" queries back"""
+    system = request["messages"][0]["content"]
+    query = [m for m in request["messages"] if isinstance(m, dict) and m["role"] == "user"][-1]["content"]
+    if system.startswith("You are a triage agent"):
+        return tool_call_message("transfer_to_sales")
+    if "mixed" in query and request.get("tools"):
+        return tool_call_message("transfer_to_triage")
+    return "sales answer"
+
+
+class FixedRouter:
+    def __init__(self, label):
+        self.label = label
+
+    def route(self, text, threshold=None):
+        return self.label
+
+
+class TestHandoffs:
+    """Tests for run_multi_agent"""
+
+    def test_handoff_carries_the_tool_call_forward(self):
+        llm = MockChatClient(responder, latency=0)
+        assert run_multi_agent("buy premium", llm_client=llm) == "sales answer"
+        assert llm.call_count == 2
+        sales_request = llm.requests[1]["messages"]
+        assert sales_request[0] == compiled_agents["sales_agent"].system_message
+        assert sales_request[2].tool_calls[0].function.name == "transfer_to_sales"
+        assert json.loads(sales_request[3]["content"])["status"] == "transferred"
+
+    def test_cycles_are_cut_off(self):
+        llm = MockChatClient(responder, latency=0)
+        assert run_multi_agent("mixed question", llm_client=llm) == "sales answer"
+        assert llm.call_count == 3
+        assert "tools" not in llm.requests[2] or llm.requests[2]["tools"] is None
+        assert json.loads(llm.requests[2]["messages"][-1]["content"])["status"] == "refused"
+
+    def test_router_skips_triage(self):
+        llm = MockChatClient(responder, latency=0)
+        assert run_multi_agent("buy premium", router=FixedRouter("sales"), llm_client=llm) == "sales answer"
+        assert llm.call_count == 1
+        assert llm.requests[0]["messages"][0]["content"].startswith("You are a sales agent")
+
+    def test_unrouted_labels_go_through_triage(self):
+        llm = MockChatClient(responder, latency=0)
+        run_multi_agent("refund me", router=FixedRouter("billing"), llm_client=llm)
+        assert llm.requests[0]["messages"][0]["content"].startswith("You are a triage agent")
+
+
+class TestHandoffSessions:
+    """Tests for SessionStore and HandoffChat"""
+
+    def test_follow_up_goes_straight_to_the_specialist(self):
+        llm = MockChatClient(responder, latency=0)
+        chat = HandoffChat(llm_client=llm)
+        chat.chat("c1", "buy premium")
+        assert llm.call_count == 2
+        chat.chat("c1", "and the annual plan?")
+        assert llm.call_count == 3
+        follow_up = llm.requests[-1]["messages"]
+        assert follow_up[0]["content"].startswith("You are a sales agent")
+        assert [m["role"] for m in follow_up[1:]] == ["user", "assistant", "user"]
+
+    def test_conversations_are_independent(self):
+        llm = MockChatClient(responder, latency=0)
+        chat = HandoffChat(llm_client=llm)
+        chat.chat("c1", "buy premium")
+        chat.chat("c2", "buy premium")
+        assert llm.call_count == 4
+
+    def test_lru_eviction_and_sqlite_reload(self, tmp_path):
+        store = SessionStore(max_sessions=2, path=tmp_path / "sessions.db")
+        chat = HandoffChat(store, llm_client=MockChatClient(responder, latency=0))
+        for conversation_id in ("a", "b", "c"):
+            chat.chat(conversation_id, "buy premium")
+        assert len(store) == 2
+        assert store.get("a").agent == "sales_agent"  # evicted, reloaded from SQLite
+
+        reopened = SessionStore(path=tmp_path / "sessions.db")
+        session = reopened.get("b")
+        assert session.agent == "sales_agent"
+        assert list(session.history) == [("user", "buy premium"), ("assistant", "sales answer")]
+
+    def test_empty_reply_is_stored_as_text(self, tmp_path):
+        def silent(request):
+            reply = responder(request)
+            return MockMessage(content=None) if reply == "sales answer" else reply
+
+        store = SessionStore(path=tmp_path / "sessions.db")
+        chat = HandoffChat(store, llm_client=MockChatClient(silent, latency=0))
+        assert chat.chat("c1", "buy premium") == ""
+        assert list(SessionStore(path=tmp_path / "sessions.db").get("c1").history) == [
+            ("user", "buy premium"), ("assistant", "")
+        ]
+        llm = MockChatClient(responder, latency=0)
+        HandoffChat(SessionStore(path=tmp_path / "sessions.db"), llm_client=llm).chat("c1", "and annual?")
+        assert all(m["content"] is not None for m in llm.requests[0]["messages"] if isinstance(m, dict))
+
+    def test_history_is_capped(self):
+        chat = HandoffChat(SessionStore(max_messages=4), llm_client=MockChatClient(responder, latency=0))
+        for i in range(5):
+            chat.chat("c1", f"buy {i}")
+        history = list(chat.store.get("c1").history)
+        assert len(history) == 4
+        assert history[0] == ("user", "buy 3")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
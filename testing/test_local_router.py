@@ -0,0 +1,75 @@
+"""
+Testing the Local Triage Router
+
+Tests for training, confidence thresholds and persistence in
+openai_agents/local_router.py.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from openai_agents.local_router import LocalRouter, dedupe_examples, load_examples, normalize_text
+
+EXAMPLES = [
+    ("I was charged twice this month", "billing"),
+    ("Please refund my last payment", "billing"),
+    ("My invoice has the wrong address", "billing"),
+    ("The app crashes when I log in", "technical"),
+    ("I get a 500 error from the API", "technical"),
+    ("Sync stopped working after the update", "technical"),
+    ("How much is the enterprise plan?", "sales"),
+    ("Can we get a demo for our team", "sales"),
+    ("Do you offer volume discounts?", "sales"),
+]
+
+
+@pytest.fixture(scope="module")
+def router():
+    texts, labels = zip(*EXAMPLES)
+    return LocalRouter(dim=1024).fit(texts, labels)
+
+
+class TestLocalRouter:
+    """Tests for LocalRouter"""
+
+    def test_learns_the_training_set(self, router):
+        assert [router.predict(text)[0] for text, _ in EXAMPLES] == [label for _, label in EXAMPLES]
+
+    def test_probabilities_cover_every_label(self, router):
+        probabilities = router.predict_proba("charged twice")
+        assert router.labels == ["billing", "sales", "technical"]
+        assert probabilities.sum() == pytest.approx(1.0)
+
+    def test_unconfident_queries_fall_back(self, router):
+        assert router.route("hello there", threshold=0.9) is None
+        assert router.route("refund my payment, I was charged twice", threshold=0.5) == "billing"
+
+    def test_save_and_load_round_trip(self, router, tmp_path):
+        path = tmp_path / "router.npz"
+        router.save(path)
+        loaded = LocalRouter.load(path)
+        assert loaded.labels == router.labels
+        assert loaded.threshold == router.threshold
+        assert np.allclose(loaded.predict_proba("app crashes"), router.predict_proba("app crashes"))
+
+    def test_bundled_examples_are_labelled(self):
+        labels = {label for _, label in load_examples()}
+        assert labels == {"billing", "technical", "sales", "ticket"}
+
+    def test_bundled_examples_are_unique_and_exclude_the_demo(self):
+        os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the triage agent builds a client at import
+        from openai_agents.triage_agent import DEMO_QUERIES
+
+        examples = load_examples()
+        texts = {normalize_text(text) for text, _ in examples}
+        assert len(texts) == len(examples)
+        assert not texts & {normalize_text(query) for query in DEMO_QUERIES}
+
+
+def test_dedupe_examples_keeps_the_first_and_drops_excluded():
+    examples = [
+        ("Refund me", "billing"), ("refund me!", "sales"), ("The app crashes", "technical"), ("Book a demo", "sales")
+    ]
+    assert dedupe_examples(examples, exclude=["book a demo."]) == [("Refund me", "billing"), ("The app crashes", "technical")]
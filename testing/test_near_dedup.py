@@ -0,0 +1,83 @@
+"""
+Testing Near-Duplicate Filtering
+
+Tests for MinHash/LSH deduplication in advanced/near_dedup.py.
+"""
+
+import json
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the research assistant builds a client at import
+
+from advanced.near_dedup import NearDuplicateFilter, dedup, shingles
+from use_cases.research_assistant import collapse_near_duplicates, dedup_search_output
+
+rng = random.Random(0)
+VOCABULARY = [f"w{i}" for i in range(3000)]
+
+
+def passage(words: int = 60) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=words))
+
+
+class TestNearDuplicateFilter:
+    """Tests for NearDuplicateFilter"""
+
+    def test_syndicated_copy_is_collapsed_with_its_source(self):
+        story = passage()
+        results = [
+            {"url": "https://a.example/story", "snippet": story},
+            {"url": "https://b.example/copy", "snippet": f"Reprinted from A: {story} Read more."},
+            {"url": "https://c.example/other", "snippet": passage()}
+        ]
+        kept = dedup(results, text=lambda r: r["snippet"], source=lambda r: r["url"])
+        assert [c.item["url"] for c in kept] == ["https://a.example/story", "https://c.example/other"]
+        assert kept[0].sources == ["https://a.example/story", "https://b.example/copy"]
+        assert kept[0].duplicates == 1
+
+    def test_distinct_texts_are_all_kept(self):
+        texts = [passage() for _ in range(200)]
+        assert len(dedup(texts)) == 200
+
+    def test_streaming_across_batches(self):
+        dedup_filter = NearDuplicateFilter()
+        first = [passage() for _ in range(5)]
+        assert len(dedup_filter.filter(first)) == 5
+        second = [first[2] + " (updated)", passage()]
+        kept = dedup_filter.filter(second)
+        assert [c.text for c in kept] == [second[1]]
+        assert len(dedup_filter) == 6
+
+    def test_threshold_controls_strictness(self):
+        base = passage(40)
+        words = base.split()
+        edited = " ".join(words[:35] + [passage(5)])  # ending rewritten, Jaccard ~0.77
+        assert len(dedup([base, edited], threshold=0.95)) == 2
+        assert len(dedup([base, edited], threshold=0.6)) == 1
+
+    def test_short_texts(self):
+        assert shingles("Refund policy") == ["refund policy"]
+        assert len(dedup(["Refund policy", "refund  POLICY!", "Shipping times"])) == 2
+
+    def test_texts_without_words_are_never_duplicates(self):
+        assert shingles("  ...  ") == []
+        results = [
+            {"url": "https://a.example/1", "snippet": ""},
+            {"url": "https://b.example/2", "snippet": ""},
+            {"url": "https://c.example/3", "snippet": None},
+            {"url": "https://d.example/4"}
+        ]
+        assert len(collapse_near_duplicates(results)) == 4
+
+        dedup_filter = NearDuplicateFilter()
+        output = json.loads(dedup_search_output(json.dumps({"results": results}), dedup_filter))
+        assert [r["url"] for r in output["results"]] == [r["url"] for r in results]
+        assert "near_duplicates" not in output
+        assert dedup_filter.add("", "https://e.example/5")[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+"""
+Testing Parallel Tool Execution
+
+Tests for the concurrent tool executor in advanced/parallel_tools.py.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from advanced.parallel_tools import ParallelToolExecutor, ToolLimits
+from advanced.tool_results import serialize_tool_result
+
+
+def make_call(call_id, name, **arguments):
+    """Build a tool call in the dict shape used by streaming responses"""
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)}
+    }
+
+
+def slow_echo(text: str, delay: float = 0.2) -> str:
+    time.sleep(delay)
+    return json.dumps({"echo": text})
+
+
+async def async_echo(text: str, delay: float = 0.2) -> str:
+    await asyncio.sleep(delay)
+    return json.dumps({"echo": text})
+
+
+@pytest.fixture
+def executor():
+    with ParallelToolExecutor({"slow_echo": slow_echo, "async_echo": async_echo}) as ex:
+        yield ex
+
+
+class TestParallelToolExecutor:
+    """Tests for ParallelToolExecutor"""
+
+    def test_runs_concurrently(self, executor):
+        calls = [make_call(f"call_{i}", "slow_echo", text=str(i)) for i in range(4)]
+        calls += [make_call(f"call_a{i}", "async_echo", text=str(i)) for i in range(4)]
+        start = time.perf_counter()
+        results = executor.execute(calls)
+        elapsed = time.perf_counter() - start
+
+        # 8 calls of 0.2s each: wall time tracks the slowest call, not the sum
+        assert elapsed < 0.8
+        assert all(r.ok for r in results)
+
+    def test_preserves_call_order(self, executor):
+        calls = [
+            make_call("first", "slow_echo", text="a", delay=0.3),
+            make_call("second", "async_echo", text="b", delay=0.0),
+            make_call("third", "slow_echo", text="c", delay=0.1)
+        ]
+        results = executor.execute(calls)
+        assert [r.tool_call_id for r in results] == ["first", "second", "third"]
+        assert [json.loads(r.content)["echo"] for r in results] == ["a", "b", "c"]
+
+    def test_per_tool_timeout(self):
+        limits = {"async_echo": ToolLimits(timeout=0.05)}
+        with ParallelToolExecutor({"async_echo": async_echo}, limits=limits) as ex:
+            [result] = ex.execute([make_call("call_1", "async_echo", text="x", delay=1.0)])
+        assert not result.ok
+        assert "timed out" in result.error
+        assert json.loads(result.to_message()["content"])["error"] == result.error
+
+    def test_concurrency_cap(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def tracked(n: int) -> int:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return n
+
+        limits = {"tracked": ToolLimits(max_concurrency=2)}
+        with ParallelToolExecutor({"tracked": tracked}, limits=limits) as ex:
+            results = ex.execute([make_call(str(i), "tracked", n=i) for i in range(6)])
+
+        assert [r.content for r in results] == list(range(6))
+        assert peak <= 2
+
+    def test_errors_are_reported_per_call(self, executor):
+        calls = [
+            make_call("ok", "slow_echo", text="fine", delay=0.0),
+            make_call("missing", "no_such_tool"),
+            {"id": "bad", "function": {"name": "slow_echo", "arguments": "{not json"}}
+        ]
+        ok, missing, bad = executor.execute(calls)
+        assert ok.ok
+        assert "Unknown tool" in missing.error
+        assert "Invalid arguments" in bad.error
+
+
+class TestToolMessages:
+    """Tests for serializing typed results at the message boundary"""
+
+    def test_typed_result_serialized_once(self):
+        @dataclass
+        class Weather:
+            location: str
+            temperature: float
+
+        with ParallelToolExecutor({"weather": lambda location: Weather(location, 22.5)}) as ex:
+            [result] = ex.execute([make_call("call_1", "weather", location="Tokyo")])
+
+        assert isinstance(result.content, Weather)
+        message = result.to_message()
+        assert message["role"] == "tool"
+        assert json.loads(message["content"]) == {"location": "Tokyo", "temperature": 22.5}
+
+    def test_string_results_pass_through(self):
+        assert serialize_tool_result('{"already": "json"}') == '{"already": "json"}'
+        assert json.loads(serialize_tool_result({"tags": {"a"}})) == {"tags": ["a"]}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+Testing Repository Review
+
+Tests for planning and per-file records in use_cases/repo_review.py, against
+the mock LLM client.
+"""
+
+import io
+import json
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the reviewer builds a client at import
+
+from advanced.mock_llm import MockChatClient
+from use_cases.code_review_benchmark import review_responder
+from use_cases.repo_review import analyze_repo, plan_reviews, review_cost, review_repo, review_units
+
+FLAGGED = 'def lookup(conn, user_id):\n    return conn.execute(f"SELECT * FROM users WHERE id = {user_id}")\n'
+CLEAN = "def add(a, b):\n    return a + b\n"
+
+
+def write_tree(root, files):
+    for name, source in files.items():
+        (root / name).write_text(source)
+    return str(root)
+
+
+def records(output):
+    return {os.path.basename(r["path"]): r for r in map(json.loads, output.getvalue().splitlines())}
+
+
+class TestPlanReviews:
+    """Tests for plan_reviews"""
+
+    def test_files_without_findings_are_ranked_last(self, tmp_path):
+        root = write_tree(tmp_path, {"a_clean.py": CLEAN, "b_flagged.py": FLAGGED, "c_empty.py": ""})
+        selected, over_budget = plan_reviews(analyze_repo(root, workers=1), token_budget=10**6)
+        assert [os.path.basename(a.path) for a in selected] == ["b_flagged.py", "a_clean.py"]
+        assert over_budget == []
+
+    def test_clean_files_are_reviewed_whole(self, tmp_path):
+        root = write_tree(tmp_path, {"clean.py": CLEAN})
+        analysis = analyze_repo(root, workers=1)[0]
+        assert analysis.flagged_units == []
+        assert [unit.source for unit in review_units(analysis)] == [CLEAN]
+
+    def test_budget_goes_to_flagged_files_first(self, tmp_path):
+        root = write_tree(tmp_path, {"a_clean.py": CLEAN, "b_flagged.py": FLAGGED})
+        analyses = analyze_repo(root, workers=1)
+        flagged = next(a for a in analyses if a.findings)
+        selected, over_budget = plan_reviews(analyses, token_budget=review_cost(flagged))
+        assert selected == [flagged]
+        assert [os.path.basename(a.path) for a in over_budget] == ["a_clean.py"]
+
+
+class TestReviewRepo:
+    """Tests for review_repo"""
+
+    def test_a_failed_unit_is_an_error_record(self, tmp_path):
+        root = write_tree(tmp_path, {"clean.py": CLEAN, "flagged.py": FLAGGED})
+
+        def responder(request):
+            if "SELECT" in request["messages"][-1]["content"]:
+                raise TimeoutError("review timed out")
+            return review_responder(request)
+
+        output = io.StringIO()
+        stats = review_repo(root, output, llm_client=MockChatClient(responder, latency=0), workers=1)
+        by_file = records(output)
+        assert by_file["flagged.py"]["status"] == "error"
+        assert "TimeoutError: review timed out" in by_file["flagged.py"]["error"]
+        assert by_file["clean.py"]["status"] == "reviewed"
+        assert stats["reviewed"] == 1
+        assert stats["failed"] == 1
@@ -0,0 +1,71 @@
+"""
+Testing the Report Store
+
+Tests for content addressing, streaming and the title index in use_cases/report_store.py.
+"""
+
+import pytest
+
+from use_cases.report_store import ReportStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReportStore(tmp_path / "reports")
+    yield store
+    store.close()
+
+
+def object_files(store):
+    return [p for p in store.objects.rglob("*") if p.is_file()]
+
+
+class TestReportStore:
+    """Tests for ReportStore"""
+
+    def test_round_trip_by_title_and_digest(self, store):
+        record = store.save("AI Agents", "# AI Agents\n\nFindings… ✓\n")
+        assert store.load("AI Agents") == "# AI Agents\n\nFindings… ✓\n"
+        assert store.load(record.digest) == "# AI Agents\n\nFindings… ✓\n"
+        assert record.stored_size > 0
+
+    def test_identical_content_is_stored_once(self, store):
+        first = store.save("Report", "same text " * 1000)
+        mtime = object_files(store)[0].stat().st_mtime_ns
+        second = store.save("Report (copy)", "same text " * 1000)
+        assert second.digest == first.digest
+        assert second.deduplicated
+        assert len(object_files(store)) == 1
+        assert object_files(store)[0].stat().st_mtime_ns == mtime
+
+    def test_colliding_titles_do_not_overwrite_content(self, store):
+        old = store.save("Weekly Report", "week 1")
+        new = store.save("weekly report", "week 2")
+        assert old.digest != new.digest
+        assert store.load(old.digest) == "week 1"
+        assert store.load("weekly report") == "week 2"
+
+    def test_streamed_save_matches_in_memory_save(self, store):
+        chunks = [f"section {i} " * 500 for i in range(50)]
+        streamed = store.save("Streamed", iter(chunks))
+        in_memory = store.save("In memory", "".join(chunks))
+        assert streamed.digest == in_memory.digest
+        assert in_memory.deduplicated
+        assert "".join(store.iter_text("Streamed", chunk_size=128)) == "".join(chunks)
+
+    def test_retitling_updates_index(self, store):
+        store.save("Draft", "v1")
+        store.save("Draft", "v2")
+        assert store.load("Draft") == "v2"
+        assert [r.title for r in store.list()] == ["Draft"]
+
+    def test_missing_report(self, store):
+        with pytest.raises(KeyError):
+            store.load("Nope")
+
+    def test_gzip_fallback(self, tmp_path):
+        store = ReportStore(tmp_path / "gz", use_zstd=False)
+        record = store.save("Report", "text " * 100)
+        assert object_files(store)[0].suffix == ".gz"
+        assert store.load(record.digest) == "text " * 100
+        store.close()
@@ -0,0 +1,146 @@
+"""
+Testing the Research Assistant
+
+Tests for use_cases/research_assistant.py: planner mode (URL
+normalization, result merging, concurrent search and the plan-search-
+synthesize flow) and the iterative loop's hooks, against the mock LLM
+client and the mock search transport.
+"""
+
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")  # the assistant builds a client at import
+
+from advanced.mock_llm import MockChatClient, MockFunction, MockMessage, MockToolCall
+from use_cases.research_assistant import (
+    ResearchAssistant, SearchClient, merge_results, mock_search_results, mock_search_transport, normalize_url
+)
+
+SUB_QUERIES = ["agent adoption", "agent tooling", "agent security"]
+
+
+def planner_responder(request):
+    """Plans SUB_QUERIES, then writes a report listing the sources it was given"""
+    if request.get("response_format"):
+        return json.dumps({"queries": SUB_QUERIES})
+    return "REPORT\n" + request["messages"][-1]["content"]
+
+
+def result(url, title="t", snippet="s"):
+    return {"title": title, "url": url, "snippet": snippet}
+
+
+class TestNormalizeUrl:
+    """Tests for normalize_url"""
+
+    def test_equivalent_urls_normalize_alike(self):
+        canonical = normalize_url("https://example.com/a")
+        for url in ("https://EXAMPLE.com/a/", " https://example.com/a#intro ", "HTTPS://example.com/a?utm_source=x"):
+            assert normalize_url(url) == canonical
+
+    def test_meaningful_query_params_are_kept(self):
+        assert normalize_url("https://example.com/a?id=1&utm_medium=mail") == "https://example.com/a?id=1"
+        assert normalize_url("https://example.com/a?id=1") != normalize_url("https://example.com/a?id=2")
+
+
+class TestMergeResults:
+    """Tests for merge_results"""
+
+    def test_ranks_are_interleaved(self):
+        merged = merge_results(
+            ["q1", "q2"],
+            [[result("https://a.example/1"), result("https://a.example/2")],
+             [result("https://b.example/1"), result("https://b.example/2"), result("https://b.example/3")]]
+        )
+        assert [r["url"] for r in merged] == [
+            "https://a.example/1", "https://b.example/1", "https://a.example/2",
+            "https://b.example/2", "https://b.example/3"
+        ]
+
+    def test_duplicate_urls_merge_and_record_their_queries(self):
+        merged = merge_results(
+            ["q1", "q2", "q3"],
+            [[result("https://a.example/x", title="first")],
+             [result("https://A.example/x/#top", title="second")],
+             [result("https://c.example/y")]]
+        )
+        assert len(merged) == 2
+        assert merged[0]["title"] == "first"
+        assert merged[0]["queries"] == ["q1", "q2"]
+        assert merged[1]["queries"] == ["q3"]
+
+    def test_empty_input(self):
+        assert merge_results([], []) == []
+        assert merge_results(["q1"], [[]]) == []
+
+
+class TestSearchClient:
+    """Tests for SearchClient.search_many"""
+
+    def test_a_failed_query_contributes_no_results(self):
+        async def handler(request):
+            query = request.url.params["q"]
+            if query == "broken":
+                return httpx.Response(500)
+            return httpx.Response(200, json={"results": mock_search_results(query, 2)})
+
+        async def run():
+            async with SearchClient(transport=httpx.MockTransport(handler)) as search:
+                return await search.search_many(["ok one", "broken", "ok two"], num_results=2)
+
+        results = asyncio.run(run())
+        assert [len(r) for r in results] == [2, 0, 2]
+        assert results[2] == mock_search_results("ok two", 2)
+
+
+class TestPlannerMode:
+    """Tests for research_planned"""
+
+    def test_plan_search_synthesize(self):
+        llm = MockChatClient(planner_responder, latency=0)
+        report = ResearchAssistant(llm).research_planned("AI agents", num_results=3)
+        assert llm.call_count == 2  # one plan, one synthesis
+        assert report.startswith("REPORT")
+        expected = merge_results(SUB_QUERIES, [mock_search_results(q, 3) for q in SUB_QUERIES])
+        for source in expected:
+            assert source["url"] in report
+
+    def test_shared_search_client_is_left_open(self):
+        llm = MockChatClient(planner_responder, latency=0)
+
+        async def run():
+            async with SearchClient(transport=mock_search_transport()) as search:
+                await ResearchAssistant(llm).research_planned_async("AI agents", search=search)
+                return await search.search("still open", 1)
+
+        assert len(asyncio.run(run())) == 1
+
+    def test_unusable_plan_falls_back_to_the_topic(self):
+        llm = MockChatClient(lambda request: "not json", latency=0)
+        assert ResearchAssistant(llm).plan("AI agents") == ["AI agents"]
+
+
+class TestIterativeLoop:
+    """Tests for research() and its hooks"""
+
+    def test_malformed_tool_arguments_do_not_abort_the_run(self, capsys):
+        def responder(request):
+            if request["messages"][-1]["role"] == "user":
+                truncated = MockFunction("web_search", '{"query": "agents"')
+                return MockMessage(tool_calls=[MockToolCall(truncated)])
+            return "# Report"
+
+        llm = MockChatClient(responder, latency=0)
+        assert ResearchAssistant(llm).research("AI agents") == "# Report"
+        assert '{"query": "agents"' in capsys.readouterr().out
+        tool_message = llm.requests[1]["messages"][-1]
+        assert tool_message["role"] == "tool"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,66 @@
+"""
+Testing Streaming Structured Outputs
+
+Tests for the incremental array scanner in advanced/streaming_json.py.
+"""
+
+import json
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from advanced.streaming_json import JSONArrayStream, stream_models
+
+
+class Item(BaseModel):
+    name: str
+    count: int
+
+
+DOCUMENT = {
+    "title": 'tricky "issues": [{ text',
+    "issues": [
+        {"name": "brace } and bracket ]", "count": 1, "nested": {"list": [1, {"deep": 'backslash \\ and quote " }'}]}},
+        {"name": "plain", "count": 2}
+    ],
+    "other": {"issues": [{"name": "not top level", "count": 3}]},
+    "summary": "done"
+}
+
+
+def feed_in_pieces(text: str, size: int, key: str = "issues") -> List:
+    scanner = JSONArrayStream(key)
+    elements = []
+    for start in range(0, len(text), size):
+        elements.extend(scanner.feed(text[start:start + size]))
+    return elements
+
+
+class TestJSONArrayStream:
+    """Tests for JSONArrayStream"""
+
+    @pytest.mark.parametrize("size", [1, 2, 5, 64, 10_000])
+    def test_any_chunking_gives_the_same_elements(self, size):
+        for text in (json.dumps(DOCUMENT), json.dumps(DOCUMENT, indent=2)):
+            assert feed_in_pieces(text, size) == DOCUMENT["issues"]
+
+    def test_elements_arrive_when_they_close(self):
+        text = json.dumps(DOCUMENT)
+        second_start = text.index('{"name": "plain"')
+        scanner = JSONArrayStream("issues")
+        assert scanner.feed(text[:second_start - 3]) == []  # first element still open
+        assert scanner.feed(text[second_start - 3:second_start]) == DOCUMENT["issues"][:1]
+        assert scanner.feed(text[second_start:]) == DOCUMENT["issues"][1:]
+
+    def test_missing_key_yields_nothing(self):
+        assert feed_in_pieces(json.dumps(DOCUMENT), 7, key="absent") == []
+
+
+class TestStreamModels:
+    """Tests for stream_models"""
+
+    def test_validates_and_skips_invalid_elements(self):
+        text = json.dumps({"items": [{"name": "a", "count": 1}, {"name": "b"}, {"name": "c", "count": "3"}]})
+        chunks = [text[i:i + 4] for i in range(0, len(text), 4)]
+        assert list(stream_models(chunks, "items", Item)) == [Item(name="a", count=1), Item(name="c", count=3)]
@@ -0,0 +1,126 @@
+"""
+Testing Map-Reduce Summarization
+
+Tests for chunking, reduction and caching in use_cases/summarizer.py.
+"""
+
+import sys
+import types
+
+import pytest
+
+from advanced.mock_llm import MockChatClient
+from advanced import tool_selector
+from advanced.tool_selector import count_tokens
+from use_cases.summarizer import MapReduceSummarizer, chunk_text, split_tokens
+
+
+def short_responder(request):
+    return "summary of " + str(len(request["messages"][-1]["content"]))
+
+
+def make_document(paragraphs: int, words: int = 100, tag: str = "doc") -> str:
+    return "\n\n".join(f"{tag} paragraph {p} " + "lorem ipsum " * (words // 2) for p in range(paragraphs))
+
+
+class TestChunking:
+    """Tests for chunk_text"""
+
+    def test_short_text_is_one_chunk(self):
+        assert chunk_text("A short paragraph.\n\nAnother one.", chunk_tokens=100) == [
+            "A short paragraph.\n\nAnother one."
+        ]
+
+    def test_chunks_respect_token_budget(self):
+        chunks = chunk_text(make_document(30), chunk_tokens=500)
+        assert len(chunks) > 1
+        assert all(len(chunk) // 4 <= 500 for chunk in chunks)
+
+    def test_oversized_paragraph_is_split(self):
+        chunks = chunk_text("word " * 5000, chunk_tokens=300)
+        assert len(chunks) > 1
+        assert sum(chunk.count("word") for chunk in chunks) == 5000
+
+    def test_split_falls_back_when_the_encoding_is_unavailable(self, monkeypatch):
+        def encoding_for_model(model):
+            raise ConnectionError("cannot download the BPE file")
+
+        monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(encoding_for_model=encoding_for_model))
+        tool_selector._encoding.cache_clear()
+        try:
+            pieces = split_tokens("word " * 1000, max_tokens=100)
+            assert all(count_tokens(piece) <= 100 for piece in pieces)
+            assert sum(piece.count("word") for piece in pieces) == 1000
+        finally:
+            tool_selector._encoding.cache_clear()
+
+
+class TestMapReduceSummarizer:
+    """Tests for MapReduceSummarizer"""
+
+    def test_short_text_makes_one_call(self, tmp_path):
+        llm = MockChatClient(short_responder, latency=0)
+        summarizer = MapReduceSummarizer(llm, cache_path=tmp_path / "cache.db")
+        summarizer.summarize("Just a sentence.")
+        assert llm.call_count == 1
+        assert "3 sentences" in llm.requests[0]["messages"][0]["content"]
+
+    def test_long_text_maps_then_reduces(self, tmp_path):
+        llm = MockChatClient(short_responder, latency=0)
+        summarizer = MapReduceSummarizer(llm, chunk_tokens=400, cache_path=tmp_path / "cache.db")
+        chunks = chunk_text(make_document(40), chunk_tokens=400)
+        summarizer.summarize(make_document(40))
+        assert llm.call_count == len(chunks) + 1
+
+    def test_reduce_is_hierarchical_when_summaries_overflow(self, tmp_path):
+        # Summaries a third of their input: only two fit in one reduce call
+        verbose = lambda request: "detail " * (len(request["messages"][-1]["content"]) // 21)
+        llm = MockChatClient(verbose, latency=0)
+        summarizer = MapReduceSummarizer(llm, chunk_tokens=400, cache_path=None)
+        summarizer.summarize(make_document(40))
+        levels = {m["messages"][0]["content"].split()[0] for m in llm.requests}
+        assert {"Summarize", "These"} <= levels
+
+    def test_oversized_summaries_are_split_to_fit(self):
+        def responder(request):
+            if request["messages"][0]["content"].startswith("Summarize"):
+                return "detail " * 300  # map summaries larger than a whole call
+            return "short"
+
+        llm = MockChatClient(responder, latency=0)
+        summarizer = MapReduceSummarizer(llm, chunk_tokens=400, cache_path=None)
+        summarizer.summarize(make_document(20))
+        assert all(count_tokens(request["messages"][-1]["content"]) <= 400 for request in llm.requests)
+
+    def test_summaries_that_never_shrink_raise(self):
+        llm = MockChatClient(lambda request: "detail " * 150, latency=0)
+        summarizer = MapReduceSummarizer(llm, chunk_tokens=400, cache_path=None)
+        with pytest.raises(RuntimeError, match="not shrinking"):
+            summarizer.summarize(make_document(40))
+
+    def test_overlapping_corpus_only_pays_for_new_chunks(self, tmp_path):
+        shared = [make_document(10, tag=f"shared{i}") for i in range(3)]
+        fresh = make_document(10, tag="fresh")
+        cache = tmp_path / "cache.db"
+
+        first = MapReduceSummarizer(MockChatClient(short_responder, latency=0), chunk_tokens=400, cache_path=cache)
+        first.summarize_documents(shared)
+
+        llm = MockChatClient(short_responder, latency=0)
+        second = MapReduceSummarizer(llm, chunk_tokens=400, cache_path=cache)
+        second.summarize_documents(shared + [fresh])
+        new_chunks = len(chunk_text(fresh, chunk_tokens=400))
+        assert second.stats["cache_hits"] == sum(len(chunk_text(d, chunk_tokens=400)) for d in shared)
+        assert llm.call_count == new_chunks + 1
+
+    def test_identical_document_is_free_the_second_time(self, tmp_path):
+        cache = tmp_path / "cache.db"
+        document = make_document(20)
+        MapReduceSummarizer(MockChatClient(short_responder, latency=0), chunk_tokens=400, cache_path=cache).summarize(document)
+        llm = MockChatClient(short_responder, latency=0)
+        MapReduceSummarizer(llm, chunk_tokens=400, cache_path=cache).summarize(document)
+        assert llm.call_count == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,181 @@
+"""
+Testing the Ticket Store
+
+Tests for IDs, write-behind flushing and durability in use_cases/ticket_store.py.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from use_cases.ticket_store import TicketStore, ticket_sequence
+
+
+@pytest.fixture(params=[".db", ".jsonl"])
+def store_path(request, tmp_path):
+    return tmp_path / f"tickets{request.param}"
+
+
+class TestTicketStore:
+    """Tests for TicketStore"""
+
+    def test_concurrent_ids_are_unique_and_monotonic(self, store_path):
+        def session(n):
+            return [ticket_sequence(store.create("technical", f"issue {n}.{i}").ticket_id) for i in range(100)]
+
+        with TicketStore(store_path) as store:
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                sessions = list(pool.map(session, range(16)))
+        all_ids = [seq for ids in sessions for seq in ids]
+        assert len(set(all_ids)) == 1600
+        assert all(ids == sorted(ids) for ids in sessions)
+
+    def test_close_flushes_everything(self, store_path):
+        store = TicketStore(store_path, flush_interval=10.0)
+        created = [store.create("billing", f"issue {i}", "high") for i in range(1200)]
+        store.close()
+
+        reopened = TicketStore(store_path)
+        assert reopened.backend.count() == 1200
+        assert reopened.get(created[-1].ticket_id) == created[-1]
+        reopened.close()
+
+    def test_pending_tickets_are_readable_before_flush(self, store_path):
+        with TicketStore(store_path, flush_interval=10.0, batch_size=10_000) as store:
+            ticket = store.create("technical", "login broken")
+            assert store.get(ticket.ticket_id) == ticket
+            assert store.flush(timeout=5)
+            assert store.pending == 0
+            assert store.backend.get(ticket.ticket_id) == ticket
+
+    def test_ids_continue_after_restart(self, store_path):
+        with TicketStore(store_path) as store:
+            first = store.create("sales", "quote").ticket_id
+        with TicketStore(store_path) as store:
+            second = store.create("sales", "another quote").ticket_id
+        assert ticket_sequence(second) > ticket_sequence(first)
+
+    def test_create_after_close_raises(self, store_path):
+        store = TicketStore(store_path)
+        store.close()
+        with pytest.raises(RuntimeError):
+            store.create("technical", "too late")
+
+    def test_ticket_serializes_to_json(self, store_path):
+        with TicketStore(store_path) as store:
+            ticket = store.create("technical", "crash on upload", "urgent")
+        data = json.loads(json.dumps(ticket.to_dict()))
+        assert data["priority"] == "urgent"
+        assert data["status"] == "open"
+
+
+    def test_stores_sharing_a_database_never_reuse_ids(self, tmp_path):
+        # Separate connections, as two processes would have
+        first = TicketStore(tmp_path / "tickets.db", id_block=10)
+        second = TicketStore(tmp_path / "tickets.db", id_block=10)
+        created = [store.create("technical", f"issue {i}") for i in range(35) for store in (first, second)]
+        first.close()
+        second.close()
+        assert len({t.ticket_id for t in created}) == 70
+
+        reopened = TicketStore(tmp_path / "tickets.db")
+        assert reopened.backend.count() == 70
+        assert all(reopened.get(t.ticket_id) == t for t in created)
+        reopened.close()
+
+
+class FailingBackend:
+    """Backend whose writes always fail, as on a full or read-only disk"""
+    def __init__(self, backend, error=sqlite3.OperationalError("disk I/O error")):
+        self.backend = backend
+        self.error = error
+        self.attempts = 0
+
+    def write_batch(self, tickets):
+        self.attempts += 1
+        raise self.error
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+class TestTicketStoreFailures:
+    """Tests for write failures and shutdown races"""
+
+    def test_persistent_write_errors_go_to_the_fallback_file(self, tmp_path):
+        store = TicketStore(tmp_path / "tickets.db", flush_interval=0.001, max_write_attempts=3)
+        store.backend = FailingBackend(store.backend)
+        created = [store.create("billing", f"issue {i}") for i in range(5)]
+        start = time.perf_counter()
+        store.close()
+        assert time.perf_counter() - start < 2
+        assert store.backend.attempts == 3
+        assert store.stats["fallback"] == 5 and store.pending == 0
+        lines = (tmp_path / "tickets.db.unwritten.jsonl").read_text().splitlines()
+        assert [json.loads(line)["ticket_id"] for line in lines] == [t.ticket_id for t in created]
+
+    def test_unexpected_write_errors_do_not_kill_the_writer(self, tmp_path):
+        store = TicketStore(tmp_path / "tickets.db", flush_interval=0.001, max_write_attempts=2)
+        store.backend = FailingBackend(store.backend, TypeError("Object of type bytes is not JSON serializable"))
+        store.create("billing", "first")
+        assert store.flush(timeout=2)
+        store.backend = store.backend.backend
+        second = store.create("billing", "second")
+        assert store.flush(timeout=2)
+        assert store.stats["fallback"] == 1
+        assert store.backend.get(second.ticket_id) == second
+        store.close()
+
+    def test_duplicate_ids_are_not_overwritten(self, tmp_path):
+        with TicketStore(tmp_path / "tickets.db", flush_interval=0.001, max_write_attempts=1) as store:
+            original = store.create("billing", "original")
+            store.flush()
+            store._next_seq = ticket_sequence(original.ticket_id)  # as if another process issued it too
+            clash = store.create("billing", "clash")
+            assert clash.ticket_id == original.ticket_id
+            store.flush()
+            assert store.backend.get(original.ticket_id).description == "original"
+            assert store.stats["fallback"] == 1
+
+    def test_create_racing_close_loses_nothing(self, store_path):
+        store = TicketStore(store_path, flush_interval=0.001)
+        accepted = []
+        start = threading.Event()
+
+        def session(n):
+            start.wait()
+            for i in range(200):
+                try:
+                    accepted.append(store.create("technical", f"issue {n}.{i}").ticket_id)
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=session, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        time.sleep(0.005)
+        store.close()
+        for thread in threads:
+            thread.join()
+
+        reopened = TicketStore(store_path)
+        assert reopened.backend.count() == len(set(accepted)) == len(accepted)
+        assert reopened.backend.get(max(accepted, key=ticket_sequence)) is not None
+        reopened.close()
+
+    def test_flush_after_close_returns_at_once(self, store_path):
+        store = TicketStore(store_path)
+        store.create("sales", "quote")
+        store.close()
+        start = time.perf_counter()
+        assert store.flush()
+        assert time.perf_counter() - start < 0.5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
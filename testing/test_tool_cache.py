@@ -0,0 +1,149 @@
+"""
+Testing Tool Result Caching
+
+Tests for TTL, normalization, coalescing and persistence in advanced/tool_cache.py.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from advanced.tool_cache import ToolCache, cached_tool
+
+
+class CountingTool:
+    """Mock weather tool that counts backend calls"""
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, location: str, unit: str = "celsius") -> str:
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return json.dumps({"location": location, "unit": unit})
+
+
+class TestToolCache:
+    """Tests for ToolCache"""
+
+    def test_normalized_arguments_share_an_entry(self):
+        tool = CountingTool()
+        cache = ToolCache(tool, normalize=["location"], name="weather")
+        cache.call("Tokyo")
+        cache.call("  tokyo ")
+        cache.call("TOKYO", unit="celsius")
+        assert tool.calls == 1
+        assert cache.stats.hits == 2
+
+    def test_tool_receives_normalized_arguments(self):
+        tool = CountingTool()
+        cache = ToolCache(tool, normalize=["location"], name="weather")
+        first = cache.call("Tokyo")
+        assert json.loads(first) == {"location": "tokyo", "unit": "celsius"}
+        assert cache.call(" TOKYO") == first
+
+    def test_unnormalized_arguments_stay_distinct(self):
+        tool = CountingTool()
+        cache = ToolCache(tool, normalize=["location"], name="weather")
+        cache.call("Tokyo", unit="celsius")
+        cache.call("Tokyo", unit="CELSIUS")
+        assert tool.calls == 2
+
+    def test_ttl_expiry(self):
+        tool = CountingTool()
+        cache = ToolCache(tool, ttl=0.05, name="weather")
+        cache.call("Tokyo")
+        time.sleep(0.1)
+        cache.call("Tokyo")
+        assert tool.calls == 2
+
+    def test_lru_eviction(self):
+        tool = CountingTool()
+        cache = ToolCache(tool, maxsize=2, name="weather")
+        cache.call("a")
+        cache.call("b")
+        cache.call("a")  # refresh a
+        cache.call("c")  # evicts b
+        cache.call("a")
+        cache.call("b")
+        assert tool.calls == 4
+
+    def test_concurrent_identical_calls_are_coalesced(self):
+        tool = CountingTool(delay=0.2)
+        cache = ToolCache(tool, name="weather")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.call("Tokyo"), range(8)))
+        assert tool.calls == 1
+        assert len(set(results)) == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.hit_rate == pytest.approx(7 / 8)
+
+    def test_errors_are_not_cached(self):
+        attempts = []
+
+        def flaky(x: int) -> int:
+            attempts.append(x)
+            if len(attempts) == 1:
+                raise RuntimeError("backend down")
+            return x
+
+        cache = ToolCache(flaky, name="flaky")
+        with pytest.raises(RuntimeError):
+            cache.call(1)
+        assert cache.call(1) == 1
+        assert len(attempts) == 2
+
+    def test_sqlite_persistence(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        first = CountingTool()
+        ToolCache(first, persist_path=db, name="weather").call("Tokyo")
+        second = CountingTool()
+        cache = ToolCache(second, persist_path=db, name="weather")
+        assert json.loads(cache.call("TOKYO"))["location"] == "tokyo"
+        assert second.calls == 0
+
+
+def test_cached_async_tool():
+    calls = []
+
+    @cached_tool(ttl=60)
+    async def lookup(symbol: str) -> str:
+        calls.append(symbol)
+        await asyncio.sleep(0.05)
+        return symbol.upper()
+
+    async def run():
+        return await asyncio.gather(*(lookup("aapl") for _ in range(5)), lookup("AAPL "))
+
+    assert asyncio.run(run()) == ["AAPL"] * 6
+    assert calls == ["aapl"]
+    assert lookup.cache.stats.coalesced == 5
+
+
+
+def test_async_calls_in_different_event_loops_do_not_share_futures():
+    started = threading.Barrier(2)
+
+    @cached_tool(ttl=60)
+    async def lookup(symbol: str) -> str:
+        await asyncio.sleep(0.1)
+        return symbol.upper()
+
+    async def run():
+        started.wait()
+        return await lookup("aapl")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda _: asyncio.run(run()), range(2)))
+    assert results == ["AAPL", "AAPL"]
+    assert lookup.cache.stats.coalesced == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,107 @@
+"""
+Testing the Tool Registry
+
+Tests for schema derivation and argument validation in advanced/tool_registry.py.
+"""
+
+import json
+from typing import Literal
+
+import pytest
+
+pydantic = pytest.importorskip("pydantic")
+
+from advanced.tool_registry import ToolRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+
+    @registry.tool
+    def get_weather(location: str, unit: Literal["celsius", "fahrenheit"] = "celsius") -> dict:
+        """Get the current weather
+
+        Args:
+            location: City name
+            unit: Temperature unit
+        """
+        return {"location": location, "unit": unit}
+
+    @registry.tool(description="Add two integers")
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    return registry
+
+
+class TestSchemaDerivation:
+    """Tests for schemas generated from signatures"""
+
+    def test_openai_tool_format(self, registry):
+        schema = registry["get_weather"].schema
+        assert schema["type"] == "function"
+        function = schema["function"]
+        assert function["name"] == "get_weather"
+        assert function["description"] == "Get the current weather"
+        params = function["parameters"]
+        assert params["required"] == ["location"]
+        assert params["properties"]["location"]["description"] == "City name"
+        assert params["properties"]["unit"]["enum"] == ["celsius", "fahrenheit"]
+        assert params["additionalProperties"] is False
+
+    def test_explicit_description(self, registry):
+        assert registry["add"].schema["function"]["description"] == "Add two integers"
+
+    def test_serialized_once(self, registry):
+        assert registry.tools is registry.tools
+        assert json.loads(registry.tools_json) == registry.tools
+
+    def test_strict_mode_requires_all_properties(self):
+        registry = ToolRegistry(strict=True)
+
+        @registry.tool
+        def search(query: str, limit: int = 5) -> list:
+            """Search"""
+            return [query] * limit
+
+        params = registry["search"].schema["function"]["parameters"]
+        assert registry["search"].schema["function"]["strict"] is True
+        assert params["required"] == ["query", "limit"]
+        # null means "use the function default"
+        assert registry.dispatch("search", '{"query": "q", "limit": null}') == ["q"] * 5
+
+
+class TestDispatch:
+    """Tests for validated dispatch"""
+
+    def test_coerces_arguments(self, registry):
+        assert registry.dispatch("add", '{"a": "2", "b": 3}') == 5
+
+    def test_fills_defaults(self, registry):
+        assert registry.dispatch("get_weather", '{"location": "Tokyo"}')["unit"] == "celsius"
+
+    def test_rejects_invalid_arguments(self, registry):
+        with pytest.raises(pydantic.ValidationError):
+            registry.dispatch("get_weather", '{"location": "Tokyo", "unit": "kelvin"}')
+        with pytest.raises(pydantic.ValidationError):
+            registry.dispatch("add", '{"a": 1, "b": 2, "c": 3}')
+
+    def test_pydantic_model_parameter(self):
+        class Order(pydantic.BaseModel):
+            sku: str
+            quantity: int = 1
+
+        registry = ToolRegistry()
+
+        @registry.tool
+        def place_order(order: Order) -> str:
+            """Place an order"""
+            return f"{order.quantity}x{order.sku}"
+
+        assert "sku" in registry["place_order"].schema["function"]["parameters"]["properties"]
+        assert registry.dispatch("place_order", '{"sku": "A1", "quantity": "2"}') == "2xA1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,123 @@
+"""
+Testing Tool Selection
+
+Tests for ranking, always-on tools, the vector cache and the full-catalog
+fallback in advanced/tool_selector.py, and for tool selection in the agent
+runtime.
+"""
+
+import sys
+import types
+
+from advanced import tool_selector
+from advanced.agent_runtime import AgentRuntime
+from advanced.mock_llm import MockChatClient, tool_call_message
+from advanced.tool_selector import FIXTURE_TOOLS, ToolSelector, count_tokens, hashed_embedder
+
+
+class CountingEmbedder:
+    """hashed_embedder that records how many texts it embedded"""
+    def __init__(self):
+        self.texts = 0
+
+    def __call__(self, texts):
+        self.texts += len(texts)
+        return hashed_embedder(texts)
+
+
+def names(tools):
+    return [t["function"]["name"] for t in tools]
+
+
+def offered_names(request):
+    return names(request.get("tools") or [])
+
+
+class TestToolSelector:
+    """Tests for ToolSelector"""
+
+    def test_rank_puts_the_matching_tool_first(self):
+        selector = ToolSelector(FIXTURE_TOOLS)
+        assert selector.rank("Please cancel my order 999")[0] == "cancel_order"
+        assert selector.rank("Book a flight from SFO to JFK next Friday")[0] == "book_flight"
+        assert sorted(selector.rank("anything")) == sorted(names(FIXTURE_TOOLS))
+
+    def test_select_adds_always_on_tools_in_catalog_order(self):
+        selector = ToolSelector(FIXTURE_TOOLS, top_k=1, always_on=["calculate"])
+        assert names(selector.select("Play some jazz music")) == ["calculate", "play_music"]
+
+    def test_top_k_zero_keeps_only_always_on_tools(self):
+        selector = ToolSelector(FIXTURE_TOOLS, top_k=5, always_on=["escalate_to_human"])
+        assert names(selector.select("Play some jazz music", top_k=0)) == ["escalate_to_human"]
+        assert len(selector.select("Play some jazz music")) == 6
+
+    def test_vector_cache_file(self, tmp_path):
+        cache = tmp_path / "vectors.json"
+        first = CountingEmbedder()
+        ToolSelector(FIXTURE_TOOLS, embed=first, cache_path=str(cache))
+        assert first.texts == len(FIXTURE_TOOLS)
+        assert cache.exists()
+
+        second = CountingEmbedder()
+        selector = ToolSelector(FIXTURE_TOOLS, embed=second, cache_path=str(cache))
+        assert second.texts == 0
+        selector.rank("Play some jazz music")
+        assert second.texts == 1  # only the query
+
+    def test_create_with_selection_falls_back_to_full_catalog(self):
+        selector = ToolSelector(FIXTURE_TOOLS, top_k=2)
+        llm = MockChatClient(lambda request: tool_call_message("calculate"), latency=0)
+        selector.create_with_selection(llm, [], "Play some jazz music", model="gpt-4")
+        assert llm.call_count == 2
+        assert "calculate" not in offered_names(llm.requests[0])
+        assert len(llm.requests[1]["tools"]) == len(FIXTURE_TOOLS)
+
+    def test_create_with_selection_keeps_a_hit(self):
+        selector = ToolSelector(FIXTURE_TOOLS, top_k=2)
+        llm = MockChatClient(lambda request: tool_call_message("play_music"), latency=0)
+        selector.create_with_selection(llm, [], "Play some jazz music", model="gpt-4")
+        assert llm.call_count == 1
+        assert len(llm.requests[0]["tools"]) == 2
+
+
+class TestRuntimeSelection:
+    """Tests for AgentRuntime(tool_selector=...)"""
+
+    def responder(self, wanted):
+        def respond(request):
+            if request["messages"][-1]["role"] == "user":
+                return tool_call_message(wanted)
+            return "done"
+        return respond
+
+    def runtime(self, llm):
+        functions = {name: (lambda **kwargs: "ok") for name in names(FIXTURE_TOOLS)}
+        selector = ToolSelector(FIXTURE_TOOLS, top_k=2)
+        return AgentRuntime(llm, FIXTURE_TOOLS, functions, max_tool_rounds=1, tool_selector=selector)
+
+    def test_offers_the_selected_subset(self):
+        llm = MockChatClient(self.responder("play_music"), latency=0)
+        result = self.runtime(llm).run([{"role": "user", "content": "Play some jazz music"}])
+        assert result.content == "done"
+        assert llm.call_count == 2
+        assert len(llm.requests[0]["tools"]) == 2
+
+    def test_miss_retries_with_every_tool(self):
+        llm = MockChatClient(self.responder("calculate"), latency=0)
+        result = self.runtime(llm).run([{"role": "user", "content": "Play some jazz music"}])
+        assert result.content == "done"
+        assert result.tool_calls == 1
+        assert llm.call_count == 3
+        assert len(llm.requests[1]["tools"]) == len(FIXTURE_TOOLS)
+
+
+def test_count_tokens_falls_back_when_the_encoding_is_unavailable(monkeypatch):
+    def encoding_for_model(model):
+        raise ConnectionError("cannot download the BPE file")
+
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(encoding_for_model=encoding_for_model))
+    tool_selector._encoding.cache_clear()
+    try:
+        assert count_tokens("x" * 40) == 10
+    finally:
+        tool_selector._encoding.cache_clear()
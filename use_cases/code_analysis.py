@@ -0,0 +1,330 @@
+"""
+Code Analysis Helpers
+
+Local, model-free analysis used by the code reviewer:
+- Splits Python source into chunks along function and class boundaries,
+  each a contiguous range of original lines (so issue line numbers can be
+  mapped back to the file)
+- Hashes each function, class or module-level block by its normalized AST,
+  so edits to comments, formatting or position do not count as changes
+- Finds the lines a unified diff touches
+- Cheap static checks (SQL built with f-strings, `range(len(...))` loops,
+  bare excepts, ...) used to rank files before any model call
+
+Kept free of API clients so it can run in worker processes.
+"""
+
+import ast
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from advanced.tool_selector import count_tokens
+
+_HUNK = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_SQL = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|CREATE|DROP)\b", re.IGNORECASE)
+
+SEVERITY_WEIGHTS = {"critical": 10, "warning": 3, "info": 1}
+
+
+@dataclass(frozen=True)
+class CodeChunk:
+    """A contiguous slice of a source file"""
+    name: str  # e.g. "process_user_data", "UserService.save", "<module>", or "a, b" when packed
+    start_line: int  # 1-based, inclusive, in the original file
+    end_line: int  # inclusive
+    source: str
+
+    @property
+    def num_lines(self) -> int:
+        return self.end_line - self.start_line + 1
+
+    def to_file_line(self, line: int) -> int:
+        """Map a 1-based line number within the chunk to the original file"""
+        return self.start_line + min(max(line, 1), self.num_lines) - 1
+
+
+def _node_start(node: ast.AST) -> int:
+    decorators = getattr(node, "decorator_list", [])
+    return min([node.lineno] + [d.lineno for d in decorators])
+
+
+# (name, start, end, what the unit's hash covers)
+Unit = Tuple[str, int, int, List[Union[ast.AST, str]]]
+
+
+def _units(tree: ast.Module, num_lines: int, max_lines: int) -> List[Unit]:
+    """Line ranges covering the file: one per top-level definition, with
+    oversized classes split into their header and methods, and runs of
+    other statements grouped as "<module>"."""
+    units: List[Unit] = []
+
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    for node in tree.body:
+        start, end = _node_start(node), node.end_lineno
+        if not isinstance(node, definitions):
+            if units and units[-1][0] == "<module>":
+                units[-1] = ("<module>", units[-1][1], end, units[-1][3] + [node])  # extend the current run
+            else:
+                units.append(("<module>", start, end, [node]))
+        elif isinstance(node, ast.ClassDef) and end - start + 1 > max_lines:
+            body_start = start
+            header: List[Union[ast.AST, str]] = [f"class {node.name}", *node.decorator_list, *node.bases, *node.keywords]
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    child_start = _node_start(child)
+                    if child_start > body_start:
+                        units.append((node.name, body_start, child_start - 1, header))
+                    units.append((f"{node.name}.{child.name}", child_start, child.end_lineno, [child]))
+                    body_start = child.end_lineno + 1
+                    header = [f"class {node.name} (cont.)"]
+                else:
+                    header = header + [child]
+            if body_start <= end:
+                units.append((node.name, body_start, end, header))
+        else:
+            units.append((node.name, start, end, [node]))
+
+    # Attach gaps (blank lines, comments) to the following unit so ranges tile the file
+    tiled, next_line = [], 1
+    for name, start, end, parts in units:
+        tiled.append((name, min(start, next_line), end, parts))
+        next_line = end + 1
+    if tiled and next_line <= num_lines:
+        name, start, _, parts = tiled[-1]
+        tiled[-1] = (name, start, num_lines, parts)
+    return tiled
+
+
+def _source_units(source: str, max_lines: int, tree: Optional[ast.Module] = None) -> Tuple[List[str], List[Unit]]:
+    lines = source.splitlines(keepends=True)
+    if not lines:
+        return lines, []
+    try:
+        units = _units(tree or ast.parse(source), len(lines), max_lines)
+    except SyntaxError:
+        units = []
+        for start in range(1, len(lines) + 1, max_lines):
+            end = min(start + max_lines - 1, len(lines))
+            units.append(("<lines>", start, end, ["".join(line.strip() + "\n" for line in lines[start - 1:end])]))
+    if not units:  # only comments / blank lines
+        units = [("<module>", 1, len(lines), [])]
+    return lines, units
+
+
+def _hash(parts: List[Union[ast.AST, str]]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        # ast.dump leaves out line/column attributes, so moving code keeps its hash
+        digest.update((ast.dump(part) if isinstance(part, ast.AST) else part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def split_source(source: str, max_lines: int = 150) -> List[CodeChunk]:
+    """Split Python source into reviewable chunks of about max_lines lines.
+
+    Adjacent small units are packed together; a single function longer than
+    max_lines stays whole. Unparseable source falls back to fixed windows.
+    """
+    lines, units = _source_units(source, max_lines)
+    if not units:
+        return []
+
+    chunks: List[CodeChunk] = []
+    names, start, end = [], None, None
+    for name, unit_start, unit_end, _ in units:
+        if start is not None and unit_end - start + 1 > max_lines:
+            chunks.append(CodeChunk(", ".join(dict.fromkeys(names)), start, end, "".join(lines[start - 1:end])))
+            names, start = [], None
+        if start is None:
+            start = unit_start
+        names.append(name)
+        end = unit_end
+    chunks.append(CodeChunk(", ".join(dict.fromkeys(names)), start, end, "".join(lines[start - 1:end])))
+    return chunks
+
+
+def code_units(source: str, max_lines: int = 150) -> List[Tuple[CodeChunk, str]]:
+    """The units split_source packs (functions, methods of large classes,
+    module-level blocks), unpacked, each with its normalized-AST hash"""
+    lines, units = _source_units(source, max_lines)
+    return [
+        (CodeChunk(name, start, end, "".join(lines[start - 1:end])), _hash([name] + parts))
+        for name, start, end, parts in units
+    ]
+
+
+def diff_changed_lines(diff: str) -> Dict[str, Set[int]]:
+    """New-file line numbers touched by each file in a unified diff.
+
+    A hunk that only deletes lines marks the line it sits at, so the
+    enclosing function still counts as changed.
+    """
+    changed: Dict[str, Set[int]] = {}
+    lines: Set[int] = set()
+    line_number = old_left = new_left = 0
+    for row in diff.splitlines():
+        if old_left > 0 or new_left > 0:  # inside a hunk
+            if row.startswith("+"):
+                lines.add(line_number)
+                line_number += 1
+                new_left -= 1
+            elif row.startswith("-"):
+                lines.add(line_number)  # the line now at the deletion point
+                old_left -= 1
+            elif not row.startswith("\\"):  # context ("\ No newline" lines are neither)
+                line_number += 1
+                old_left -= 1
+                new_left -= 1
+        elif row.startswith("+++ "):
+            path = row[4:].split("\t")[0]
+            path = path[2:] if path.startswith("b/") else path
+            lines = set() if path == "/dev/null" else changed.setdefault(path, set())
+        else:
+            match = _HUNK.match(row)
+            if match:
+                old_count, line_number, new_count = match.groups()
+                line_number = int(line_number)
+                old_left = int(old_count) if old_count is not None else 1
+                new_left = int(new_count) if new_count is not None else 1
+                if new_left == 0:  # pure deletion
+                    lines.add(max(line_number, 1))
+    return changed
+
+
+def changed_lines_for(changed: Dict[str, Set[int]], path: str, root: str = ".") -> Set[int]:
+    """Lines a diff touched in path; empty when the diff does not touch the
+    file, so nothing in it is new.
+
+    Diff paths (from diff_changed_lines) are relative to root, the
+    repository the diff was taken in; path is relative to the working
+    directory or absolute, so "./app.py" and "/abs/root/app.py" both match.
+    """
+    by_path = {os.path.realpath(os.path.join(root, diff_path)): lines for diff_path, lines in changed.items()}
+    return by_path.get(os.path.realpath(path), set())
+
+
+@dataclass(frozen=True)
+class StaticFinding:
+    """An issue found without a model"""
+    line_number: int
+    severity: str  # "critical" | "warning" | "info", as in CodeIssue
+    issue_type: str
+    description: str
+
+
+def _check_fstring(node: ast.JoinedStr) -> Optional[Tuple[str, str, str]]:
+    head = "".join(part.value for part in node.values if isinstance(part, ast.Constant))
+    if _SQL.match(head) and any(isinstance(part, ast.FormattedValue) for part in node.values):
+        return "critical", "SQL injection", "SQL built with an f-string; use query parameters"
+    return None
+
+
+def _check_call(node: ast.Call) -> Optional[Tuple[str, str, str]]:
+    func = node.func
+    if (isinstance(func, ast.Attribute) and func.attr == "format"
+            and isinstance(func.value, ast.Constant) and isinstance(func.value.value, str)
+            and _SQL.match(func.value.value)):
+        return "critical", "SQL injection", "SQL built with str.format; use query parameters"
+    if isinstance(func, ast.Name) and func.id in ("eval", "exec"):
+        return "critical", "Code injection", f"{func.id}() on dynamic input"
+    return None
+
+
+def _check_for(node: ast.For) -> Optional[Tuple[str, str, str]]:
+    it = node.iter
+    if (isinstance(it, ast.Call) and isinstance(it.func, ast.Name) and it.func.id == "range"
+            and len(it.args) == 1 and isinstance(it.args[0], ast.Call)
+            and isinstance(it.args[0].func, ast.Name) and it.args[0].func.id == "len"):
+        return "info", "Unidiomatic loop", "range(len(...)) loop; iterate directly or use enumerate()"
+    return None
+
+
+def _check_except(node: ast.ExceptHandler) -> Optional[Tuple[str, str, str]]:
+    if node.type is None:
+        return "warning", "Bare except", "Bare except also catches KeyboardInterrupt and SystemExit"
+    return None
+
+
+def _check_defaults(node: ast.FunctionDef) -> Optional[Tuple[str, str, str]]:
+    defaults = node.args.defaults + [d for d in node.args.kw_defaults if d is not None]
+    if any(isinstance(default, (ast.List, ast.Dict, ast.Set)) for default in defaults):
+        return "warning", "Mutable default", f"Mutable default argument in {node.name}()"
+    return None
+
+
+# Node type -> check; one ast.walk pass dispatches on exact type
+_CHECKS = {
+    ast.JoinedStr: _check_fstring,
+    ast.Call: _check_call,
+    ast.For: _check_for,
+    ast.ExceptHandler: _check_except,
+    ast.FunctionDef: _check_defaults,
+    ast.AsyncFunctionDef: _check_defaults
+}
+
+
+def _check_tree(tree: ast.Module) -> List[StaticFinding]:
+    findings = []
+    for node in ast.walk(tree):
+        check = _CHECKS.get(type(node))
+        if check is not None:
+            result = check(node)
+            if result is not None:
+                findings.append(StaticFinding(node.lineno, *result))
+    return sorted(findings, key=lambda finding: finding.line_number)
+
+
+def static_checks(source: str) -> List[StaticFinding]:
+    """Run the local checks; unparseable source yields one finding"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return [StaticFinding(e.lineno or 1, "critical", "Syntax error", str(e.msg))]
+    return _check_tree(tree)
+
+
+@dataclass
+class FileAnalysis:
+    """Local pre-pass result for one file"""
+    path: str
+    num_lines: int = 0
+    tokens: int = 0
+    findings: List[StaticFinding] = field(default_factory=list)
+    flagged_units: List[CodeChunk] = field(default_factory=list)  # units containing findings
+    error: Optional[str] = None
+
+    @property
+    def score(self) -> int:
+        return sum(SEVERITY_WEIGHTS[finding.severity] for finding in self.findings)
+
+    @property
+    def flagged_tokens(self) -> int:
+        return sum(count_tokens(unit.source) for unit in self.flagged_units)
+
+
+def analyze_file(path: str, max_unit_lines: int = 150) -> FileAnalysis:
+    """Parse, check and size one file (picklable, for process pools)"""
+    try:
+        source = Path(path).read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return FileAnalysis(path, error=str(e))
+    try:
+        tree = ast.parse(source)
+        findings = _check_tree(tree)
+    except SyntaxError as e:
+        tree, findings = None, [StaticFinding(e.lineno or 1, "critical", "Syntax error", str(e.msg))]
+    flagged = []
+    if findings:
+        lines = {finding.line_number for finding in findings}
+        source_lines, units = _source_units(source, max_unit_lines, tree)
+        flagged = [
+            CodeChunk(name, start, end, "".join(source_lines[start - 1:end]))
+            for name, start, end, _ in units
+            if any(start <= n <= end for n in lines)
+        ]
+    return FileAnalysis(path, len(source.splitlines()), count_tokens(source), findings, flagged)
@@ -0,0 +1,293 @@
+"""
+Code Reviewer Benchmarks
+
+Reviews a synthetic Python file with the code reviewer using the mock LLM
+server (advanced/mock_llm.py), so no API key or network access is needed:
+- chunked: one whole-file review call vs. AST chunks reviewed concurrently
+- incremental: re-review after a small edit, reusing cached unit reviews
+- repo: files/sec of the local pre-pass, and a budgeted repository review
+- streaming: time to the first issue vs. time to the full review
+- batch: a nightly review of many files, interactive vs. through the Batch API
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+# The reviewer module builds an OpenAI client at import; the mock replaces it for every call
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from advanced.batch_runner import BatchRunner, LocalBatchClient
+from advanced.mock_llm import MockChatClient, MockMessage
+from use_cases.code_reviewer import (
+    CodeIssue, CodeReview, IncrementalReviewer, analyze_code, batch_review, stream_review
+)
+from use_cases.repo_review import analyze_repo, review_repo
+
+_CODE_BLOCK = re.compile(r"```\w*\n(.*?)```", re.DOTALL)
+
+# (pattern, severity, issue type) the mock reviewer "notices"
+SUSPICIOUS = [
+    (re.compile(r'f"(SELECT|INSERT|UPDATE|DELETE) '), "critical", "SQL injection"),
+    (re.compile(r"range\(len\("), "info", "Unidiomatic loop"),
+    (re.compile(r"except:"), "warning", "Bare except")
+]
+
+
+def reviewed_code(request: Dict) -> str:
+    match = _CODE_BLOCK.search(request["messages"][-1]["content"])
+    return match.group(1) if match else ""
+
+
+def review_responder(request: Dict) -> MockMessage:
+    """Mock GPT-4 reviewer: flags suspicious lines, numbered within the code it was sent"""
+    issues = [
+        CodeIssue(
+            severity=severity,
+            line_number=number,
+            issue_type=issue_type,
+            description=f"{issue_type}: {line.strip()}",
+            suggestion="See the team style guide"
+        )
+        for number, line in enumerate(reviewed_code(request).splitlines(), 1)
+        for pattern, severity, issue_type in SUSPICIOUS
+        if pattern.search(line)
+    ]
+    review = CodeReview(
+        overall_score=max(0, 90 - 5 * len(issues)),
+        issues=issues,
+        strengths=["Consistent naming"],
+        summary=f"{len(issues)} issues found",
+        approved=not any(issue.severity == "critical" for issue in issues)
+    )
+    return MockMessage(content=review.model_dump_json(), parsed=review)
+
+
+def review_latency(request: Dict) -> float:
+    """Time to first token plus prefill and generation, both growing with the code sent"""
+    return 0.2 + 0.002 * len(reviewed_code(request).splitlines())
+
+
+def synthetic_module(num_functions: int = 80) -> str:
+    """A large module of small functions, some with issues, plus a class"""
+    parts = ['"""Synthetic service module"""\n\nimport sqlite3\n\nDB_PATH = "app.db"\n']
+    for i in range(num_functions):
+        body = [f"def handler_{i}(conn, user_id, items):", f'    """Handle request type {i}"""']
+        if i % 7 == 0:
+            body.append(f'    query = f"SELECT * FROM table_{i} WHERE id = {{user_id}}"')
+        else:
+            body.append(f'    query = "SELECT * FROM table_{i} WHERE id = ?"')
+        if i % 5 == 0:
+            body += ["    for j in range(len(items)):", "        print(items[j])"]
+        else:
+            body += ["    for item in items:", "        print(item)"]
+        body += ["    try:", "        return conn.execute(query).fetchall()"]
+        body += ["    except:" if i % 11 == 0 else "    except sqlite3.Error:", "        return []"]
+        parts.append("\n\n" + "\n".join(body) + "\n")
+    parts.append(
+        "\n\nclass Cache:\n    def __init__(self):\n        self.data = {}\n\n"
+        "    def get(self, key):\n        return self.data.get(key)\n"
+    )
+    return "".join(parts)
+
+
+def run_chunked_benchmark(num_functions: int = 80, max_chunk_lines: int = 150):
+    """Whole-file review vs. AST-chunked concurrent review of the same file"""
+    code = synthetic_module(num_functions)
+    print("=== Chunked Review Benchmark ===\n")
+    print(f"File: {len(code.splitlines())} lines, {num_functions} functions; "
+          f"mock LLM latency grows with lines sent\n")
+    print(f"{'Mode':<32} {'Calls':>6} {'Issues':>7} {'Score':>6} {'Wall time':>10}")
+
+    runs = [
+        ("whole file (one call)", 10 ** 9, 1),
+        (f"chunked ({max_chunk_lines} lines, 4 workers)", max_chunk_lines, 4)
+    ]
+    issue_lines = []
+    for name, chunk_lines, concurrency in runs:
+        client = MockChatClient(review_responder, latency=review_latency)
+        start = time.perf_counter()
+        review = analyze_code(code, llm_client=client, max_chunk_lines=chunk_lines, max_concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        issue_lines.append([(issue.line_number, issue.issue_type) for issue in review.issues])
+        print(f"{name:<32} {len(client.requests):>6} {len(review.issues):>7} "
+              f"{review.overall_score:>6} {elapsed:>9.2f}s")
+    print(f"\nSame issues at the same file lines: {issue_lines[0] == issue_lines[1]}")
+
+
+def run_incremental_benchmark(num_functions: int = 80):
+    """Full re-review vs. diff-only review with the per-unit cache, after a one-line edit"""
+    old_code = synthetic_module(num_functions)
+    # The edit: a new import at the top (shifts every line) and one changed function body
+    new_code = old_code.replace("import sqlite3\n", "import logging\nimport sqlite3\n", 1).replace(
+        '"SELECT * FROM table_3 WHERE id = ?"', 'f"SELECT * FROM table_3 WHERE id = {user_id}"'
+    )
+    print("=== Incremental Review Benchmark ===\n")
+    print(f"File: {len(new_code.splitlines())} lines; edit: one import added, one function changed\n")
+    print(f"{'Mode':<32} {'Calls':>6} {'Prompt tokens':>14} {'Issues':>7} {'Wall time':>10}")
+
+    full_client = MockChatClient(review_responder, latency=review_latency)
+    start = time.perf_counter()
+    full = analyze_code(new_code, llm_client=full_client)
+    elapsed = time.perf_counter() - start
+    print(f"{'full re-review':<32} {len(full_client.requests):>6} {full_client.prompt_tokens:>14,} "
+          f"{len(full.issues):>7} {elapsed:>9.2f}s")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # CI on the base branch has already reviewed (and cached) the old version
+        warmup = IncrementalReviewer(MockChatClient(review_responder, latency=0), f"{workdir}/cache.db")
+        warmup.review(old_code)
+        warmup.close()
+
+        client = MockChatClient(review_responder, latency=review_latency)
+        reviewer = IncrementalReviewer(client, f"{workdir}/cache.db")
+        start = time.perf_counter()
+        incremental = reviewer.review(new_code, old_code)
+        elapsed = time.perf_counter() - start
+        reviewer.close()
+    print(f"{'diff-only + unit cache':<32} {len(client.requests):>6} {client.prompt_tokens:>14,} "
+          f"{len(incremental.issues):>7} {elapsed:>9.2f}s")
+    print(f"\nUnits reviewed: {reviewer.stats['reviewed']}, reused from cache: {reviewer.stats['cached']}")
+    same = [(i.line_number, i.issue_type) for i in full.issues] == [
+        (i.line_number, i.issue_type) for i in incremental.issues
+    ]
+    print(f"Same issues at the same file lines: {same}")
+
+
+def clean_module(num_functions: int) -> str:
+    """synthetic_module with nothing for the pre-pass to flag"""
+    return (
+        synthetic_module(num_functions)
+        .replace('f"SELECT', '"SELECT').replace("{user_id}", "?")
+        .replace("range(len(items))", "items").replace("except:", "except sqlite3.Error:")
+    )
+
+
+def write_synthetic_repo(root: str, num_files: int, functions_per_file: int = 20):
+    """A package tree where every fourth file has one SQL injection and the rest are clean"""
+    clean = clean_module(functions_per_file)
+    for i in range(num_files):
+        package = Path(root, f"pkg{i % 10}")
+        package.mkdir(exist_ok=True)
+        code = clean
+        if i % 4 == 0:
+            table = f"table_{i % functions_per_file}"
+            code = clean.replace(f'"SELECT * FROM {table} WHERE id = ?"', f'f"SELECT * FROM {table} WHERE id = {{user_id}}"')
+        (package / f"module_{i}.py").write_text(code)
+
+
+def run_repo_benchmark(num_files: int = 400, token_budget: int = 5_000):
+    """Pre-pass throughput (in-process vs. process pool) and a budgeted review of the tree"""
+    print("=== Repository Review Benchmark ===\n")
+    with tempfile.TemporaryDirectory() as root:
+        write_synthetic_repo(root, num_files)
+        print(f"Tree: {num_files} files; {os.cpu_count()} CPU(s)\n")
+        for label, workers in (("pre-pass, in-process", 1), ("pre-pass, process pool", None)):
+            start = time.perf_counter()
+            analyses = analyze_repo(root, workers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<24} {len(analyses) / elapsed:>8,.0f} files/s")
+
+        client = MockChatClient(review_responder, latency=review_latency)
+        output = io.StringIO()
+        stats = review_repo(root, output, token_budget=token_budget, llm_client=client, max_concurrency=8)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+    issues = sum(len(r["review"]["issues"]) for r in records if r["review"])
+    print(f"\nBudget {token_budget:,} prompt tokens: {stats['flagged']} of {stats['files']} files flagged, "
+          f"{stats['reviewed']} reviewed, {stats['over_budget']} over budget")
+    print(f"Prompt tokens sent: {client.prompt_tokens:,} "
+          f"(the reviewed files in full: {stats['full_file_tokens']:,} tokens of code)")
+    print(f"Model calls: {len(client.requests)}, issues: {issues}, wall time {stats['seconds']:.2f}s")
+
+
+def run_streaming_benchmark(num_functions: int = 40, time_to_first_token: float = 0.2):
+    """Time to first issue and to the full review, blocking vs. streamed"""
+    code = synthetic_module(num_functions)
+    print("=== Streaming Review Benchmark ===\n")
+    print(f"File: {len(code.splitlines())} lines; mock LLM: {time_to_first_token * 1000:.0f} ms to first token, "
+          f"generation time grows with lines sent\n")
+    print(f"{'Mode':<32} {'First issue':>12} {'Full review':>12} {'Issues':>7}")
+
+    runs = [
+        ("parse, one call", False, 10 ** 9),
+        ("stream, one call", True, 10 ** 9),
+        ("parse, 150-line chunks", False, 150),
+        ("stream, 150-line chunks", True, 150)
+    ]
+    for name, streamed, chunk_lines in runs:
+        client = MockChatClient(review_responder, latency=review_latency, time_to_first_token=time_to_first_token)
+        start = time.perf_counter()
+        if streamed:
+            first_issue = None
+            for item in stream_review(code, llm_client=client, max_chunk_lines=chunk_lines):
+                if isinstance(item, CodeIssue) and first_issue is None:
+                    first_issue = time.perf_counter() - start
+            review = item
+        else:
+            review = analyze_code(code, llm_client=client, max_chunk_lines=chunk_lines)
+            first_issue = time.perf_counter() - start
+        full = time.perf_counter() - start
+        print(f"{name:<32} {first_issue:>11.2f}s {full:>11.2f}s {len(review.issues):>7}")
+
+
+# Illustrative list prices per 1M tokens; the Batch API bills half of each
+INPUT_PRICE, OUTPUT_PRICE, BATCH_DISCOUNT = 2.50, 10.00, 0.5
+
+
+def token_cost(client: MockChatClient, discount: float = 1.0) -> float:
+    prompt = sum(u.prompt_tokens for u in client.usage)
+    completion = sum(u.completion_tokens for u in client.usage)
+    return discount * (prompt * INPUT_PRICE + completion * OUTPUT_PRICE) / 1e6
+
+
+def run_batch_benchmark(num_files: int = 60):
+    """Interactive reviews vs. a checkpointed, interrupted and resumed batch job"""
+    files = {f"service_{i}.py": synthetic_module(8 + i % 5) for i in range(num_files)}
+    print("=== Batch Review Benchmark ===\n")
+    print(f"Nightly job: {num_files} files\n")
+
+    interactive = MockChatClient(review_responder, latency=0.05)
+    reviews = {path: analyze_code(code, llm_client=interactive) for path, code in files.items()}
+
+    chat = MockChatClient(review_responder, latency=0.05)
+    server = LocalBatchClient(chat)
+    with tempfile.TemporaryDirectory() as workdir:
+        # The first run is interrupted after the first file comes back...
+        next(batch_review(files, BatchRunner(server, workdir, poll_interval=0.05, max_requests_per_batch=20)))
+        # ...and the next one resumes from the checkpoint
+        runner = BatchRunner(server, workdir, poll_interval=0.05)
+        results = {result.custom_id: result for result in batch_review(files, runner)}
+
+    matches = sum(r.ok and r.value.issues == reviews[path].issues for path, r in results.items())
+    print(f"{'Mode':<24} {'Calls':>6} {'Tokens':>9} {'Cost':>9}")
+    for name, client, discount in (("interactive", interactive, 1.0), ("batch", chat, BATCH_DISCOUNT)):
+        tokens = sum(u.total_tokens for u in client.usage)
+        print(f"{name:<24} {len(client.requests):>6} {tokens:>9,} {'$%.4f' % token_cost(client, discount):>9}")
+    print(f"\nResumed run: {runner.stats['resumed']} batches picked up, {runner.stats['submitted']} resubmitted, "
+          f"{runner.stats['replayed']} results replayed from the checkpoint")
+    print(f"Files with the same issues as the interactive review: {matches}/{num_files}")
+
+
+BENCHMARKS = {
+    "chunked": run_chunked_benchmark,
+    "incremental": run_incremental_benchmark,
+    "repo": run_repo_benchmark,
+    "streaming": run_streaming_benchmark,
+    "batch": run_batch_benchmark
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmark", nargs="?", choices=sorted(BENCHMARKS), help="Run one benchmark (default: all)")
+    args = parser.parse_args()
+    for name, benchmark in BENCHMARKS.items():
+        if args.benchmark in (None, name):
+            benchmark()
+            print()
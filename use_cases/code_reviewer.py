@@ -6,12 +6,28 @@ An automated code review agent that:
 - Checks best practices
 - Provides improvement suggestions
 - Uses structured outputs for consistency
+- Reviews only changed functions, reusing cached results for the rest
+- Streams issues as they are generated
 """
 
 from openai import OpenAI
 from pydantic import BaseModel, Field
-from typing import List, Literal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Union
+from pathlib import Path
+import argparse
+import hashlib
 import json
+import os
+import queue
+import sqlite3
+import subprocess
+import sys
+import threading
+
+from advanced.batch_runner import BatchResult, BatchRunner, json_schema_format, parse_model
+from advanced.streaming_json import stream_models
+from use_cases.code_analysis import CodeChunk, changed_lines_for, code_units, diff_changed_lines, split_source
 
 client = OpenAI()
 
@@ -34,15 +50,7 @@ class CodeReview(BaseModel):
     approved: bool
 
 
-def analyze_code(code: str, language: str = "python") -> CodeReview:
-    """Analyze code and return structured review"""
-    
-    response = client.beta.chat.completions.parse(
-        model="gpt-4",
-        messages=[
-            {
-                "role": "system",
-                "content": """You are a senior software engineer conducting code reviews.
+REVIEW_PROMPT = """You are a senior software engineer conducting code reviews.
 
 Analyze code for:
 - Bugs and potential errors
@@ -52,18 +60,269 @@ Analyze code for:
 - Best practices
 
 Provide constructive feedback with specific suggestions."""
-            },
-            {
-                "role": "user",
-                "content": f"Review this {language} code:\n\n```{language}\n{code}\n```"
-            }
-        ],
+
+
+def _review_messages(user_content: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": REVIEW_PROMPT},
+        {"role": "user", "content": user_content}
+    ]
+
+
+def _chunk_prompt(chunk: CodeChunk, language: str) -> str:
+    return (
+        f"Review this {language} code ({chunk.name}, lines {chunk.start_line}-{chunk.end_line} "
+        f"of a larger file). Number lines from 1 at the first line of this snippet.\n\n"
+        f"```{language}\n{chunk.source}```"
+    )
+
+
+def review_request_body(user_content: str, model: str = "gpt-4") -> Dict:
+    """A review call as a plain JSON request body (for the Batch API)"""
+    return {
+        "model": model,
+        "messages": _review_messages(user_content),
+        "response_format": json_schema_format(CodeReview)
+    }
+
+
+def request_review(user_content: str, llm_client=None) -> CodeReview:
+    """One structured-output review call"""
+    response = (llm_client or client).beta.chat.completions.parse(
+        model="gpt-4",
+        messages=_review_messages(user_content),
         response_format=CodeReview
     )
-    
     return response.choices[0].message.parsed
 
 
+def stream_request_review(user_content: str, llm_client=None) -> Iterator[Union[CodeIssue, CodeReview]]:
+    """One streamed review call: each CodeIssue as soon as its JSON object
+    closes, then the complete CodeReview"""
+    with (llm_client or client).beta.chat.completions.stream(
+        model="gpt-4",
+        messages=_review_messages(user_content),
+        response_format=CodeReview
+    ) as stream:
+        deltas = (event.delta for event in stream if event.type == "content.delta")
+        yield from stream_models(deltas, "issues", CodeIssue)
+        review = stream.get_final_completion().choices[0].message.parsed
+    yield review
+
+
+def review_chunk(chunk: CodeChunk, language: str = "python", llm_client=None) -> CodeReview:
+    """Review one chunk; its issue line numbers are relative to the chunk"""
+    return request_review(_chunk_prompt(chunk, language), llm_client)
+
+
+def merge_reviews(chunks: List[CodeChunk], reviews: List[CodeReview]) -> CodeReview:
+    """Combine per-chunk reviews into one, in original file coordinates.
+
+    The score is the chunk scores weighted by chunk length.
+    """
+    issues = [
+        issue.model_copy(update={"line_number": chunk.to_file_line(issue.line_number)})
+        for chunk, review in zip(chunks, reviews)
+        for issue in review.issues
+    ]
+    issues.sort(key=lambda issue: issue.line_number)
+    total_lines = sum(chunk.num_lines for chunk in chunks)
+    score = round(sum(r.overall_score * c.num_lines for c, r in zip(chunks, reviews)) / total_lines)
+    return CodeReview(
+        overall_score=score,
+        issues=issues,
+        strengths=list(dict.fromkeys(s for review in reviews for s in review.strengths)),
+        summary="\n".join(f"{chunk.name}: {review.summary}" for chunk, review in zip(chunks, reviews)),
+        approved=all(r.approved for r in reviews) and not any(i.severity == "critical" for i in issues)
+    )
+
+
+def analyze_code(
+    code: str,
+    language: str = "python",
+    llm_client=None,
+    max_chunk_lines: int = 150,
+    max_concurrency: int = 4
+) -> CodeReview:
+    """Analyze code and return structured review.
+
+    Python files longer than max_chunk_lines are split along function and
+    class boundaries and the chunks are reviewed concurrently.
+    """
+    chunks = split_source(code, max_chunk_lines) if language == "python" else []
+    if len(chunks) <= 1:
+        return request_review(f"Review this {language} code:\n\n```{language}\n{code}\n```", llm_client)
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        reviews = list(pool.map(lambda chunk: review_chunk(chunk, language, llm_client), chunks))
+    return merge_reviews(chunks, reviews)
+
+
+def stream_review(
+    code: str,
+    language: str = "python",
+    llm_client=None,
+    max_chunk_lines: int = 150,
+    max_concurrency: int = 4
+) -> Iterator[Union[CodeIssue, CodeReview]]:
+    """Streaming analyze_code(): yields each CodeIssue (in file coordinates)
+    as soon as the model has written it, and the full CodeReview last.
+
+    Chunks of a large file stream concurrently, so issues arrive in
+    completion order rather than line order.
+    """
+    chunks = split_source(code, max_chunk_lines) if language == "python" else []
+    if len(chunks) <= 1:
+        yield from stream_request_review(f"Review this {language} code:\n\n```{language}\n{code}\n```", llm_client)
+        return
+
+    results: "queue.Queue" = queue.Queue()
+
+    def stream_chunk(index: int):
+        try:
+            for item in stream_request_review(_chunk_prompt(chunks[index], language), llm_client):
+                results.put((index, item))
+        except Exception as e:
+            results.put((index, e))
+
+    reviews: Dict[int, CodeReview] = {}
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for index in range(len(chunks)):
+            pool.submit(stream_chunk, index)
+        while len(reviews) < len(chunks):
+            index, item = results.get()
+            if isinstance(item, Exception):
+                raise item
+            if isinstance(item, CodeReview):
+                reviews[index] = item
+            else:
+                yield item.model_copy(update={"line_number": chunks[index].to_file_line(item.line_number)})
+    yield merge_reviews(chunks, [reviews[index] for index in range(len(chunks))])
+
+
+class ReviewCache:
+    """SQLite map of (prompt, model, language, unit hash) -> CodeReview JSON.
+
+    Issue line numbers are stored relative to the unit, so a cached review
+    stays valid wherever the unit moves in the file.
+    """
+
+    def __init__(self, path: Union[str, Path] = ".review_cache.db"):
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS reviews (key TEXT PRIMARY KEY, review TEXT)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, language: str, unit_hash: str) -> str:
+        digest = hashlib.sha256()
+        for part in (REVIEW_PROMPT, model, language, unit_hash):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[CodeReview]:
+        with self._lock:
+            row = self._db.execute("SELECT review FROM reviews WHERE key = ?", (key,)).fetchone()
+        return CodeReview.model_validate_json(row[0]) if row else None
+
+    def put(self, key: str, review: CodeReview):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO reviews VALUES (?, ?)", (key, review.model_dump_json()))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class IncrementalReviewer:
+    """Review only the functions a change touched.
+
+    The file is split into units (functions, methods of large classes,
+    module-level blocks) hashed by normalized AST. Units with a cached review
+    reuse it; the rest are reviewed only if they changed, as judged by the
+    old version of the file or the lines a diff touched.
+    """
+
+    def __init__(
+        self,
+        llm_client=None,
+        cache_path: Union[str, Path] = ".review_cache.db",
+        model: str = "gpt-4",
+        max_unit_lines: int = 150,
+        max_concurrency: int = 4
+    ):
+        self.client = llm_client
+        self.cache = ReviewCache(cache_path)
+        self.model = model
+        self.max_unit_lines = max_unit_lines
+        self.max_concurrency = max_concurrency
+        self.stats = {"reviewed": 0, "cached": 0, "unchanged": 0}
+
+    def review(
+        self,
+        code: str,
+        old_code: Optional[str] = None,
+        changed_lines: Optional[Iterable[int]] = None,
+        language: str = "python"
+    ) -> Optional[CodeReview]:
+        """Review the changed parts of `code`.
+
+        Args:
+            code: New version of the file
+            old_code: Previous version; units whose hash it also has are unchanged
+            changed_lines: Alternatively, file lines a diff touched
+            language: Only "python" is split; other files are one unit
+
+        Returns the merged review of changed and cached units (issue lines in
+        file coordinates), or None when nothing changed and nothing was cached.
+        """
+        units = code_units(code, self.max_unit_lines) if language == "python" else [
+            (CodeChunk("<file>", 1, max(len(code.splitlines()), 1), code), hashlib.sha256(code.encode()).hexdigest())
+        ]
+        old_hashes = {h for _, h in code_units(old_code, self.max_unit_lines)} if old_code is not None else None
+        touched = set(changed_lines) if changed_lines is not None else None
+
+        reviews: Dict[int, CodeReview] = {}
+        to_review = []
+        for index, (chunk, unit_hash) in enumerate(units):
+            cached = self.cache.get(ReviewCache.key(self.model, language, unit_hash))
+            if cached is not None:
+                reviews[index] = cached
+                self.stats["cached"] += 1
+            elif old_hashes is not None and unit_hash in old_hashes:
+                self.stats["unchanged"] += 1
+            elif touched is not None and not any(chunk.start_line <= n <= chunk.end_line for n in touched):
+                self.stats["unchanged"] += 1
+            else:
+                to_review.append(index)
+
+        def review_unit(index: int) -> CodeReview:
+            chunk, unit_hash = units[index]
+            review = review_chunk(chunk, language, self.client)
+            self.cache.put(ReviewCache.key(self.model, language, unit_hash), review)
+            return review
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for index, review in zip(to_review, pool.map(review_unit, to_review)):
+                reviews[index] = review
+        self.stats["reviewed"] += len(to_review)
+
+        if not reviews:
+            return None
+        order = sorted(reviews)
+        return merge_reviews([units[i][0] for i in order], [reviews[i] for i in order])
+
+    def close(self):
+        self.cache.close()
+
+
+def git_show(ref: str, path: str) -> Optional[str]:
+    """File contents at a git revision (None if it did not exist there)"""
+    result = subprocess.run(["git", "show", f"{ref}:./{path}"], capture_output=True, text=True)
+    return result.stdout if result.returncode == 0 else None
+
+
 def format_review(review: CodeReview) -> str:
     """Format review for display"""
     output = []
@@ -129,5 +388,93 @@ def process_user_data(data):
         print("Requires OPENAI_API_KEY and gpt-4 model access.")
 
 
+def batch_review(
+    files: Dict[str, str],
+    runner: BatchRunner,
+    language: str = "python",
+    max_chunk_lines: int = 150
+) -> Iterator[BatchResult[CodeReview]]:
+    """Review many files through the Batch API; one result per file path.
+
+    Large files are chunked as in analyze_code(); a file's review is yielded
+    once all of its chunks are back. Pass the same files when resuming.
+    """
+    plans = {path: split_source(code, max_chunk_lines) if language == "python" else [] for path, code in files.items()}
+
+    def requests():
+        for path, chunks in plans.items():
+            if len(chunks) <= 1:
+                code = files[path]
+                yield f"{path}#0", review_request_body(f"Review this {language} code:\n\n```{language}\n{code}\n```")
+            else:
+                for index, chunk in enumerate(chunks):
+                    yield f"{path}#{index}", review_request_body(_chunk_prompt(chunk, language))
+
+    parts: Dict[str, Dict[int, BatchResult]] = {path: {} for path in files}
+    for result in runner.run(requests(), parse_model(CodeReview)):
+        path, index = result.custom_id.rsplit("#", 1)
+        parts[path][int(index)] = result
+        chunks = plans[path]
+        if len(parts[path]) < max(len(chunks), 1):
+            continue
+        results = [parts[path][i] for i in sorted(parts[path])]
+        errors = [r.error for r in results if not r.ok]
+        if errors:
+            yield BatchResult(path, error="; ".join(errors))
+        elif len(results) == 1:
+            yield BatchResult(path, results[0].value)
+        else:
+            yield BatchResult(path, merge_reviews(chunks, [r.value for r in results]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review code (run without arguments for a demo)")
+    parser.add_argument("files", nargs="*", help="Python files to review")
+    parser.add_argument("--base", help="Review only what changed since this git revision")
+    parser.add_argument("--diff", help="Review only what this unified diff touches ('-' for stdin)")
+    parser.add_argument("--cache", default=os.environ.get("REVIEW_CACHE", ".review_cache.db"), help="Review cache file")
+    parser.add_argument("--stream", action="store_true", help="Print issues as soon as they are generated")
+    parser.add_argument("--batch", metavar="WORKDIR", help="Review the files through the Batch API, checkpointing in WORKDIR")
+    args = parser.parse_args()
+
+    if not args.files and not args.diff:
+        demo()
+        return
+    if args.batch:
+        files = {path: Path(path).read_text() for path in args.files}
+        for result in batch_review(files, BatchRunner(client, args.batch)):
+            print(f"{result.custom_id}\n{format_review(result.value) if result.ok else 'Failed: ' + result.error}\n")
+        return
+    if not args.base and not args.diff:
+        for path in args.files:
+            code = Path(path).read_text()
+            if not args.stream:
+                print(f"{path}\n{format_review(analyze_code(code))}")
+                continue
+            print(path)
+            for item in stream_review(code):
+                if isinstance(item, CodeIssue):
+                    print(f"  Line {item.line_number} [{item.severity}] {item.issue_type}: {item.description}", flush=True)
+                else:
+                    print(format_review(item))
+        return
+
+    changed = {}
+    if args.diff:
+        diff = sys.stdin.read() if args.diff == "-" else Path(args.diff).read_text()
+        changed = diff_changed_lines(diff)
+    files = args.files or [path for path in changed if path.endswith(".py") and Path(path).exists()]
+    reviewer = IncrementalReviewer(cache_path=args.cache)
+    for path in files:
+        code = Path(path).read_text()
+        old_code = git_show(args.base, path) if args.base else None
+        # A file the diff does not touch has nothing new to review
+        review = reviewer.review(code, old_code, changed_lines_for(changed, path) if args.diff else None)
+        print(f"{path}\n{format_review(review) if review else 'No changes to review'}\n")
+    print(f"Units reviewed: {reviewer.stats['reviewed']}, from cache: {reviewer.stats['cached']}, "
+          f"unchanged: {reviewer.stats['unchanged']}")
+    reviewer.close()
+
+
 if __name__ == "__main__":
-    demo()
+    main()
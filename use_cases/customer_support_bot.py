@@ -9,11 +9,20 @@ A production-ready customer support agent that:
 """
 
 from openai import OpenAI
-from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Literal, Optional, Union
 import json
-from datetime import datetime
+import os
+
+from advanced.agent_runtime import AgentRuntime
+from advanced.compact_conversation import Conversation
+from advanced.parallel_tools import ParallelToolExecutor
+from advanced.tool_registry import ToolRegistry
+from use_cases.faq_search import FAQHit, FAQIndex, tokenize
+from use_cases.ticket_store import get_ticket_store
 
 client = OpenAI()
+registry = ToolRegistry()
 
 
 # Mock knowledge base
@@ -26,32 +35,99 @@ FAQ_DATABASE = {
 }
 
 
-def search_faq(query: str) -> str:
-    """Search FAQ database (simplified RAG simulation)"""
-    query_lower = query.lower()
-    
-    for topic, answer in FAQ_DATABASE.items():
-        if topic.replace("_", " ") in query_lower or any(word in query_lower for word in topic.split("_")):
-            return json.dumps({"topic": topic, "answer": answer})
-    
-    return json.dumps({"topic": "not_found", "answer": "No matching FAQ found"})
+# Inverted index built once at load; set FAQ_PATH to load a JSON/JSONL FAQ file instead
+if os.environ.get("FAQ_PATH"):
+    faq_index = FAQIndex.from_file(os.environ["FAQ_PATH"])
+    faq_index.watch()  # hot reload when the file changes
+else:
+    faq_index = FAQIndex.from_dict(FAQ_DATABASE)
+
+# Optional semantic lookup: FAQ_EMBEDDINGS is a prefix built with `faq_embeddings.py build`
+faq_semantic_index = None
+if os.environ.get("FAQ_EMBEDDINGS"):
+    from advanced.tool_selector import openai_embedder
+    from use_cases.faq_embeddings import OPENAI_EMBEDDER, EmbeddingFAQIndex
+    faq_semantic_index = EmbeddingFAQIndex(
+        os.environ["FAQ_EMBEDDINGS"], embed=openai_embedder(client), embedder=OPENAI_EMBEDDER
+    )
+
+
+def active_faq_index():
+    """The semantic index if configured, else BM25"""
+    return faq_index if faq_semantic_index is None else faq_semantic_index
+
+
+def retrieve_faq(query: str, k: int = 3) -> List[FAQHit]:
+    """Ranked FAQ hits from the active index"""
+    return active_faq_index().search(query, k=k)
+
+
+def fast_path_threshold_for(retriever: Callable[[str, int], List[FAQHit]]) -> Optional[float]:
+    """The fast-path cut-off for a retriever's hit confidence.
+
+    BM25 confidence is an IDF share and semantic confidence a raw cosine, so
+    each index carries its own threshold. Other retrievers get one from a
+    fast_path_threshold attribute, or none (fast path off).
+    """
+    index = active_faq_index() if retriever is retrieve_faq else getattr(retriever, "__self__", retriever)
+    return getattr(index, "fast_path_threshold", None)
 
 
-def create_ticket(category: str, description: str, priority: str = "medium") -> str:
-    """Create a support ticket"""
-    ticket_id = f"TICKET-{int(datetime.now().timestamp())}"
+def similar_queries(a: str, b: str, threshold: float = 0.5) -> bool:
+    """Token-set Jaccard similarity, to reuse a prefetched search for a rephrased query"""
+    tokens_a, tokens_b = set(tokenize(a)), set(tokenize(b))
+    if not tokens_a or not tokens_b:
+        return False
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b) >= threshold
+
+
+def faq_result(hits: List[FAQHit]) -> str:
+    """search_faq tool output for a list of hits"""
+    if not hits:
+        return json.dumps({"topic": "not_found", "answer": "No matching FAQ found"})
+    
+    best = hits[0]
     return json.dumps({
-        "ticket_id": ticket_id,
-        "category": category,
-        "description": description,
-        "priority": priority,
-        "status": "open",
-        "created_at": datetime.now().isoformat()
+        "topic": best.entry.id,
+        "answer": best.entry.answer,
+        "related": [hit.to_dict() for hit in hits[1:]]
     })
 
 
+@registry.tool
+def search_faq(query: str) -> str:
+    """Search the FAQ database for answers to common questions
+
+    Args:
+        query: Search query
+    """
+    return faq_result(retrieve_faq(query, k=3))
+
+
+@registry.tool
+def create_ticket(
+    category: str,
+    description: str,
+    priority: Literal["low", "medium", "high", "urgent"] = "medium"
+) -> str:
+    """Create a support ticket for complex issues
+
+    Args:
+        category: Issue category
+        description: Detailed description
+        priority: Ticket priority
+    """
+    ticket = get_ticket_store().create(category, description, priority)
+    return json.dumps(ticket.to_dict())
+
+
+@registry.tool
 def escalate_to_human(reason: str) -> str:
-    """Escalate conversation to human agent"""
+    """Escalate to human agent for complex or sensitive issues
+
+    Args:
+        reason: Reason for escalation
+    """
     return json.dumps({
         "escalated": True,
         "reason": reason,
@@ -60,127 +136,147 @@ def escalate_to_human(reason: str) -> str:
     })
 
 
-# Tool definitions
-tools = [
-    {
-        "type": "function",
-        "function": {
-            "name": "search_faq",
-            "description": "Search the FAQ database for answers to common questions",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "Search query"}
-                },
-                "required": ["query"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "create_ticket",
-            "description": "Create a support ticket for complex issues",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "category": {"type": "string", "description": "Issue category"},
-                    "description": {"type": "string", "description": "Detailed description"},
-                    "priority": {"type": "string", "enum": ["low", "medium", "high", "urgent"]}
-                },
-                "required": ["category", "description"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "escalate_to_human",
-            "description": "Escalate to human agent for complex or sensitive issues",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "reason": {"type": "string", "description": "Reason for escalation"}
-                },
-                "required": ["reason"]
-            }
-        }
-    }
-]
-
-available_functions = {
-    "search_faq": search_faq,
-    "create_ticket": create_ticket,
-    "escalate_to_human": escalate_to_human
-}
+# Tool definitions, derived from the registered signatures
+tools = registry.tools
 
+available_functions = registry.functions
 
-class CustomerSupportBot:
-    """Customer support bot with context management"""
-    
-    def __init__(self):
-        self.conversation_history: List[Dict] = []
-        self.system_prompt = """You are a helpful customer support agent. 
+# Offered when FAQ results are injected into the prompt up front
+tools_without_faq = [t for t in tools if t["function"]["name"] != "search_faq"]
+
+# Tool calls are validated by the registry; shared by every bot
+tool_executor = ParallelToolExecutor(available_functions, parse_arguments=registry.parse_arguments)
+
+# Speculative FAQ lookups run here, overlapping the first completion call
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="faq-prefetch")
+
+
+SUPPORT_SYSTEM_PROMPT = """You are a helpful customer support agent. 
 
 Instructions:
 - Be friendly, professional, and empathetic
-- Use search_faq for common questions
+- {faq_instruction}
 - Create tickets for technical issues or bugs
 - Escalate to humans for billing disputes or complaints
 - Always provide clear, concise answers
 """
+
+# One prompt per FAQ mode: with prefetch="inject" the model has no search_faq
+# tool and reads the entries appended to the prompt instead
+FAQ_INSTRUCTIONS = {
+    "tool": "Use search_faq for common questions",
+    "inject": "Answer common questions from the relevant FAQ entries below, when there are any"
+}
+
+
+def support_system_prompt(prefetch: Optional[str]) -> str:
+    """The system prompt for a prefetch mode"""
+    mode = "inject" if prefetch == "inject" else "tool"
+    return SUPPORT_SYSTEM_PROMPT.format(faq_instruction=FAQ_INSTRUCTIONS[mode])
+
+
+class CustomerSupportBot:
+    """Customer support bot with context management"""
+    
+    def __init__(
+        self,
+        llm_client=None,
+        fast_path_threshold: Union[float, Literal["auto"], None] = "auto",
+        fast_path_template: str = "{answer}\n\nIs there anything else I can help you with?",
+        prefetch: Optional[Literal["speculative", "inject"]] = "inject",
+        retriever: Callable[[str, int], List[FAQHit]] = retrieve_faq
+    ):
+        """
+        Args:
+            llm_client: OpenAI-compatible client (defaults to the module client)
+            fast_path_threshold: FAQ confidence at or above which the bot answers
+                straight from the FAQ without calling the model; "auto" uses the
+                retriever's own (see fast_path_threshold_for), None disables it
+            fast_path_template: Format string for fast-path answers ({answer}, {topic})
+            prefetch: "inject" puts the top results of the lookup in the prompt,
+                skipping the search_faq round trip; "speculative" starts the lookup
+                alongside the first completion call and reuses it when the model
+                calls search_faq with a similar query; None disables both.
+                The fast path has to see the lookup before deciding whether to
+                call the model, so "speculative" requires the fast path off.
+            retriever: FAQ lookup, (query, k) -> hits
+        """
+        self.client = llm_client or client
+        if fast_path_threshold == "auto":
+            fast_path_threshold = fast_path_threshold_for(retriever)
+        if prefetch == "speculative" and fast_path_threshold is not None:
+            raise ValueError(
+                'prefetch="speculative" cannot overlap the model call when the fast path is on; '
+                'use prefetch="inject" or fast_path_threshold=None'
+            )
+        self.fast_path_threshold = fast_path_threshold
+        self.fast_path_template = fast_path_template
+        self.prefetch = prefetch
+        self.retriever = retriever
+        self.stats = {"fast_path": 0, "llm": 0, "prefetch_hits": 0}
+        self.runtime = AgentRuntime(self.client, tools, executor=tool_executor, max_tool_rounds=1)
+        self.conversation = Conversation(support_system_prompt(prefetch))  # prompt shared by every session
+    
+    @property
+    def system_prompt(self) -> str:
+        return self.conversation.system_prompt
+    
+    def answer_from_faq(self, user_message: str, hits: Optional[List[FAQHit]] = None) -> Optional[str]:
+        """High-confidence FAQ answer without an LLM call, or None"""
+        if self.fast_path_threshold is None:
+            return None
+        if hits is None:
+            hits = self.retriever(user_message, 1)
+        if not hits or hits[0].confidence < self.fast_path_threshold:
+            return None
+        entry = hits[0].entry
+        return self.fast_path_template.format(answer=entry.answer, topic=entry.id)
+    
+    def _faq_context(self, hits: List[FAQHit]) -> str:
+        """Top FAQ entries as a system-prompt section"""
+        if not hits:
+            return ""
+        lines = "\n".join(f"- {hit.entry.id}: {hit.entry.answer}" for hit in hits)
+        return f"\nRelevant FAQ entries (answer from these when they apply):\n{lines}\n"
+    
+    def _search_faq(self, query: str, user_message: str, prefetch: Optional[Future]) -> str:
+        """Run search_faq, reusing the speculative lookup when the query matches"""
+        if prefetch is not None and similar_queries(query, user_message):
+            self.stats["prefetch_hits"] += 1
+            return faq_result(prefetch.result())
+        return faq_result(self.retriever(query, 3))
     
     def chat(self, user_message: str) -> str:
         """Process user message and return response"""
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        self.conversation.add_user(user_message)
         
-        messages = [{"role": "system", "content": self.system_prompt}]
-        messages.extend(self.conversation_history)
+        # Start FAQ retrieval now; a speculative lookup overlaps the first completion call
+        prefetch = _prefetch_pool.submit(self.retriever, user_message, 3) if self.prefetch else None
         
-        # First API call
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            tools=tools
-        )
+        # Fast path: confident FAQ matches are answered locally ("inject" then
+        # reuses the same lookup for the prompt)
+        fast_answer = None
+        if self.fast_path_threshold is not None:
+            fast_answer = self.answer_from_faq(user_message, prefetch.result() if prefetch else None)
+        if fast_answer is not None:
+            self.stats["fast_path"] += 1
+            self.conversation.add_assistant(fast_answer)
+            return fast_answer
         
-        response_message = response.choices[0].message
+        self.stats["llm"] += 1
+        system_prompt, request_tools = None, tools
+        if self.prefetch == "inject":
+            system_prompt = self.system_prompt + self._faq_context(prefetch.result())
+            request_tools = tools_without_faq
+        messages = self.conversation.to_messages(system_prompt)
         
-        # Handle tool calls
-        if response_message.tool_calls:
-            messages.append(response_message)
-            
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                
-                # Execute function
-                function_response = available_functions[function_name](**function_args)
-                
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "name": function_name,
-                    "content": function_response
-                })
-            
-            # Second API call
-            final_response = client.chat.completions.create(
-                model="gpt-4",
-                messages=messages
-            )
-            
-            assistant_message = final_response.choices[0].message.content
-        else:
-            assistant_message = response_message.content
+        # One tool round, then the answer; search_faq may reuse the prefetched lookup
+        search_faq = lambda query: self._search_faq(query, user_message, prefetch)
+        assistant_message = self.runtime.run(
+            messages, tools=request_tools, functions={"search_faq": search_faq}
+        ).content
         
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": assistant_message
-        })
+        self.conversation.add_assistant(assistant_message)
         
         return assistant_message
 
@@ -0,0 +1,242 @@
+"""
+Semantic FAQ Retrieval
+
+Embedding-based FAQ lookup for the customer support bot:
+- FAQ entries are embedded offline into a float32 matrix saved as .npy
+- The matrix (and the entry offsets) are memory-mapped at startup, so
+  loading 100k entries is near-instant
+- A query is one vectorized dot product plus argpartition for top-k
+- Embeddings for repeated queries are cached
+- The embedder name and dimension are saved with the matrix, and an index
+  is refused when queried through a different embedder
+"""
+
+import argparse
+import json
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from advanced.tool_selector import hashed_embedder, openai_embedder
+from use_cases.faq_search import FAQEntry, FAQHit, load_entries
+
+Embedder = Callable[[List[str]], Sequence[Sequence[float]]]
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Names saved in <prefix>.meta.json; vectors from different embedders are not comparable
+OFFLINE_EMBEDDER = "hashed"
+OPENAI_EMBEDDER = "openai:text-embedding-3-small"
+
+
+def _path(prefix: Union[str, Path], suffix: str) -> Path:
+    return Path(f"{prefix}{suffix}")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _write_meta(prefix: Path, embedder: str, dim: int):
+    _path(prefix, ".meta.json").write_text(json.dumps({"embedder": embedder, "dim": dim}))
+
+
+def build_index(
+    entries: Sequence[FAQEntry],
+    embed: Embedder,
+    out_prefix: Union[str, Path],
+    embedder: str,
+    batch_size: int = 256
+) -> Path:
+    """Embed entries offline and write <prefix>.npy, .jsonl, .offsets.npy and .meta.json
+
+    `embedder` names the embedding model; queries must use the same one.
+    Raises ValueError for an empty entry list (there is no dimension to record).
+    """
+    if not entries:
+        raise ValueError("build_index needs at least one FAQ entry")
+    out_prefix = Path(out_prefix)
+    out_prefix.parent.mkdir(parents=True, exist_ok=True)
+
+    batches = []
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start:start + batch_size]
+        batches.append(np.asarray(embed([e.text for e in batch]), dtype=np.float32))
+    matrix = _normalize_rows(np.vstack(batches)).astype(np.float32)
+    np.save(_path(out_prefix, ".npy"), matrix)
+    _write_meta(out_prefix, embedder, matrix.shape[1])
+
+    # Entry metadata as JSONL plus byte offsets, so hits are read lazily
+    offsets = np.zeros(len(entries), dtype=np.int64)
+    with open(_path(out_prefix, ".jsonl"), "wb") as f:
+        for i, entry in enumerate(entries):
+            offsets[i] = f.tell()
+            record = {"id": entry.id, "question": entry.question, "answer": entry.answer}
+            f.write(json.dumps(record).encode() + b"\n")
+    np.save(_path(out_prefix, ".offsets.npy"), offsets)
+    return out_prefix
+
+
+class EmbeddingFAQIndex:
+    """Memory-mapped embedding matrix with cached query embeddings (thread-safe)"""
+
+    def __init__(
+        self,
+        prefix: Union[str, Path],
+        embed: Embedder,
+        embedder: Optional[str] = None,
+        query_cache_size: int = 4096,
+        fast_path_threshold: float = 0.85
+    ):
+        """
+        Args:
+            prefix: Index prefix written by build_index
+            embed: Query embedder; must be the model the index was built with
+            embedder: Name of that model, checked against <prefix>.meta.json
+            query_cache_size: Query embeddings kept (LRU)
+            fast_path_threshold: Cosine similarity at which the support bot answers
+                without the model; raw cosines depend on the embedder, so calibrate it
+        """
+        prefix = Path(prefix)
+        self.embed = embed
+        self.fast_path_threshold = fast_path_threshold
+        self.matrix = np.load(_path(prefix, ".npy"), mmap_mode="r")
+        meta_path = _path(prefix, ".meta.json")
+        self.meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        if embedder is not None and self.meta.get("embedder", embedder) != embedder:
+            raise ValueError(
+                f"{prefix} was built with {self.meta['embedder']} ({self.meta['dim']}-dim) embeddings, "
+                f"not {embedder}; rebuild it with the same embedder"
+            )
+        self._offsets = np.load(_path(prefix, ".offsets.npy"), mmap_mode="r")
+        self._entries_path = _path(prefix, ".jsonl")
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_size = query_cache_size
+        self._lock = threading.Lock()  # prefetch threads share the query cache
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def _entry(self, row: int) -> FAQEntry:
+        with open(self._entries_path, "rb") as f:
+            f.seek(int(self._offsets[row]))
+            record = json.loads(f.readline())
+        return FAQEntry(record["id"], record["answer"], record.get("question", ""))
+
+    def query_vector(self, query: str) -> np.ndarray:
+        """Unit-length query embedding, cached by normalized query text"""
+        key = _WHITESPACE.sub(" ", query).strip().casefold()
+        with self._lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+                return vector
+        # Embed outside the lock; two threads missing on one query both embed it
+        vector = np.asarray(self.embed([key])[0], dtype=np.float32)
+        if vector.shape != (self.matrix.shape[1],):
+            raise ValueError(
+                f"Query embedding has shape {vector.shape}, index vectors have {self.matrix.shape[1]} dimensions"
+            )
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._query_cache[key] = vector
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def search(self, query: str, k: int = 3) -> List[FAQHit]:
+        """Top-k entries by cosine similarity"""
+        scores = self.matrix @ self.query_vector(query)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            FAQHit(self._entry(int(row)), float(scores[row]), max(0.0, float(scores[row])))
+            for row in top
+        ]
+
+
+def offline_embedder(texts: Iterable[str]) -> np.ndarray:
+    """Hashed bag-of-words embeddings (no API key needed); swap for openai_embedder in production"""
+    return np.asarray(hashed_embedder(list(texts)), dtype=np.float32)
+
+
+def run_benchmark(num_entries: int = 100_000, dim: int = 256, num_queries: int = 200):
+    """Startup and query latency at 100k entries"""
+    with tempfile.TemporaryDirectory() as workdir:
+        _run_benchmark(Path(workdir) / "faq", num_entries, dim, num_queries)
+
+
+def _run_benchmark(prefix: Path, num_entries: int, dim: int, num_queries: int):
+    rng = np.random.default_rng(0)
+
+    # Random unit vectors stand in for real embeddings; only the shapes matter here
+    np.save(_path(prefix, ".npy"), _normalize_rows(rng.standard_normal((num_entries, dim), dtype=np.float32)))
+    offsets = np.zeros(num_entries, dtype=np.int64)
+    with open(_path(prefix, ".jsonl"), "wb") as f:
+        for i in range(num_entries):
+            offsets[i] = f.tell()
+            f.write(json.dumps({"id": f"faq_{i}", "answer": f"Answer {i}"}).encode() + b"\n")
+    np.save(_path(prefix, ".offsets.npy"), offsets)
+    _write_meta(prefix, "random", dim)
+
+    queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+    embed = lambda texts: [queries[int(t.split()[-1])] for t in texts]
+
+    start = time.perf_counter()
+    index = EmbeddingFAQIndex(prefix, embed=embed)
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(num_queries):
+        index.search(f"query {i}", k=5)
+    cold = (time.perf_counter() - start) / num_queries
+
+    start = time.perf_counter()
+    for i in range(num_queries):
+        index.search(f"Query  {i}", k=5)  # same queries, normalized to cache hits
+    warm = (time.perf_counter() - start) / num_queries
+
+    print("=== Semantic FAQ Benchmark ===\n")
+    print(f"Entries x dim:        {num_entries} x {dim} float32 ({index.matrix.nbytes / 2**20:.0f} MiB)")
+    print(f"Startup (mmap):       {startup * 1000:.2f} ms")
+    print(f"Top-5 query:          {cold * 1000:.2f} ms")
+    print(f"Top-5 query (cached): {warm * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or benchmark the semantic FAQ index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Embed a FAQ JSON/JSONL file offline")
+    build.add_argument("faq_file")
+    build.add_argument("out_prefix")
+    build.add_argument("--offline", action="store_true", help="Use hashed embeddings instead of the OpenAI API")
+    sub.add_parser("bench", help="Benchmark startup and query latency at 100k entries")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.offline:
+            embed, embedder = offline_embedder, OFFLINE_EMBEDDER
+        else:
+            from openai import OpenAI
+            embed, embedder = openai_embedder(OpenAI()), OPENAI_EMBEDDER
+        entries = load_entries(args.faq_file)
+        build_index(entries, embed, args.out_prefix, embedder)
+        print(f"Embedded {len(entries)} FAQ entries with {embedder} -> {args.out_prefix}.npy")
+    else:
+        run_benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Repository Code Review
+
+Points the code reviewer at a whole repository:
+- Walks the tree and runs the local static pre-pass (code_analysis) over
+  every Python file in a process pool
+- Ranks files by what the pre-pass found and trims each prompt to the
+  functions with findings; files with no findings are reviewed whole, last
+- Sends only the highest-value files to the model, under one token budget
+  for the whole run
+- Streams one JSON line per file as its review completes
+
+Usage:
+    python -m use_cases.repo_review path/to/repo --budget 50000 -o review.jsonl
+    python -m use_cases.repo_review path/to/repo --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple
+
+from advanced.tool_selector import count_tokens
+from use_cases.code_analysis import CodeChunk, FileAnalysis, analyze_file, split_source
+from use_cases.code_reviewer import REVIEW_PROMPT, merge_reviews, review_chunk
+
+SKIP_DIRS = {"__pycache__", "node_modules", "venv", "env", "build", "dist", "site-packages"}
+
+# System prompt, instructions and chat framing sent with every unit
+REQUEST_OVERHEAD_TOKENS = count_tokens(REVIEW_PROMPT) + 40
+
+
+def iter_python_files(root: str) -> List[str]:
+    """Python files under root, skipping hidden, virtualenv and build directories"""
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith(".") and d not in SKIP_DIRS)
+        files.extend(os.path.join(directory, name) for name in sorted(names) if name.endswith(".py"))
+    return files
+
+
+def analyze_repo(root: str, workers: Optional[int] = None, chunksize: int = 16) -> List[FileAnalysis]:
+    """Static pre-pass over every file; workers=1 runs in-process"""
+    paths = iter_python_files(root)
+    if workers == 1:
+        return [analyze_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(analyze_file, paths, chunksize=chunksize))
+
+
+def review_units(analysis: FileAnalysis, max_unit_lines: int = 150) -> List[CodeChunk]:
+    """What the model sees for a file: its flagged units, or the whole file
+    (in chunks) when the pre-pass found nothing"""
+    if analysis.findings or analysis.error is not None:
+        return analysis.flagged_units
+    try:
+        return split_source(Path(analysis.path).read_text(encoding="utf-8"), max_unit_lines)
+    except (OSError, UnicodeDecodeError):
+        return []
+
+
+def review_cost(analysis: FileAnalysis, units: Optional[List[CodeChunk]] = None) -> int:
+    """Prompt tokens to review a file's units (its flagged units by default)"""
+    units = analysis.flagged_units if units is None else units
+    return sum(count_tokens(unit.source) for unit in units) + REQUEST_OVERHEAD_TOKENS * len(units)
+
+
+def plan_reviews(
+    analyses: List[FileAnalysis],
+    token_budget: int
+) -> Tuple[List[FileAnalysis], List[FileAnalysis]]:
+    """Pick files for the model: highest findings score per prompt token first,
+    then files without findings, cheapest first.
+
+    Returns (selected, over_budget). Unreadable and empty files are in neither.
+    """
+    candidates = [a for a in analyses if a.error is None]
+    costs = {a.path: review_cost(a, review_units(a)) for a in candidates}
+    candidates = [a for a in candidates if costs[a.path] > 0]
+    candidates.sort(key=lambda a: (
+        (0, -a.score / costs[a.path], a.path) if a.findings else (1, costs[a.path], a.path)
+    ))
+    selected, over_budget, remaining = [], [], token_budget
+    for analysis in candidates:
+        if costs[analysis.path] <= remaining:
+            selected.append(analysis)
+            remaining -= costs[analysis.path]
+        else:
+            over_budget.append(analysis)  # a cheaper file further down may still fit
+    return selected, over_budget
+
+
+def _record(analysis: FileAnalysis, status: str, review=None, error: Optional[str] = None) -> Dict:
+    return {
+        "path": analysis.path,
+        "status": status,
+        "score": analysis.score,
+        "findings": [asdict(finding) for finding in analysis.findings],
+        "review": review.model_dump() if review is not None else None,
+        "error": error or analysis.error
+    }
+
+
+def review_repo(
+    root: str,
+    output: IO[str],
+    token_budget: int = 50_000,
+    workers: Optional[int] = None,
+    max_concurrency: int = 4,
+    llm_client=None
+) -> Dict:
+    """Pre-pass, plan, and review; writes JSONL records to output and returns run stats"""
+    start = time.perf_counter()
+    analyses = analyze_repo(root, workers)
+    prepass = time.perf_counter() - start
+    selected, over_budget = plan_reviews(analyses, token_budget)
+
+    def write(record: Dict):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    # Every unit of every selected file is one call; a file's record is
+    # written as soon as its last unit comes back. A failed unit turns the
+    # file's record into an "error" one (with whatever units did succeed)
+    units = {analysis.path: review_units(analysis) for analysis in selected}
+    pending = {path: len(file_units) for path, file_units in units.items()}
+    results: Dict[str, List] = {path: [None] * len(file_units) for path, file_units in units.items()}
+    errors: Dict[str, List[str]] = {path: [] for path in units}
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {
+            pool.submit(review_chunk, unit, "python", llm_client): (analysis, index)
+            for analysis in selected
+            for index, unit in enumerate(units[analysis.path])
+        }
+        for future in as_completed(futures):
+            analysis, index = futures[future]
+            path = analysis.path
+            try:
+                results[path][index] = future.result()
+            except Exception as e:
+                errors[path].append(f"{units[path][index].name}: {type(e).__name__}: {e}")
+            pending[path] -= 1
+            if pending[path] > 0:
+                continue
+            done = [(unit, review) for unit, review in zip(units[path], results[path]) if review is not None]
+            review = merge_reviews(*map(list, zip(*done))) if done else None
+            if errors[path]:
+                write(_record(analysis, "error", review, "; ".join(errors[path])))
+            else:
+                write(_record(analysis, "reviewed", review))
+
+    failed = sum(1 for path in errors if errors[path])
+    for analysis in over_budget:
+        write(_record(analysis, "over_budget"))
+    for analysis in analyses:
+        if analysis.error is not None:
+            write(_record(analysis, "error"))
+
+    return {
+        "files": len(analyses),
+        "flagged": sum(1 for a in analyses if a.findings),
+        "reviewed": len(selected) - failed,
+        "failed": failed,
+        "over_budget": len(over_budget),
+        "prompt_tokens": sum(review_cost(a, units[a.path]) for a in selected),
+        "full_file_tokens": sum(a.tokens for a in selected),
+        "prepass_seconds": prepass,
+        "seconds": time.perf_counter() - start
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Review a whole repository under a token budget")
+    parser.add_argument("root", nargs="?", default=".")
+    parser.add_argument("--budget", type=int, default=50_000, help="Prompt tokens for the whole run")
+    parser.add_argument("--workers", type=int, help="Pre-pass processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Review calls in flight")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--dry-run", action="store_true", help="Only run the pre-pass and print the plan")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        start = time.perf_counter()
+        analyses = analyze_repo(args.root, args.workers)
+        elapsed = time.perf_counter() - start
+        selected, over_budget = plan_reviews(analyses, args.budget)
+        print(f"{len(analyses)} files pre-analyzed in {elapsed:.2f}s ({len(analyses) / elapsed:,.0f} files/s)\n")
+        for label, group in (("review", selected), ("over budget", over_budget)):
+            for analysis in group:
+                cost = review_cost(analysis, review_units(analysis))
+                print(f"{label:<12} score {analysis.score:>4}  {cost:>7,} tokens  {analysis.path}")
+        return
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        stats = review_repo(args.root, output, args.budget, args.workers, args.concurrency)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(
+        f"Files: {stats['files']}, flagged: {stats['flagged']}, reviewed: {stats['reviewed']}, "
+        f"failed: {stats['failed']}, over budget: {stats['over_budget']}; prompt tokens {stats['prompt_tokens']:,} "
+        f"(whole files: {stats['full_file_tokens']:,})",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
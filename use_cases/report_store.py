@@ -0,0 +1,280 @@
+"""
+Research Report Store
+
+Content-addressed, compressed storage for research assistant reports:
+- Each report is stored once under the SHA-256 of its text, so identical
+  reports share one file and titles can never collide
+- zstd compression when `zstandard` is installed, gzip otherwise
+- Large reports can be streamed to disk chunk by chunk instead of being
+  built in memory first
+- A small SQLite index maps titles to hashes
+- Reads memory-map the compressed file
+"""
+
+import argparse
+import codecs
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is always available
+    zstandard = None
+
+GZIP_WBITS = 31  # zlib wbits for the gzip container
+
+
+@dataclass
+class ReportRecord:
+    """Index entry for a stored report"""
+    title: str
+    digest: str
+    size: int  # bytes of UTF-8 text
+    stored_size: int  # bytes on disk
+    created_at: str
+    deduplicated: bool = False  # identical content was already stored
+
+    @property
+    def ratio(self) -> float:
+        return self.size / self.stored_size if self.stored_size else 0.0
+
+
+class _Compressor:
+    def __init__(self, use_zstd: bool, level: int):
+        if use_zstd:
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+def _decompressor(path: Path):
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} is zstd-compressed; install `zstandard` to read it")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(GZIP_WBITS)
+
+
+class ReportStore:
+    """Reports on disk under <root>/objects/<hash[:2]>/<hash>.<zst|gz>, indexed by title"""
+
+    def __init__(self, root: Union[str, Path] = "reports", level: int = 6, use_zstd: Optional[bool] = None):
+        """
+        Args:
+            root: Store directory
+            level: Compression level
+            use_zstd: Force zstd on/off (default: zstd when installed)
+        """
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.use_zstd = (zstandard is not None) if use_zstd is None else use_zstd
+        if self.use_zstd and zstandard is None:
+            raise RuntimeError("use_zstd=True requires the `zstandard` package")
+        self.suffix = ".zst" if self.use_zstd else ".gz"
+        self._db = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "title TEXT PRIMARY KEY, digest TEXT, size INTEGER, stored_size INTEGER, created_at TEXT)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest: str) -> Optional[Path]:
+        """Existing file for a digest, in either format"""
+        for suffix in (self.suffix, ".gz", ".zst"):
+            path = self.objects / digest[:2] / f"{digest}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def _write_object(self, chunks: Iterable[bytes]) -> tuple:
+        """Compress chunks to a temp file, hashing as we go; returns (digest, size, path, deduplicated)"""
+        hasher = hashlib.sha256()
+        size = 0
+        compressor = _Compressor(self.use_zstd, self.level)
+        fd, tmp_name = tempfile.mkstemp(dir=self.objects, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    out.write(compressor.compress(chunk))
+                out.write(compressor.flush())
+            digest = hasher.hexdigest()
+            existing = self._object_path(digest)
+            if existing is not None:
+                os.unlink(tmp_name)  # same content is already stored
+                return digest, size, existing, True
+            path = self.objects / digest[:2] / f"{digest}{self.suffix}"
+            path.parent.mkdir(exist_ok=True)
+            os.replace(tmp_name, path)  # atomic: readers never see a partial object
+            return digest, size, path, False
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def save(self, title: str, content: Union[str, Iterable[str]], chunk_size: int = 1 << 20) -> ReportRecord:
+        """Store a report; `content` is the full text or an iterable of text chunks.
+
+        For a full string the hash is computed first, so re-saving an
+        identical report writes nothing. Chunk iterables are streamed through
+        the compressor and never held in memory as a whole.
+        """
+        if isinstance(content, str):
+            data = content.encode()
+            digest = hashlib.sha256(data).hexdigest()
+            existing = self._object_path(digest)
+            if existing is not None:
+                digest, size, path, deduplicated = digest, len(data), existing, True
+            else:
+                chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+                digest, size, path, deduplicated = self._write_object(chunks)
+        else:
+            digest, size, path, deduplicated = self._write_object(chunk.encode() for chunk in content)
+
+        record = ReportRecord(title, digest, size, path.stat().st_size, datetime.now().isoformat(), deduplicated)
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM reports WHERE title = ?", (title,)).fetchone()
+            if row is None or row[0] != digest:  # unchanged title -> hash mapping: no index write
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)",
+                        (title, digest, record.size, record.stored_size, record.created_at)
+                    )
+        return record
+
+    def resolve(self, title_or_digest: str) -> Optional[str]:
+        """Digest for a title (or a digest passed through)"""
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM reports WHERE title = ?", (title_or_digest,)).fetchone()
+        if row:
+            return row[0]
+        is_digest = len(title_or_digest) == 64 and all(c in "0123456789abcdef" for c in title_or_digest)
+        return title_or_digest if is_digest and self._object_path(title_or_digest) else None
+
+    def iter_text(self, title_or_digest: str, chunk_size: int = 1 << 16) -> Iterator[str]:
+        """Decompress a report from a memory-mapped file, chunk by chunk"""
+        digest = self.resolve(title_or_digest)
+        path = self._object_path(digest) if digest else None
+        if path is None:
+            raise KeyError(f"No report '{title_or_digest}'")
+        decompressor = _decompressor(path)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for start in range(0, len(view), chunk_size):
+                    text = decoder.decode(decompressor.decompress(view[start:start + chunk_size]))
+                    if text:
+                        yield text
+            finally:
+                view.release()
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def load(self, title_or_digest: str) -> str:
+        """Full text of a report, by title or digest"""
+        return "".join(self.iter_text(title_or_digest))
+
+    def list(self) -> List[ReportRecord]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT title, digest, size, stored_size, created_at FROM reports ORDER BY created_at"
+            ).fetchall()
+        return [ReportRecord(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def run_benchmark(sections: int = 4000, workdir: Optional[str] = None):
+    """Streamed save, dedup on re-save, and mmap read of a large report"""
+    import tracemalloc
+
+    def report_sections():
+        for i in range(sections):
+            yield (
+                f"## Section {i}\n\nAI agents in business automation: finding {i} covers adoption, "
+                f"tooling and governance. " * 40 + "\n\n"
+            )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReportStore(workdir or tmp)
+        print("=== Report Store Benchmark ===\n")
+        print(f"Compression: {'zstd' if store.use_zstd else 'gzip'}\n")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        record = store.save("AI agents for business automation", report_sections())
+        streamed = time.perf_counter() - start
+        streamed_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        text = "".join(report_sections())
+        start = time.perf_counter()
+        store.save("AI agents (in-memory copy)", text)
+        in_memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        resave = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = store.load(record.digest)
+        load = time.perf_counter() - start
+        assert loaded == text
+
+        print(f"Report size:            {record.size / 2**20:.1f} MiB -> {record.stored_size / 2**20:.2f} MiB "
+              f"on disk ({record.ratio:.0f}x)")
+        print(f"Streamed save:          {streamed * 1000:.0f} ms, peak memory {streamed_peak / 2**20:.1f} MiB")
+        print(f"Built-in-memory save:   peak memory {in_memory_peak / 2**20:.1f} MiB")
+        print(f"Identical re-save:      {resave * 1000:.1f} ms, objects on disk: "
+              f"{sum(1 for p in store.objects.rglob('*') if p.is_file())}")
+        print(f"mmap load:              {load * 1000:.0f} ms")
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Browse or benchmark the report store")
+    parser.add_argument("--root", default=os.environ.get("REPORT_DIR", "reports"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List stored reports")
+    show = sub.add_parser("show", help="Print a report by title or hash")
+    show.add_argument("report")
+    sub.add_parser("bench", help="Benchmark a large streamed report")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        run_benchmark()
+        return
+    store = ReportStore(args.root)
+    if args.command == "list":
+        for record in store.list():
+            print(f"{record.digest[:12]}  {record.size:>10,} B  {record.title}")
+    else:
+        for text in store.iter_text(args.report):
+            print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
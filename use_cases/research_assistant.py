@@ -6,49 +6,88 @@ An AI research assistant that:
 - Summarizes findings
 - Generates comprehensive reports
 - Uses RAG for document analysis
+- Planner mode: searches every sub-query concurrently, then synthesizes once
 """
 
 from openai import OpenAI
-from typing import List, Dict
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import asyncio
+import httpx
 import json
+import os
+import zlib
+
+from advanced.agent_runtime import AgentHooks, AgentRuntime
+from advanced.near_dedup import NearDuplicateFilter
+from advanced.parallel_tools import ParallelToolExecutor
+from advanced.context_compaction import (
+    FETCH_TOOL, FETCH_TOOL_NAME, ToolOutputCompactor, extract_search_results
+)
+from use_cases.report_store import ReportStore
+from use_cases.summarizer import MapReduceSummarizer
 
 client = OpenAI()
 
+# Search API for planner mode: GET <url>?q=<query>&num=<n> -> {"results": [{title, url, snippet}]}
+SEARCH_API_URL = os.environ.get("SEARCH_API_URL")
+
+
+MOCK_ANGLES = [
+    "market adoption and spending", "tooling and framework choices", "security and governance risks",
+    "customer case studies", "cost and return on investment", "hiring and team structure",
+    "regulation and compliance", "research breakthroughs"
+]
+
+
+def mock_search_results(query: str, num_results: int = 5) -> List[Dict]:
+    """Simulated results; articles recur across related queries, as on the real web"""
+    results = []
+    for i in range(num_results):
+        article = zlib.crc32(f"{query}:{i}".encode()) % 40
+        results.append({
+            "title": f"Result for '{query}' - Article {article}",
+            "url": f"https://example.com/article-{article}",
+            "snippet": f"Article {article} looks at {query} through {MOCK_ANGLES[article % len(MOCK_ANGLES)]}, "
+                       f"drawing on interviews and data from the past year..."
+        })
+    return results
+
 
 def web_search(query: str, num_results: int = 5) -> str:
     """Simulate web search (in production, use real search API)"""
-    # Mock search results
-    results = [
-        {
-            "title": f"Result for '{query}' - Article {i+1}",
-            "url": f"https://example.com/article-{i+1}",
-            "snippet": f"This article discusses {query} with insights on recent developments..."
-        }
-        for i in range(num_results)
-    ]
+    results = mock_search_results(query, num_results)
     return json.dumps({"query": query, "results": results, "total": num_results})
 
 
+_summarizer: Optional[MapReduceSummarizer] = None
+
+
 def summarize_text(text: str, max_sentences: int = 3) -> str:
-    """Summarize long text"""
-    # In production, this would use actual summarization
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": f"Summarize this text in {max_sentences} sentences."},
-            {"role": "user", "content": text}
-        ]
-    )
-    return response.choices[0].message.content
+    """Summarize text of any length (map-reduce over cached, concurrent chunk summaries)"""
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = MapReduceSummarizer(client, cache_path=os.environ.get("SUMMARY_CACHE", ".summary_cache.db"))
+    return _summarizer.summarize(text, max_sentences)
+
+
+_report_store: Optional[ReportStore] = None
 
 
 def save_report(title: str, content: str) -> str:
-    """Save research report"""
-    filename = title.lower().replace(" ", "_") + ".md"
+    """Save research report (content-addressed and compressed; REPORT_DIR sets the directory)"""
+    global _report_store
+    if _report_store is None:
+        _report_store = ReportStore(os.environ.get("REPORT_DIR", "reports"))
+    record = _report_store.save(title, content)
     return json.dumps({
         "saved": True,
-        "filename": filename,
-        "message": f"Report saved as {filename}"
+        "title": record.title,
+        "report_id": record.digest,
+        "bytes": record.size,
+        "stored_bytes": record.stored_size,
+        "deduplicated": record.deduplicated,
+        "message": f"Report saved as {record.digest[:12]}"
     })
 
 
@@ -91,10 +130,172 @@ available_functions = {
 }
 
 
+def mock_search_transport(latency: float = 0.0) -> httpx.MockTransport:
+    """Offline stand-in for the search API, with simulated network latency"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        query = request.url.params["q"]
+        num_results = int(request.url.params.get("num", 5))
+        return httpx.Response(200, json={"query": query, "results": mock_search_results(query, num_results)})
+    return httpx.MockTransport(handler)
+
+
+class SearchClient:
+    """Async search client over one pooled httpx connection pool"""
+    
+    def __init__(
+        self,
+        url: Optional[str] = SEARCH_API_URL,
+        max_connections: int = 10,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if url is None and transport is None:
+            transport = mock_search_transport()
+        self.url = url or "https://search.local/search"
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport
+        )
+    
+    async def search(self, query: str, num_results: int = 5) -> List[Dict]:
+        response = await self._http.get(self.url, params={"q": query, "num": num_results})
+        response.raise_for_status()
+        return response.json()["results"]
+    
+    async def search_many(self, queries: List[str], num_results: int = 5) -> List[List[Dict]]:
+        """Run all searches concurrently; a failed search contributes no results"""
+        outcomes = await asyncio.gather(
+            *(self.search(query, num_results) for query in queries), return_exceptions=True
+        )
+        results = []
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"⚠️  Search failed for {query!r}: {outcome}")
+                outcome = []
+            results.append(outcome)
+        return results
+    
+    async def aclose(self):
+        await self._http.aclose()
+    
+    async def __aenter__(self) -> "SearchClient":
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for deduplication: lowercase host, no fragment, tracking params or trailing slash"""
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+
+def merge_results(queries: List[str], result_lists: List[List[Dict]]) -> List[Dict]:
+    """Deduplicate by URL, interleaving ranks so every sub-query's top hits come first.
+
+    Each merged source records the sub-queries that found it.
+    """
+    merged: Dict[str, Dict] = {}
+    for rank in range(max((len(r) for r in result_lists), default=0)):
+        for query, results in zip(queries, result_lists):
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            key = normalize_url(result["url"])
+            if key in merged:
+                merged[key]["queries"].append(query)
+            else:
+                merged[key] = dict(result, queries=[query])
+    return list(merged.values())
+
+
+def collapse_near_duplicates(results: List[Dict], dedup_filter: Optional[NearDuplicateFilter] = None) -> List[Dict]:
+    """Fold results with near-identical snippets into the first one.
+
+    The other URLs are kept under "also_at", so they can still be cited.
+    """
+    dedup_filter = dedup_filter or NearDuplicateFilter()
+    kept = dedup_filter.filter(results, text=lambda r: r.get("snippet") or "", source=lambda r: r["url"])
+    return [
+        dict(cluster.item, also_at=cluster.sources[1:]) if len(cluster.sources) > 1 else cluster.item
+        for cluster in kept
+    ]
+
+
+def dedup_search_output(content: str, dedup_filter: NearDuplicateFilter) -> str:
+    """Drop web_search results that repeat anything already shown this session.
+
+    Each dropped result is listed by URL together with the source it duplicates.
+    """
+    try:
+        data = json.loads(content)
+        results = data["results"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return content
+    fresh, duplicates = [], []
+    for result in results:
+        is_new, cluster = dedup_filter.add(result.get("snippet") or "", result["url"], result)
+        if is_new:
+            fresh.append(result)
+        else:
+            duplicates.append({"url": result["url"], "same_as": cluster.sources[0]})
+    data["results"] = fresh
+    if duplicates:
+        data["near_duplicates"] = duplicates
+    return json.dumps(data)
+
+
+class ResearchHooks(AgentHooks):
+    """Per-session bookkeeping for the iterative loop"""
+    
+    def __init__(self, compactor: Optional[ToolOutputCompactor]):
+        self.compactor = compactor
+        self.seen = NearDuplicateFilter()  # search results already shown this session
+    
+    def on_llm_end(self, messages: List, message):
+        # The model has read every tool output so far; later calls only need extracts
+        if self.compactor and message.tool_calls:
+            self.compactor.compact(messages)
+    
+    def on_tool_start(self, name: str, arguments: str):
+        # Raw string: malformed arguments are the executor's to report, per call
+        print(f"🔧 Using tool: {name}({arguments})")
+    
+    def on_tool_end(self, result):
+        # Results arrive in call order, so deduplication stays deterministic
+        if result.name == "web_search" and result.ok:
+            result.content = dedup_search_output(result.content, self.seen)
+
+
+PLANNER_PROMPT = """You are a research planner. Break the topic into at most {max_queries} focused,
+non-overlapping web search queries that together cover it.
+Respond with JSON: {{"queries": ["..."]}}"""
+
+
 class ResearchAssistant:
     """AI Research Assistant with multi-step workflow"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        llm_client=None,
+        functions: Optional[Dict[str, Callable]] = None,
+        compact_tool_outputs: bool = True
+    ):
+        """
+        Args:
+            llm_client: OpenAI-compatible client (defaults to the module client)
+            functions: Tool implementations for the iterative loop (defaults to available_functions)
+            compact_tool_outputs: Replace tool outputs the model has already read with
+                short extracts (full payloads stay fetchable via fetch_tool_output)
+        """
+        self.client = llm_client or client
+        self.functions = functions or available_functions
+        self.executor = ParallelToolExecutor(self.functions)
+        self.compact_tool_outputs = compact_tool_outputs
         self.system_prompt = """You are an AI research assistant. 
 
 Your workflow:
@@ -114,40 +315,90 @@ Be thorough, cite sources, and provide actionable insights."""
         
         print(f"🔍 Researching: {topic}\n")
         
-        # Iterative agent loop
-        for iteration in range(5):  # Max 5 iterations
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=messages,
-                tools=tools
-            )
-            
-            response_message = response.choices[0].message
-            
-            # Check if done
-            if not response_message.tool_calls:
-                print("✅ Research complete\n")
-                return response_message.content
-            
-            # Execute tools
-            messages.append(response_message)
-            
-            for tool_call in response_message.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                
-                print(f"🔧 Using tool: {function_name}({function_args})")
-                
-                function_response = available_functions[function_name](**function_args)
-                
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "name": function_name,
-                    "content": function_response
-                })
+        compactor = None
+        request_tools = tools
+        functions = dict(self.functions)
+        if self.compact_tool_outputs:
+            compactor = ToolOutputCompactor({"web_search": extract_search_results})
+            request_tools = tools + [FETCH_TOOL]
+            functions[FETCH_TOOL_NAME] = compactor.fetch
         
-        return "Research workflow completed (max iterations reached)"
+        # Iterative agent loop: up to 5 model calls, each able to use tools
+        runtime = AgentRuntime(
+            self.client, request_tools, executor=self.executor, max_tool_rounds=5, final_answer=False,
+            hooks=ResearchHooks(compactor)
+        )
+        result = runtime.run(messages, functions=functions)
+        if result.stopped == "max_tool_rounds":
+            return "Research workflow completed (max iterations reached)"
+        print("✅ Research complete\n")
+        return result.content
+    
+    def plan(self, topic: str, max_queries: int = 5) -> List[str]:
+        """Ask the model for sub-queries up front (falls back to the topic itself)"""
+        response = self.client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": PLANNER_PROMPT.format(max_queries=max_queries)},
+                {"role": "user", "content": topic}
+            ],
+            response_format={"type": "json_object"}
+        )
+        try:
+            queries = json.loads(response.choices[0].message.content)["queries"]
+        except (TypeError, KeyError, json.JSONDecodeError):
+            return [topic]
+        queries = [q.strip() for q in queries if isinstance(q, str) and q.strip()]
+        return list(dict.fromkeys(queries))[:max_queries] or [topic]
+    
+    def synthesize(self, topic: str, sources: List[Dict]) -> str:
+        """One model call that writes the report from the merged sources"""
+        listing = "\n".join(
+            f"[{i}] {source['title']} ({source['url']})\n    {source['snippet']}"
+            for i, source in enumerate(sources, 1)
+        )
+        response = self.client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": (
+                    f"Write a comprehensive research report on: {topic}\n\n"
+                    f"Sources (cite by number):\n{listing}"
+                )}
+            ]
+        )
+        return response.choices[0].message.content
+    
+    async def research_planned_async(
+        self,
+        topic: str,
+        max_queries: int = 5,
+        num_results: int = 5,
+        search: Optional[SearchClient] = None
+    ) -> str:
+        """Planner mode: plan once, search concurrently, synthesize once.
+
+        Pass a long-lived SearchClient to reuse its connection pool across reports.
+        """
+        queries = await asyncio.to_thread(self.plan, topic, max_queries)
+        print(f"🗺️  Plan: {queries}")
+        
+        owned = search is None
+        search = search or SearchClient()
+        try:
+            result_lists = await search.search_many(queries, num_results)
+        finally:
+            if owned:
+                await search.aclose()
+        
+        sources = collapse_near_duplicates(merge_results(queries, result_lists))
+        total = sum(len(r) for r in result_lists)
+        print(f"🔎 {len(queries)} searches, {total} results, {len(sources)} unique sources")
+        return await asyncio.to_thread(self.synthesize, topic, sources)
+    
+    def research_planned(self, topic: str, max_queries: int = 5, num_results: int = 5) -> str:
+        """Synchronous wrapper around research_planned_async"""
+        return asyncio.run(self.research_planned_async(topic, max_queries, num_results))
 
 
 def demo():
@@ -163,7 +414,7 @@ def demo():
     
     for topic in topics:
         print("=" * 70)
-        result = assistant.research(topic)
+        result = assistant.research_planned(topic)
         print(f"\n📄 Report:\n{result}\n")
         print("=" * 70 + "\n")
 
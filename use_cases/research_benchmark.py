@@ -0,0 +1,115 @@
+"""
+Research Assistant Benchmarks
+
+Runs ResearchAssistant against the mock LLM server (advanced/mock_llm.py)
+and a mock search API, so no API key or network access is needed:
+- planner: iterative tool loop vs. plan -> concurrent searches -> synthesis
+- compaction: prompt tokens per report with and without tool-output compaction
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict
+
+# The assistant module builds an OpenAI client at import; the mock replaces it for every call
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from advanced.mock_llm import MockChatClient, MockMessage, tool_call_message
+from use_cases.research_assistant import (
+    ResearchAssistant, SearchClient, available_functions, mock_search_results, mock_search_transport, web_search
+)
+
+TOPIC = "Latest developments in AI agents for business automation"
+SUB_QUERIES = [
+    "AI agents business automation 2025 adoption",
+    "AI agent frameworks enterprise comparison",
+    "AI agents workflow automation case studies",
+    "AI agents cost and ROI for businesses"
+]
+
+
+def research_responder(request: Dict) -> MockMessage:
+    """Mock GPT-4 policy: search one sub-query per turn, then write the report"""
+    if request.get("response_format"):
+        return json.dumps({"queries": SUB_QUERIES})
+    searches = sum(1 for m in request["messages"] if isinstance(m, dict) and m.get("role") == "tool")
+    if request.get("tools") and searches < len(SUB_QUERIES):
+        return tool_call_message(("web_search", {"query": SUB_QUERIES[searches]}))
+    return "# Report\n\nAI agents are moving from pilots to production [1][2]..."
+
+
+def run_planner_benchmark(llm_latency: float = 0.3, search_latency: float = 0.4):
+    """Wall-clock time per report: sequential tool loop vs. planner mode"""
+    def slow_web_search(query: str, num_results: int = 5) -> str:
+        time.sleep(search_latency)
+        return web_search(query, num_results)
+
+    iterative_llm = MockChatClient(research_responder, latency=llm_latency)
+    assistant = ResearchAssistant(iterative_llm, functions=dict(available_functions, web_search=slow_web_search))
+    start = time.perf_counter()
+    assistant.research(TOPIC)
+    iterative = time.perf_counter() - start
+
+    planner_llm = MockChatClient(research_responder, latency=llm_latency)
+    assistant = ResearchAssistant(planner_llm)
+
+    async def planned():
+        async with SearchClient(transport=mock_search_transport(search_latency)) as search:
+            return await assistant.research_planned_async(TOPIC, search=search)
+
+    start = time.perf_counter()
+    asyncio.run(planned())
+    planner = time.perf_counter() - start
+
+    print("\n=== Research Planner Benchmark ===\n")
+    print(f"Mock LLM {llm_latency * 1000:.0f} ms/call, search {search_latency * 1000:.0f} ms/query, "
+          f"{len(SUB_QUERIES)} sub-queries\n")
+    print(f"{'Mode':<12} {'LLM calls':>10} {'Wall time':>10}")
+    print(f"{'iterative':<12} {iterative_llm.call_count:>10} {iterative:>9.2f}s")
+    print(f"{'planner':<12} {planner_llm.call_count:>10} {planner:>9.2f}s")
+
+
+def rich_web_search(query: str, num_results: int = 5) -> str:
+    """Search results with page excerpts, the way real search APIs return them"""
+    results = [
+        dict(result, content=" ".join([f"{result['snippet']} Paragraph {p} of the article on {query}." for p in range(12)]))
+        for result in mock_search_results(query, num_results)
+    ]
+    return json.dumps({"query": query, "results": results, "total": num_results})
+
+
+def run_compaction_benchmark():
+    """Prompt tokens per report: raw tool outputs resent every turn vs. compacted after first read"""
+    functions = dict(available_functions, web_search=rich_web_search)
+    rows = []
+    for compact in (False, True):
+        llm = MockChatClient(research_responder, latency=0)
+        ResearchAssistant(llm, functions=functions, compact_tool_outputs=compact).research(TOPIC)
+        per_call = [u.prompt_tokens for u in llm.usage]
+        rows.append(("compacted" if compact else "raw", llm.call_count, llm.prompt_tokens, per_call))
+
+    print("\n=== Tool Output Compaction Benchmark ===\n")
+    print(f"{len(SUB_QUERIES)} searches with page excerpts, then the report\n")
+    print(f"{'Tool outputs':<14} {'LLM calls':>10} {'Prompt tokens':>14}   Per call")
+    for name, calls, total, per_call in rows:
+        print(f"{name:<14} {calls:>10} {total:>14,}   {per_call}")
+    print(f"\nReduction: {1 - rows[1][2] / rows[0][2]:.0%} of prompt tokens")
+
+
+BENCHMARKS = {
+    "planner": run_planner_benchmark,
+    "compaction": run_compaction_benchmark
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmark", nargs="?", choices=sorted(BENCHMARKS), help="Run one benchmark (default: all)")
+    args = parser.parse_args()
+    for name, benchmark in BENCHMARKS.items():
+        if args.benchmark in (None, name):
+            benchmark()
+            print()
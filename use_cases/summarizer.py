@@ -0,0 +1,268 @@
+"""
+Map-Reduce Summarization
+
+Summarizes documents of any length for the research assistant:
+- Splits text into chunks on paragraph and token boundaries
+- Summarizes chunks concurrently under a concurrency cap (map)
+- Combines chunk summaries level by level until they fit one call (reduce)
+- Caches every summary on disk by content hash, so re-running over an
+  overlapping corpus only pays for the chunks it has not seen
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+from advanced.tool_selector import _encoding, count_tokens
+
+MAP_PROMPT = (
+    "Summarize this section of a longer document. Keep the key facts, figures, "
+    "names and conclusions; drop examples and repetition."
+)
+REDUCE_PROMPT = (
+    "These are summaries of consecutive sections of a document. Merge them into one "
+    "summary, keeping the key facts, figures, names and conclusions."
+)
+FINAL_PROMPT = "Summarize this text in {max_sentences} sentences."
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+def split_tokens(text: str, max_tokens: int, model: str = "gpt-4") -> List[str]:
+    """Split text into pieces of at most max_tokens tokens, cutting on token boundaries"""
+    encoding = _encoding(model)  # the one count_tokens uses, with the same fallback
+    if encoding is not None:
+        ids = encoding.encode(text)
+        return [encoding.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens)]
+
+    # No encoding: ~4 characters per token (as count_tokens estimates), cut at the last whitespace in the window
+    pieces, window = [], max_tokens * 4
+    while len(text) > window:
+        cut = text.rfind(" ", 0, window)
+        cut = cut if cut > 0 else window
+        pieces.append(text[:cut])
+        text = text[cut:].lstrip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def chunk_text(text: str, chunk_tokens: int = 3000, model: str = "gpt-4") -> List[str]:
+    """Pack paragraphs into chunks of at most chunk_tokens; oversized paragraphs are split.
+
+    Chunking depends only on the document itself, so a document shared by
+    two corpora produces the same chunks (and the same cache keys) in both.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for paragraph in _PARAGRAPH.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph, model)
+        if tokens > chunk_tokens:
+            pieces = split_tokens(paragraph, chunk_tokens, model)
+        else:
+            pieces = [paragraph]
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece, model)
+            if current and current_tokens + piece_tokens > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class SummaryCache:
+    """SQLite map of content hash -> summary"""
+
+    def __init__(self, path: Union[str, Path]):
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, instructions: str, text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, instructions, text):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, summary: str):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?)", (key, summary))
+
+
+class MapReduceSummarizer:
+    """Summarize long texts (or whole corpora) in concurrent, cached map-reduce passes"""
+
+    def __init__(
+        self,
+        llm_client,
+        model: str = "gpt-4",
+        chunk_tokens: int = 3000,
+        max_concurrency: int = 8,
+        cache_path: Optional[Union[str, Path]] = ".summary_cache.db"
+    ):
+        """
+        Args:
+            llm_client: OpenAI-compatible client
+            model: Model for every summarization call
+            chunk_tokens: Largest input per call, in tokens
+            max_concurrency: Most summarization calls in flight at once
+            cache_path: SQLite file for cached summaries (None disables caching)
+        """
+        self.client = llm_client
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
+        self.cache = SummaryCache(cache_path) if cache_path else None
+        self.stats = {"llm_calls": 0, "cache_hits": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _summarize(self, instructions: str, text: str) -> str:
+        key = None
+        if self.cache is not None:
+            key = SummaryCache.key(self.model, instructions, text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": text}
+            ]
+        )
+        summary = response.choices[0].message.content
+        self._count("llm_calls")
+        if key is not None:
+            self.cache.put(key, summary)
+        return summary
+
+    def _map(self, instructions: str, texts: Sequence[str]) -> List[str]:
+        if len(texts) == 1:
+            return [self._summarize(instructions, texts[0])]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(texts))) as pool:
+            return list(pool.map(lambda text: self._summarize(instructions, text), texts))
+
+    def _group(self, summaries: List[str]) -> List[str]:
+        """Pack consecutive summaries into reduce inputs that fit one call.
+
+        Packing goes through chunk_text, so a summary larger than chunk_tokens
+        is split rather than sent whole, and no input exceeds the budget.
+        """
+        return chunk_text("\n\n".join(summaries), self.chunk_tokens, self.model)
+
+    def summarize_documents(self, documents: Sequence[str], max_sentences: int = 3) -> str:
+        """One summary of all documents; each is chunked independently, so shared documents hit the cache"""
+        chunks = [chunk for document in documents for chunk in chunk_text(document, self.chunk_tokens, self.model)]
+        if not chunks:
+            return ""
+        final = FINAL_PROMPT.format(max_sentences=max_sentences)
+        if len(chunks) == 1:
+            return self._summarize(final, chunks[0])
+
+        level, previous = self._map(MAP_PROMPT, chunks), None
+        while True:
+            groups = self._group(level)
+            if len(groups) == 1:
+                return self._summarize(final, groups[0])
+            if previous is not None and len(groups) >= previous:
+                # Reduce outputs are at least half their inputs: another level would not shrink
+                raise RuntimeError(
+                    f"Summaries are not shrinking ({previous} reduce calls -> {len(groups)}); "
+                    "raise chunk_tokens or ask for shorter summaries"
+                )
+            level, previous = self._map(REDUCE_PROMPT, groups), len(groups)
+
+    def summarize(self, text: str, max_sentences: int = 3) -> str:
+        """Summary of one text of any length"""
+        return self.summarize_documents([text], max_sentences)
+
+
+def run_benchmark(documents: int = 24, paragraphs_per_document: int = 40, latency: float = 0.2):
+    """Map-reduce latency, concurrency, and cache reuse on an overlapping corpus"""
+    import random
+    import tempfile
+
+    from advanced.mock_llm import MockChatClient
+
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(5000)]
+
+    def document(n: int) -> str:
+        return "\n\n".join(
+            f"Document {n}, paragraph {p}: " + " ".join(rng.choices(words, k=120))
+            for p in range(paragraphs_per_document)
+        )
+
+    corpus = [document(n) for n in range(documents)]
+    # Second corpus: a quarter of the documents replaced by new ones
+    overlapping = corpus[: documents * 3 // 4] + [document(n) for n in range(documents, documents + documents // 4)]
+    responder = lambda request: "Summary: " + request["messages"][-1]["content"][:200]
+
+    print("=== Map-Reduce Summarizer Benchmark ===\n")
+    print(f"Corpus: {documents} documents, ~{sum(count_tokens(d) for d in corpus):,} tokens; "
+          f"mock LLM {latency * 1000:.0f} ms/call\n")
+    print(f"{'Run':<36} {'LLM calls':>10} {'Cache hits':>11} {'Wall time':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [
+            ("sequential (max_concurrency=1)", 1, None, corpus),
+            ("concurrent (max_concurrency=8)", 8, "cache.db", corpus),
+            ("overlapping corpus, warm cache", 8, "cache.db", overlapping)
+        ]
+        for name, concurrency, cache_name, docs in runs:
+            summarizer = MapReduceSummarizer(
+                MockChatClient(responder, latency=latency),
+                chunk_tokens=3000,
+                max_concurrency=concurrency,
+                cache_path=os.path.join(workdir, cache_name) if cache_name else None
+            )
+            start = time.perf_counter()
+            summarizer.summarize_documents(docs)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<36} {summarizer.stats['llm_calls']:>10} {summarizer.stats['cache_hits']:>11} "
+                  f"{elapsed:>9.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a text file, or benchmark the summarizer")
+    parser.add_argument("file", nargs="?", help="Text file to summarize (omit to run the benchmark)")
+    parser.add_argument("--sentences", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file is None:
+        run_benchmark()
+        return
+    from openai import OpenAI
+    summarizer = MapReduceSummarizer(OpenAI())
+    print(summarizer.summarize(Path(args.file).read_text(), args.sentences))
+    print(f"\n{summarizer.stats}")
+
+
+if __name__ == "__main__":
+    main()
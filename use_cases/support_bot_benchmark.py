@@ -0,0 +1,128 @@
+"""
+Customer Support Bot Benchmarks
+
+Replays a query log against CustomerSupportBot using the mock LLM server
+(advanced/mock_llm.py), so no API key or network access is needed:
+- fast_path: fraction of traffic answered locally and the latency delta
+- prefetch: speculative and injected FAQ retrieval vs. the sequential tool round trip
+"""
+
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# The bot module builds an OpenAI client at import; the mock replaces it for every call
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from advanced.mock_llm import MockChatClient, MockMessage, tool_call_message
+from use_cases.customer_support_bot import CustomerSupportBot, retrieve_faq
+from use_cases.faq_search import FAQHit
+
+# Replayed traffic: FAQ-style questions dominate real support queues
+QUERY_LOG = [
+    "What's your refund policy?",
+    "How do I cancel my subscription?",
+    "I forgot my password",
+    "what are your prices",
+    "How long does shipping take?",
+    "My account login is broken and I've tried everything",
+    "I was charged twice for my subscription!",
+    "What is the refund policy",
+    "how do i cancel my subscription",
+    "Can I get a refund? The product arrived damaged and I am furious",
+    "The app crashes every time I upload a photo",
+    "Do you offer express shipping?",
+    "forgot password",
+    "What plans and pricing do you offer?",
+    "I want to speak to a manager about a billing dispute",
+    "refund policy?",
+    "How do I reset my password?",
+    "Where is my order? It's been two weeks",
+    "cancel subscription",
+    "Is there a student discount?"
+]
+
+
+def support_responder(request: Dict) -> MockMessage:
+    """Mock GPT-4 policy: look the question up, then answer with the result"""
+    last = request["messages"][-1]
+    offered = {tool["function"]["name"] for tool in request.get("tools") or []}
+    if "search_faq" in offered and isinstance(last, dict) and last.get("role") == "user":
+        return tool_call_message(("search_faq", {"query": last["content"]}))
+    return "Thanks for reaching out! Here's what I found for you."
+
+
+def replay(bot: CustomerSupportBot, queries: List[str]) -> List[float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        bot.chat(query)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_fast_path_benchmark(latency: float = 0.2, threshold: float = 0.75):
+    """LLM-free fast path vs. always calling the model"""
+    baseline_client = MockChatClient(support_responder, latency=latency)
+    baseline = replay(CustomerSupportBot(baseline_client, fast_path_threshold=None, prefetch=None), QUERY_LOG)
+
+    fast_client = MockChatClient(support_responder, latency=latency)
+    bot = CustomerSupportBot(fast_client, fast_path_threshold=threshold, prefetch=None)
+    fast = replay(bot, QUERY_LOG)
+
+    local = bot.stats["fast_path"]
+    print("=== Fast Path Replay ===\n")
+    print(f"Queries replayed:        {len(QUERY_LOG)} (mock LLM latency {latency * 1000:.0f} ms/call)")
+    print(f"Served locally:          {local}/{len(QUERY_LOG)} ({local / len(QUERY_LOG):.0%}) at confidence >= {threshold}")
+    print(f"LLM calls:               {baseline_client.call_count} -> {fast_client.call_count}")
+    print(f"Mean latency:            {statistics.mean(baseline) * 1000:.0f} ms -> {statistics.mean(fast) * 1000:.0f} ms")
+    print(f"Median latency:          {statistics.median(baseline) * 1000:.0f} ms -> {statistics.median(fast) * 1000:.1f} ms")
+    print(f"Total replay time:       {sum(baseline):.2f}s -> {sum(fast):.2f}s")
+
+
+def run_prefetch_benchmark(latency: float = 0.2, retrieval_latency: float = 0.15, threshold: float = 0.75):
+    """Sequential search_faq round trip vs. speculative prefetch vs. up-front
+    injection, and the bot's defaults (fast path + injection)"""
+    def slow_retriever(query: str, k: int) -> List[FAQHit]:
+        time.sleep(retrieval_latency)  # e.g. the query embedding call of the semantic index
+        return retrieve_faq(query, k)
+
+    print("=== FAQ Prefetch Replay ===\n")
+    print(f"Queries replayed: {len(QUERY_LOG)} (mock LLM {latency * 1000:.0f} ms/call, "
+          f"retrieval {retrieval_latency * 1000:.0f} ms)\n")
+    print(f"{'Mode':<26} {'LLM calls':>10} {'Prefetch hits':>14} {'Mean':>8} {'p50':>8}")
+    modes = [
+        ("sequential", None, None),
+        ("speculative", "speculative", None),
+        ("inject", "inject", None),
+        ("fast path + inject", "inject", threshold)
+    ]
+    for name, mode, fast_path_threshold in modes:
+        mock = MockChatClient(support_responder, latency=latency)
+        bot = CustomerSupportBot(
+            mock, fast_path_threshold=fast_path_threshold, prefetch=mode, retriever=slow_retriever
+        )
+        latencies = replay(bot, QUERY_LOG)
+        print(
+            f"{name:<26} {mock.call_count:>10} {bot.stats['prefetch_hits']:>14} "
+            f"{statistics.mean(latencies) * 1000:>6.0f}ms {statistics.median(latencies) * 1000:>6.0f}ms"
+        )
+
+
+BENCHMARKS = {
+    "fast_path": run_fast_path_benchmark,
+    "prefetch": run_prefetch_benchmark
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("benchmark", nargs="?", choices=sorted(BENCHMARKS), help="Run one benchmark (default: all)")
+    args = parser.parse_args()
+    for name, benchmark in BENCHMARKS.items():
+        if args.benchmark in (None, name):
+            benchmark()
+            print()
@@ -0,0 +1,424 @@
+"""
+Support Ticket Store
+
+Write-behind persistence for support tickets created by the agents:
+- Collision-free, monotonic ticket IDs (also across restarts, and across
+  processes sharing one SQLite file: each store reserves ID blocks in it)
+- create() only appends to an in-memory queue, so the chat path never waits on disk
+- A background writer flushes tickets in batches to SQLite (WAL) or JSONL
+- Pending tickets are flushed on close() and at interpreter exit
+- A batch that keeps failing to write goes to a JSONL fallback file instead
+  of blocking shutdown
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+ID_PREFIX = "TICKET-"
+_STOP = object()
+
+
+@dataclass
+class Ticket:
+    """A support ticket"""
+    ticket_id: str
+    category: str
+    description: str
+    priority: str = "medium"
+    status: str = "open"
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def ticket_sequence(ticket_id: str) -> int:
+    return int(ticket_id[len(ID_PREFIX):])
+
+
+class SQLiteBackend:
+    """Tickets table in a WAL-mode SQLite database"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL keeps commits durable across app crashes
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tickets ("
+            "seq INTEGER PRIMARY KEY, ticket_id TEXT UNIQUE, category TEXT, description TEXT, "
+            "priority TEXT, status TEXT, created_at TEXT)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS id_blocks (next INTEGER NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def last_sequence(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT MAX(seq) FROM tickets").fetchone()
+        return row[0] or 0
+
+    def reserve(self, count: int, floor: int = 0) -> int:
+        """Reserve `count` consecutive sequence numbers, none below `floor`; returns the first.
+
+        BEGIN IMMEDIATE takes the database write lock, so stores in other
+        processes sharing the file never get overlapping blocks.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                reserved = self._db.execute("SELECT next FROM id_blocks").fetchone()
+                stored = self._db.execute("SELECT MAX(seq) FROM tickets").fetchone()[0] or 0
+                start = max(reserved[0] if reserved else 0, stored + 1, floor)
+                if reserved:
+                    self._db.execute("UPDATE id_blocks SET next = ?", (start + count,))
+                else:
+                    self._db.execute("INSERT INTO id_blocks VALUES (?)", (start + count,))
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return start
+
+    def write_batch(self, tickets: List[Ticket]):
+        rows = [
+            (ticket_sequence(t.ticket_id), t.ticket_id, t.category, t.description, t.priority, t.status, t.created_at)
+            for t in tickets
+        ]
+        # A plain INSERT: a duplicate ID fails the batch (and it goes to the
+        # fallback file) instead of silently replacing another ticket
+        with self._lock, self._db:  # one transaction per batch
+            self._db.executemany("INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ticket_id, category, description, priority, status, created_at "
+                "FROM tickets WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        return Ticket(*row) if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class JSONLBackend:
+    """Append-only JSONL file, fsynced after every batch (one process at a time)"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._next = self.last_sequence() + 1
+
+    def _records(self):
+        if not self.path.exists():
+            return
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def last_sequence(self) -> int:
+        return max((ticket_sequence(r["ticket_id"]) for r in self._records()), default=0)
+
+    def reserve(self, count: int, floor: int = 0) -> int:
+        """Reserve `count` consecutive sequence numbers, none below `floor`; returns the first"""
+        with self._lock:
+            start = max(self._next, floor)
+            self._next = start + count
+        return start
+
+    def write_batch(self, tickets: List[Ticket]):
+        payload = "".join(json.dumps(t.to_dict()) + "\n" for t in tickets)
+        with self._lock:
+            self._file.write(payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        found = None
+        for record in self._records():
+            if record["ticket_id"] == ticket_id:
+                found = record  # last write wins
+        return Ticket(**found) if found else None
+
+    def count(self) -> int:
+        return len({r["ticket_id"] for r in self._records()})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class TicketStore:
+    """Ticket creation with write-behind batching.
+
+    create() assigns an ID, keeps the ticket readable from memory and
+    enqueues it; a writer thread drains the queue in batches of up to
+    `batch_size`, waiting at most `flush_interval` seconds for a batch to fill.
+    A batch that fails `max_write_attempts` times is appended to
+    `fallback_path` (default <path>.unwritten.jsonl) for later replay.
+
+    IDs come from blocks of `id_block` sequence numbers reserved in the
+    backend, so create() touches the database once per block.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "tickets.db",
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_write_attempts: int = 5,
+        fallback_path: Optional[Union[str, Path]] = None,
+        id_block: int = 1000
+    ):
+        path = Path(path)
+        self.backend = JSONLBackend(path) if path.suffix == ".jsonl" else SQLiteBackend(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_write_attempts = max_write_attempts
+        self.fallback_path = Path(fallback_path) if fallback_path else Path(f"{path}.unwritten.jsonl")
+        self.stats = {"created": 0, "flushed": 0, "batches": 0, "errors": 0, "fallback": 0}
+        self.id_block = id_block
+        self._next_seq = self._block_end = 0  # current reserved block, [next, end)
+        self._lock = threading.Lock()  # IDs, and ordering of create()/flush() against close()
+        self._pending: Dict[str, Ticket] = {}  # enqueued but not yet written
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="ticket-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def next_id(self) -> str:
+        """Monotonic ID from the reserved block; a new block starts no lower than the microsecond clock"""
+        with self._lock:
+            return self._next_id()
+
+    def _next_id(self) -> str:
+        if self._next_seq >= self._block_end:
+            self._next_seq = self.backend.reserve(self.id_block, time.time_ns() // 1000)
+            self._block_end = self._next_seq + self.id_block
+        seq, self._next_seq = self._next_seq, self._next_seq + 1
+        return f"{ID_PREFIX}{seq}"
+
+    def create(self, category: str, description: str, priority: str = "medium") -> Ticket:
+        """Create a ticket; returns immediately, persistence happens in the background"""
+        # Checked and enqueued under the lock close() takes, so nothing lands after _STOP
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TicketStore is closed")
+            ticket = Ticket(self._next_id(), category, description, priority)
+            self._pending[ticket.ticket_id] = ticket
+            self.stats["created"] += 1
+            self._queue.put(ticket)
+        return ticket
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        """Read-your-writes lookup: pending tickets first, then the backend"""
+        return self._pending.get(ticket_id) or self.backend.get(ticket_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _write(self, batch: List[Ticket]):
+        for attempt in range(1, self.max_write_attempts + 1):
+            try:
+                self.backend.write_batch(batch)
+                break
+            except Exception as e:  # anything left uncaught would kill the writer and hang flush()/close()
+                self.stats["errors"] += 1
+                print(f"⚠️  Ticket flush failed (attempt {attempt}/{self.max_write_attempts}): {e}")
+                if attempt < self.max_write_attempts:
+                    time.sleep(self.flush_interval * 2 ** (attempt - 1))
+        else:
+            self._write_fallback(batch)
+            return
+        for ticket in batch:
+            self._pending.pop(ticket.ticket_id, None)
+        self.stats["flushed"] += len(batch)
+        self.stats["batches"] += 1
+
+    def _write_fallback(self, batch: List[Ticket]):
+        """Append a batch the backend would not take to the fallback file"""
+        try:
+            with self.fallback_path.open("a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(t.to_dict()) + "\n" for t in batch))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            print(f"⚠️  {len(batch)} tickets could not be saved anywhere: {e}")
+            return  # still readable from memory via get()
+        print(f"⚠️  {len(batch)} tickets saved to {self.fallback_path} for replay")
+        for ticket in batch:
+            self._pending.pop(ticket.ticket_id, None)
+        self.stats["fallback"] += len(batch)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: List[Ticket] = []
+            markers: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    markers.append(item)  # flush request: write what we have now
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every ticket created so far is written (or handed to the fallback)"""
+        done = threading.Event()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put(done)
+        if closed:
+            # Nothing is read after _STOP: wait for close() to finish draining instead
+            self._writer.join(timeout)
+            return not self._writer.is_alive()
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending tickets and release the backend (safe to call twice)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)  # the writer drains everything queued before it
+        self._writer.join()
+        self.backend.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "TicketStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_store: Optional[TicketStore] = None
+_default_lock = threading.Lock()
+
+
+def get_ticket_store() -> TicketStore:
+    """Process-wide store shared by the agents; TICKET_STORE sets the file (.db or .jsonl)"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = TicketStore(os.environ.get("TICKET_STORE", "tickets.db"))
+        return _default_store
+
+
+class WriteThroughStore:
+    """Baseline for the benchmark: one committed INSERT per ticket on the caller's thread"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.backend = SQLiteBackend(path)
+        self._id_lock = threading.Lock()
+        self._last_seq = self.backend.last_sequence()
+
+    def create(self, category: str, description: str, priority: str = "medium") -> Ticket:
+        with self._id_lock:
+            self._last_seq += 1
+            ticket = Ticket(f"{ID_PREFIX}{self._last_seq}", category, description, priority)
+        self.backend.write_batch([ticket])
+        return ticket
+
+    def close(self):
+        self.backend.close()
+
+
+def run_benchmark(sessions: int = 32, tickets_per_session: int = 250):
+    """Ticket creation throughput and latency under concurrent chat sessions"""
+    total = sessions * tickets_per_session
+
+    def drive(store) -> List[float]:
+        def session(n: int) -> List[float]:
+            latencies = []
+            for i in range(tickets_per_session):
+                start = time.perf_counter()
+                store.create("technical", f"Session {n}: issue {i}", "high")
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            return [lat for lats in pool.map(session, range(sessions)) for lat in lats]
+
+    print("=== Ticket Store Benchmark ===\n")
+    print(f"{sessions} concurrent sessions x {tickets_per_session} tickets\n")
+    print(f"{'Store':<26} {'Tickets/s':>10} {'p50 create':>11} {'p99 create':>11} {'Persisted':>10}")
+    for name, suffix in (("write-through (SQLite)", ".db"), ("write-behind (SQLite WAL)", ".db"),
+                         ("write-behind (JSONL)", ".jsonl")):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / f"tickets{suffix}"
+            store = WriteThroughStore(path) if name.startswith("write-through") else TicketStore(path)
+
+            start = time.perf_counter()
+            latencies = drive(store)
+            elapsed = time.perf_counter() - start
+            backend = store.backend
+            if isinstance(store, TicketStore):
+                store.flush()
+            persisted = backend.count()
+            store.close()
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"{name:<26} {total / elapsed:>10,.0f} {quantiles[49] * 1e6:>9.0f}µs "
+              f"{quantiles[98] * 1e6:>9.0f}µs {persisted:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or benchmark the ticket store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Print a stored ticket")
+    show.add_argument("ticket_id")
+    sub.add_parser("bench", help="Benchmark concurrent ticket creation")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        ticket = get_ticket_store().get(args.ticket_id)
+        print(json.dumps(ticket.to_dict(), indent=2) if ticket else f"{args.ticket_id} not found")
+    else:
+        run_benchmark()
+
+
+if __name__ == "__main__":
+    main()